@@ -0,0 +1,218 @@
+"""
+Benchmarks de desempenho do simulador.
+
+Roda os kernels de benchmarks/ no SimuladorPipeline (com forwarding e detecção
+de hazards) e mede, para cada um: ciclos simulados, instruções retiradas, CPI,
+tempo de host (melhor e mediana das repetições), instruções e ciclos simulados
+por segundo de host e o pico de memória alocada (tracemalloc, em uma execução
+à parte para não afetar o tempo). O estado final é conferido com o
+SimuladorFuncional.
+
+Uso:
+    python benchmark.py [kernels ...] [--repeticoes N] [--preditor TIPO]
+                        [--saida resultados.json] [--comparar base.json] [--tolerancia 0.1]
+
+Com --comparar, imprime a variação de instruções por segundo em relação a um
+resultado anterior (por exemplo, de outro commit) e retorna erro se algum
+kernel ficou mais lento que a tolerância.
+
+Com --ula, mede só a ULA: operações por segundo de cada operação computacional
+(despacho pela tabela `operacoes` e chamada), com operandos aleatórios.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from componentes.preditor import TIPOS_PREDITOR
+
+DIRETORIO_KERNELS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+MAX_CICLOS = 10_000_000
+
+
+def listar_kernels(nomes=None):
+    """Todos os .asm de benchmarks/, ou só os nomes pedidos (com ou sem .asm)."""
+    caminhos = sorted(glob.glob(os.path.join(DIRETORIO_KERNELS, "*.asm")))
+    if not nomes:
+        return caminhos
+    por_nome = {os.path.splitext(os.path.basename(c))[0]: c for c in caminhos}
+    selecionados = []
+    for nome in nomes:
+        nome = os.path.splitext(os.path.basename(nome))[0]
+        if nome not in por_nome:
+            raise ValueError(f"Kernel desconhecido: {nome} (disponíveis: {', '.join(por_nome)})")
+        selecionados.append(por_nome[nome])
+    return selecionados
+
+
+def _executar(codigo, opcoes):
+    from simulador_pipeline import SimuladorPipeline
+    sim = SimuladorPipeline(codigo, arquivo_saida=None, contadores_desempenho=True, **opcoes)
+    sim.executar(max_ciclos=MAX_CICLOS)
+    return sim
+
+
+def medir_kernel(caminho, repeticoes=5, preditor=None):
+    from simulador_funcional import SimuladorFuncional
+
+    with open(caminho, "r", encoding="utf-8") as f:
+        codigo = f.read()
+    opcoes = {"enable_forwarding": True, "enable_hazard_detection": True, "preditor": preditor}
+
+    tempos = []
+    # As mensagens do simulador vão para /dev/null (um StringIO cresceria e distorceria a memória)
+    with open(os.devnull, "w") as nulo, redirect_stdout(nulo):
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            sim = _executar(codigo, opcoes)
+            tempos.append(time.perf_counter() - inicio)
+
+        tracemalloc.start()
+        _executar(codigo, opcoes)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        referencia = SimuladorFuncional(codigo)
+        referencia.executar(max_ciclos=MAX_CICLOS)
+
+    contadores = sim.estatisticas_desempenho()
+    retiradas = contadores["instrucoes_retiradas"]
+    melhor = min(tempos)
+    return {
+        "ciclos": sim.clock_cycle,
+        "instrucoes_retiradas": retiradas,
+        "cpi": contadores["cpi"],
+        "tempo_s": round(melhor, 6),
+        "tempo_mediano_s": round(statistics.median(tempos), 6),
+        "instrucoes_por_segundo": round(retiradas / melhor),
+        "ciclos_por_segundo": round(sim.clock_cycle / melhor),
+        "memoria_pico_kib": round(pico / 1024, 1),
+        "concluido": sim.halted,
+        "correto": (sim.registradores == referencia.registradores
+                    and sim.dados_na_memoria == referencia.dados_na_memoria),
+    }
+
+
+def medir_ula(repeticoes=5, num_operandos=20000):
+    """Operações por segundo de cada operação da ULA (melhor das repetições)."""
+    import random
+    from componentes.alu import ALU32Bit
+    from componentes.isa import NOMES_INSTRUCOES, OPS_ARITMETICAS
+
+    operacoes = ALU32Bit().operacoes
+    gerador = random.Random(0)
+    pares = [(gerador.getrandbits(32), gerador.getrandbits(32)) for _ in range(num_operandos)]
+    resultados = {}
+    for op in sorted(OPS_ARITMETICAS, key=lambda op: NOMES_INSTRUCOES[op]):
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            for a, b in pares:
+                operacoes[op](a, b)
+            tempos.append(time.perf_counter() - inicio)
+        resultados[NOMES_INSTRUCOES[op]] = round(num_operandos / min(tempos))
+        print(f"{NOMES_INSTRUCOES[op]:8s} {resultados[NOMES_INSTRUCOES[op]]:>12,} op/s", file=sys.stderr)
+    return resultados
+
+
+def _commit_atual():
+    try:
+        resultado = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return resultado.stdout.strip() or None
+
+
+def executar_benchmarks(caminhos, repeticoes=5, preditor=None):
+    kernels = {}
+    for caminho in caminhos:
+        nome = os.path.splitext(os.path.basename(caminho))[0]
+        kernels[nome] = medir_kernel(caminho, repeticoes, preditor)
+        print(f"{nome:18s} {kernels[nome]['ciclos']:9d} ciclos  "
+              f"{kernels[nome]['instrucoes_por_segundo']:>10,} instr/s  "
+              f"{kernels[nome]['memoria_pico_kib']:8.1f} KiB"
+              f"{'' if kernels[nome]['correto'] else '  ESTADO FINAL INCORRETO'}", file=sys.stderr)
+    return {
+        "commit": _commit_atual(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "opcoes": {"repeticoes": repeticoes, "preditor": preditor},
+        "kernels": kernels,
+    }
+
+
+def comparar(atual, base, tolerancia=0.1):
+    """Imprime (em stderr) a variação por kernel; retorna os kernels mais lentos que a tolerância."""
+    regressoes = []
+    print(f"{'kernel':18s} {'base instr/s':>14s} {'atual instr/s':>14s} {'variação':>9s}", file=sys.stderr)
+    for nome, medida in atual["kernels"].items():
+        anterior = base.get("kernels", {}).get(nome)
+        if anterior is None:
+            print(f"{nome:18s} {'-':>14s} {medida['instrucoes_por_segundo']:>14,} {'novo':>9s}", file=sys.stderr)
+            continue
+        variacao = medida["instrucoes_por_segundo"] / anterior["instrucoes_por_segundo"] - 1
+        aviso = ""
+        if medida["ciclos"] != anterior["ciclos"]:
+            aviso = f"  ciclos simulados mudaram: {anterior['ciclos']} -> {medida['ciclos']}"
+        print(f"{nome:18s} {anterior['instrucoes_por_segundo']:>14,} {medida['instrucoes_por_segundo']:>14,} "
+              f"{variacao:>+8.1%}{aviso}", file=sys.stderr)
+        if variacao < -tolerancia:
+            regressoes.append(nome)
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede o desempenho do simulador nos kernels de benchmarks/.")
+    parser.add_argument("kernels", nargs="*", help="kernels a executar (padrão: todos)")
+    parser.add_argument("--repeticoes", type=int, default=5, help="execuções cronometradas por kernel")
+    parser.add_argument("--preditor", default=None, choices=TIPOS_PREDITOR, help="preditor de desvios")
+    parser.add_argument("--saida", default=None, help="arquivo JSON de resultados (padrão: saída padrão)")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--tolerancia", type=float, default=0.1,
+                        help="queda máxima de instruções/s aceita na comparação (padrão: 0.1)")
+    parser.add_argument("--ula", action="store_true", help="mede só a ULA (operações por segundo de cada operação)")
+    args = parser.parse_args(argv)
+    if args.ula and (args.kernels or args.comparar):
+        parser.error("--ula não usa kernels nem --comparar")
+
+    try:
+        caminhos = listar_kernels(args.kernels)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.ula:
+        resultados = {"commit": _commit_atual(), "python": platform.python_version(),
+                      "ula": medir_ula(args.repeticoes)}
+    else:
+        resultados = executar_benchmarks(caminhos, args.repeticoes, args.preditor)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+    else:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+
+    falhas = [nome for nome, medida in resultados.get("kernels", {}).items() if not medida["correto"]]
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(resultados, base, args.tolerancia)
+        if regressoes:
+            print(f"Mais lentos que a tolerância ({args.tolerancia:.0%}): {', '.join(regressoes)}", file=sys.stderr)
+            falhas += regressoes
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
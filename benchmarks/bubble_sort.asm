@@ -0,0 +1,38 @@
+# Ordenação por bolha de 96 palavras pseudoaleatórias na memória
+# O vetor (endereço 256) é gerado por um LCG: x = x * 69069 + 1, usando os 16 bits altos
+
+    addi s0, zero, 256       # base do vetor
+    addi s1, zero, 96        # N
+    addi s2, zero, 33        # multiplicador 69069 = 33 * 2048 + 1485
+    addi t0, zero, 11
+    sll  s2, s2, t0
+    addi s2, s2, 1485
+    addi s3, zero, 16
+    addi t0, zero, 1234      # semente
+    addi t1, zero, 0         # i
+    addi t2, s0, 0           # ponteiro
+gera:
+    mul  t0, t0, s2
+    addi t0, t0, 1
+    srl  t3, t0, s3
+    sw   t3, 0(t2)
+    addi t2, t2, 4
+    addi t1, t1, 1
+    blt  t1, s1, gera
+
+    addi t1, s1, -1          # comparações na passada atual
+externo:
+    addi t2, s0, 0           # ponteiro para v[j]
+    addi t4, zero, 0         # j
+interno:
+    lw   t5, 0(t2)
+    lw   t6, 4(t2)
+    bge  t6, t5, sem_troca   # v[j + 1] >= v[j]
+    sw   t6, 0(t2)
+    sw   t5, 4(t2)
+sem_troca:
+    addi t2, t2, 4
+    addi t4, t4, 1
+    blt  t4, t1, interno
+    addi t1, t1, -1
+    bne  t1, zero, externo
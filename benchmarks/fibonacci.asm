@@ -0,0 +1,17 @@
+# Fibonacci iterativo: calcula fib(47) (mod 2^32) 200 vezes
+# Resultado final em t1 e na palavra 0 da memória
+
+    addi s0, zero, 200       # repetições
+externo:
+    addi t0, zero, 0         # fib(i - 1)
+    addi t1, zero, 1         # fib(i)
+    addi t2, zero, 46        # termos restantes
+interno:
+    add  t3, t0, t1
+    addi t0, t1, 0
+    addi t1, t3, 0
+    addi t2, t2, -1
+    bne  t2, zero, interno
+    addi s0, s0, -1
+    bne  s0, zero, externo
+    sw   t1, 0(zero)
@@ -0,0 +1,50 @@
+# Máquina de estados com muitos desvios: conta as ocorrências do padrão de bits 1101
+# em 4000 bits pseudoaleatórios (bit mais alto de um LCG x = x * 69069 + 1)
+# Estado = quantos bits do padrão já foram vistos; contagem final em t2 e na palavra 0
+
+    addi s0, zero, 2000      # passos (2 x 2000 = 4000 bits)
+    addi s0, s0, 2000
+    addi s2, zero, 33        # multiplicador 69069 = 33 * 2048 + 1485
+    addi t0, zero, 11
+    sll  s2, s2, t0
+    addi s2, s2, 1485
+    addi s3, zero, 31
+    addi s4, zero, 1
+    addi s5, zero, 2
+    addi t0, zero, 99        # semente
+    addi t1, zero, 0         # estado
+    addi t2, zero, 0         # contagem
+passo:
+    mul  t0, t0, s2
+    addi t0, t0, 1
+    srl  t3, t0, s3          # próximo bit
+    beq  t1, zero, estado0
+    beq  t1, s4, estado1
+    beq  t1, s5, estado2
+    beq  t3, zero, vai0      # estado 3 ("110")
+    addi t2, t2, 1           # padrão completo; o último 1 recomeça um padrão
+    j    vai1
+estado0:
+    beq  t3, zero, vai0
+    j    vai1
+estado1:
+    beq  t3, zero, vai0
+    j    vai2
+estado2:
+    bne  t3, zero, vai2      # "111" continua terminando em "11"
+    j    vai3
+vai0:
+    addi t1, zero, 0
+    j    proximo
+vai1:
+    addi t1, zero, 1
+    j    proximo
+vai2:
+    addi t1, zero, 2
+    j    proximo
+vai3:
+    addi t1, zero, 3
+proximo:
+    addi s0, s0, -1
+    bne  s0, zero, passo
+    sw   t2, 0(zero)
@@ -0,0 +1,54 @@
+# Multiplicação de matrizes 16x16 com mul: C = A x B
+# A em 0, B em 1024 e C em 2048; A[k] = k e B[k] = 3k + 1
+
+    addi s0, zero, 0         # A
+    addi s1, zero, 1024      # B
+    addi s2, s1, 1024        # C
+    addi s3, zero, 16        # n
+    addi s4, zero, 256       # n * n
+    addi s5, zero, 64        # bytes por linha
+
+    addi t0, zero, 0         # k
+    addi t1, zero, 0         # 4k
+inicializa:
+    add  t2, s0, t1
+    sw   t0, 0(t2)
+    add  t3, t0, t0
+    add  t3, t3, t0
+    addi t3, t3, 1
+    add  t2, s1, t1
+    sw   t3, 0(t2)
+    addi t0, t0, 1
+    addi t1, t1, 4
+    blt  t0, s4, inicializa
+
+    addi t0, zero, 0         # i
+linha:
+    addi t1, zero, 0         # j
+coluna:
+    addi t2, zero, 0         # k
+    addi t6, zero, 0         # acumulador
+    mul  a0, t0, s5
+    add  a0, a0, s0          # &A[i][0]
+    add  a1, t1, t1
+    add  a1, a1, a1
+    add  a1, a1, s1          # &B[0][j]
+produto:
+    lw   a2, 0(a0)
+    lw   a3, 0(a1)
+    mul  a4, a2, a3
+    add  t6, t6, a4
+    addi a0, a0, 4
+    add  a1, a1, s5
+    addi t2, t2, 1
+    blt  t2, s3, produto
+    mul  a5, t0, s5
+    add  a6, t1, t1
+    add  a6, a6, a6
+    add  a5, a5, a6
+    add  a5, a5, s2
+    sw   t6, 0(a5)           # C[i][j]
+    addi t1, t1, 1
+    blt  t1, s3, coluna
+    addi t0, t0, 1
+    blt  t0, s3, linha
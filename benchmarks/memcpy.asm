@@ -0,0 +1,35 @@
+# memcpy de 256 palavras (origem 0, destino 1024), desenrolado 4x, repetido 32 vezes
+
+    addi s0, zero, 0         # origem
+    addi s1, zero, 1024      # destino
+    addi s2, zero, 256       # palavras
+    addi s4, s1, 1024        # fim do destino
+
+    addi t0, zero, 0         # origem[k] = 7k
+    addi t1, s0, 0
+    addi t3, zero, 0
+inicializa:
+    sw   t3, 0(t1)
+    addi t3, t3, 7
+    addi t1, t1, 4
+    addi t0, t0, 1
+    blt  t0, s2, inicializa
+
+    addi s3, zero, 32        # repetições
+repete:
+    addi t1, s0, 0
+    addi t2, s1, 0
+copia:
+    lw   a0, 0(t1)
+    lw   a1, 4(t1)
+    lw   a2, 8(t1)
+    lw   a3, 12(t1)
+    sw   a0, 0(t2)
+    sw   a1, 4(t2)
+    sw   a2, 8(t2)
+    sw   a3, 12(t2)
+    addi t1, t1, 16
+    addi t2, t2, 16
+    blt  t2, s4, copia
+    addi s3, s3, -1
+    bne  s3, zero, repete
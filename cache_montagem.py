@@ -0,0 +1,194 @@
+"""
+Cache de montagem endereçada pelo conteúdo do código-fonte.
+
+No disco, a chave é o SHA-256 do texto do programa junto com
+`montador.VERSAO_MONTADOR`, então uma mudança no texto ou na codificação do
+montador gera outra chave e nunca é preciso invalidar entradas. Na memória, a
+chave é o próprio texto (a versão não muda dentro do processo), o que evita
+calcular o hash e importar o hashlib quando não há diretório.
+
+Duas camadas:
+    memória  LRU no processo (`capacidade` entradas); guarda também a tabela
+             pré-decodificada, então um acerto não monta nem decodifica nada
+    disco    opcional (`diretorio`): um arquivo <chave>.rvm por programa, com as
+             palavras montadas, a tabela de labels e o mapa de linhas;
+             compartilhada entre processos (lote.py) e execuções
+
+Montagens com erro (programa vazio a partir de texto não vazio) não são
+guardadas, para que as mensagens de erro do montador apareçam sempre.
+
+Os simuladores usam a instância `cache_padrao` (só memória); para ligar o disco:
+    cache_montagem.cache_padrao.diretorio = "~/.cache/riscv"
+"""
+from array import array
+from collections import OrderedDict
+import os
+import struct
+import sys
+
+from componentes.isa import pre_decodificar
+import montador
+
+MAGICO = b"RVMC"
+VERSAO_FORMATO = 1
+EXTENSAO = ".rvm"
+
+# mágico, versão do formato, versão do montador, número de palavras, número de labels
+_CABECALHO = struct.Struct("<4sHHII")
+# endereço e tamanho do nome (UTF-8) de cada label
+_LABEL = struct.Struct("<IH")
+
+
+class Montagem:
+    """Resultado de uma montagem: palavras, labels, linha de cada palavra e a tabela pré-decodificada."""
+    __slots__ = ("palavras", "labels", "linhas", "decodificado")
+
+    def __init__(self, palavras, labels, linhas, decodificado=None):
+        self.palavras = palavras
+        self.labels = labels
+        self.linhas = linhas
+        if decodificado is None:
+            decodificado = [pre_decodificar(inst) for inst in palavras]
+        self.decodificado = decodificado
+
+
+def chave(texto):
+    """Chave de `texto` na cache: depende do texto e da versão do montador."""
+    import hashlib
+    dados = f"{montador.VERSAO_MONTADOR}\0{texto}".encode("utf-8")
+    return hashlib.sha256(dados).hexdigest()
+
+
+class CacheMontagem:
+    def __init__(self, capacidade=64, diretorio=None):
+        self.capacidade = capacidade
+        self.diretorio = diretorio
+        self.entradas = OrderedDict()
+
+        self.acertos_memoria = 0
+        self.acertos_disco = 0
+        self.faltas = 0
+
+    def montar(self, texto):
+        """
+        Retorna a `Montagem` de `texto` (o programa já sem espaços nas pontas,
+        como em `montador.montar_linhas(texto.splitlines())`). Os objetos
+        retornados são compartilhados: quem for alterar as palavras ou a tabela
+        decodificada deve copiá-las antes.
+        """
+        montagem = self.entradas.get(texto)
+        if montagem is not None:
+            self.entradas.move_to_end(texto)
+            self.acertos_memoria += 1
+            return montagem
+
+        k = chave(texto) if self.diretorio else None
+        montagem = self._ler_disco(k)
+        if montagem is not None:
+            self.acertos_disco += 1
+        else:
+            self.faltas += 1
+            linhas, labels = [], {}
+            palavras = montador.montar_linhas(texto.splitlines(), linhas, labels)
+            montagem = Montagem(palavras, labels, linhas)
+            if texto and not len(palavras):
+                return montagem
+            self._gravar_disco(k, montagem)
+        self._guardar(texto, montagem)
+        return montagem
+
+    def _guardar(self, texto, montagem):
+        if self.capacidade <= 0:
+            return
+        self.entradas[texto] = montagem
+        if len(self.entradas) > self.capacidade:
+            self.entradas.popitem(last=False)
+
+    def _caminho(self, k):
+        return os.path.join(os.path.expanduser(self.diretorio), k + EXTENSAO)
+
+    def _ler_disco(self, k):
+        """Lê a entrada `k` do disco; arquivo ausente, de outra versão ou corrompido conta como falta."""
+        if not self.diretorio:
+            return None
+        try:
+            with open(self._caminho(k), "rb") as f:
+                dados = f.read()
+            magico, formato, versao, n_palavras, n_labels = _CABECALHO.unpack_from(dados, 0)
+            if magico != MAGICO or formato != VERSAO_FORMATO or versao != montador.VERSAO_MONTADOR:
+                return None
+            posicao = _CABECALHO.size
+            palavras = array("I", dados[posicao:posicao + 4 * n_palavras])
+            posicao += 4 * n_palavras
+            linhas = array("I", dados[posicao:posicao + 4 * n_palavras])
+            posicao += 4 * n_palavras
+            if len(palavras) != n_palavras or len(linhas) != n_palavras:
+                return None
+            if sys.byteorder != "little":
+                palavras.byteswap()
+                linhas.byteswap()
+            labels = {}
+            for _ in range(n_labels):
+                endereco, tamanho = _LABEL.unpack_from(dados, posicao)
+                posicao += _LABEL.size
+                labels[dados[posicao:posicao + tamanho].decode("utf-8")] = endereco
+                posicao += tamanho
+        except (OSError, ValueError, struct.error):
+            return None
+        return Montagem(palavras, labels, linhas.tolist())
+
+    def _gravar_disco(self, k, montagem):
+        if not self.diretorio:
+            return
+        palavras = array("I", montagem.palavras)
+        linhas = array("I", montagem.linhas)
+        if sys.byteorder != "little":
+            palavras.byteswap()
+            linhas.byteswap()
+        partes = [_CABECALHO.pack(MAGICO, VERSAO_FORMATO, montador.VERSAO_MONTADOR,
+                                  len(palavras), len(montagem.labels)),
+                  palavras.tobytes(), linhas.tobytes()]
+        for nome, endereco in montagem.labels.items():
+            nome = nome.encode("utf-8")
+            partes.append(_LABEL.pack(endereco, len(nome)))
+            partes.append(nome)
+
+        caminho = self._caminho(k)
+        # Grava em um arquivo temporário e renomeia: outro processo nunca lê um arquivo pela metade
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(caminho), exist_ok=True)
+            with open(temporario, "wb") as f:
+                f.write(b"".join(partes))
+            os.replace(temporario, caminho)
+        except OSError:
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Esvazia a camada em memória e zera as estatísticas (o disco não é alterado)."""
+        self.entradas.clear()
+        self.acertos_memoria = self.acertos_disco = self.faltas = 0
+
+    def estatisticas(self):
+        consultas = self.acertos_memoria + self.acertos_disco + self.faltas
+        return {
+            "capacidade": self.capacidade,
+            "entradas": len(self.entradas),
+            "diretorio": self.diretorio,
+            "consultas": consultas,
+            "acertos_memoria": self.acertos_memoria,
+            "acertos_disco": self.acertos_disco,
+            "faltas": self.faltas,
+            "taxa_acerto": (self.acertos_memoria + self.acertos_disco) / consultas if consultas else None,
+        }
+
+
+cache_padrao = CacheMontagem()
+
+
+def montar(texto):
+    """Monta `texto` pela cache padrão."""
+    return cache_padrao.montar(texto)
@@ -0,0 +1,407 @@
+"""
+Checkpoints do SimuladorPipeline: captura/restauração do estado completo e um
+formato binário versionado para gravá-lo em disco.
+
+O checkpoint guarda PC, ciclo, registradores, latches do pipeline, imagem de
+instruções, memória, `dados_na_memoria`, contadores de hazards e o estado do
+preditor de desvios (tabelas, BTB e estatísticas) e da cache de dados (blocos,
+bits de sujeira e contadores). Os contadores de desempenho (desempenho.py) só
+fazem parte do checkpoint em memória: depois de carregar um arquivo, a contagem
+recomeça no ciclo restaurado. O mesmo vale para a reserva do lr.w: depois de
+carregar um arquivo o hart não tem reserva e o próximo sc.w falha, o que a
+especificação permite (o programa repete o lr.w). A captura é barata: a
+imagem de instruções e as páginas da memória paginada passam a ser
+compartilhadas e só são copiadas na primeira escrita seguinte (cópia na
+escrita). O arquivo de saída (saida.out) não faz parte do checkpoint.
+
+As opções (forwarding, detecção de hazards, tipo de preditor, cache) também não
+fazem parte do checkpoint: valem as do simulador que o restaura, e o estado do
+preditor e da cache só é restaurado se a configuração coincidir.
+
+Formato do arquivo (little-endian), versão 4 (só essa versão é lida):
+    cabeçalho          b"RVCK" + versão (u16)
+    estado             pc (i64), base_instrucoes (u32), ciclo (u64), halted (u8)
+    registradores      32 x u32
+    latches            IF/ID, ID/EX, EX/MEM e MEM/WB (ver _ler_latches)
+    instruções         quantidade (u32) + palavras (u32)
+    dados_na_memoria   quantidade (u32) + pares endereço/valor (u32)
+    memória            tipo (u8: 0 densa, 1 paginada) + conteúdo; na paginada
+                       só as páginas não nulas: bits_pagina (u8), quantidade
+                       (u32) e, para cada uma, número (u32) + bytes
+    contadores         bolhas_hazard, encaminhamentos, ciclos_espera_memoria
+                       (u64), espera restante em MEM (u32) e acesso feito (u8)
+    desvios            tipo do preditor (u8, 255 = sem preditor); se houver:
+                       bits (u8), histórico (u32), tabela (u32 + bytes),
+                       BTB (u32 entradas + tag i64/alvo i64/incondicional u8
+                       cada, tag -1 = vazia), previsões e erros (u64) e
+                       contagens por PC (u32 + pc u32/execuções u64/acertos u64)
+    cache              presente (u8); se houver: configuração (ver _CONFIG_CACHE),
+                       contadores (6 x u64) e conjuntos não vazios (u32 + índice
+                       u32, blocos u8 e bloco u32/sujo u8 de cada, na ordem de
+                       substituição); o gerador da substituição aleatória não é
+                       gravado e recomeça da semente
+
+Uso típico: avançar o programa uma vez, salvar o checkpoint e iniciar vários
+experimentos a partir dele:
+
+    sim.executar(max_ciclos=1_000_000)
+    sim.salvar_checkpoint("meio.ckpt")
+    ...
+    outro = SimuladorPipeline(arquivo_saida=None)
+    outro.carregar_checkpoint("meio.ckpt")
+"""
+import struct
+import sys
+from array import array
+
+from componentes.cache import POLITICAS_ESCRITA, SUBSTITUICOES, CacheDados
+from componentes.isa import BOLHA, NOMES_INSTRUCOES, InstrucaoDecodificada
+from componentes.memoria import criar_memoria
+from componentes.preditor import TIPOS_PREDITOR, UnidadeDesvios
+from desempenho import ContadoresDesempenho
+
+MAGICO = b"RVCK"
+VERSAO = 4
+
+_CABECALHO = struct.Struct("<4sH")
+_ESTADO = struct.Struct("<qIQB")
+_INFO = struct.Struct("<BcBBBi")
+_IF_ID = struct.Struct("<BIq")
+_ID_EX = struct.Struct("<BqII")
+_EX_MEM = struct.Struct("<BQIq")
+_MEM_WB = struct.Struct("<BQq")
+_U32 = struct.Struct("<I")
+_U8 = struct.Struct("<B")
+_CONTADORES = struct.Struct("<QQ")
+_CONTADORES_PIPELINE = struct.Struct("<QQQIB")
+_PREDITOR = struct.Struct("<BBI")
+_ENTRADA_BTB = struct.Struct("<qqB")
+_CONTAGEM_PC = struct.Struct("<IQQ")
+_SEM_PREDITOR = 255
+# tamanho, tamanho_bloco, associatividade, substituição, política de escrita,
+# alocar_na_escrita, penalidade_falta, semente
+_CONFIG_CACHE = struct.Struct("<IIIBBBII")
+_CONTADORES_CACHE = struct.Struct("<6Q")
+_BLOCO_CACHE = struct.Struct("<IB")
+
+_TIPOS_MEMORIA = ("densa", "paginada")
+
+
+class Checkpoint:
+    """Estado completo do simulador em um ciclo; criado por `capturar`."""
+    __slots__ = ("pc", "base_instrucoes", "clock_cycle", "halted", "registradores",
+                 "latches", "instrucoes", "dados_na_memoria", "tipo_memoria", "memoria",
+                 "reserva", "contadores", "desvios", "cache", "desempenho")
+
+    def salvar(self, caminho):
+        salvar(self, caminho)
+
+
+def capturar(sim):
+    ckpt = Checkpoint()
+    ckpt.pc = sim.pc
+    ckpt.base_instrucoes = sim.base_instrucoes
+    ckpt.clock_cycle = sim.clock_cycle
+    ckpt.halted = sim.halted
+    ckpt.registradores = list(sim._registradores.regs)
+    ckpt.latches = (sim.if_id.capturar(), sim.id_ex.capturar(),
+                    sim.ex_mem.capturar(), sim.mem_wb.capturar())
+    ckpt.instrucoes = sim._memoria_instrucoes
+    sim._instrucoes_compartilhadas = True
+    ckpt.dados_na_memoria = dict(sim.dados_na_memoria)
+    ckpt.tipo_memoria = sim.tipo_memoria
+    ckpt.memoria = sim.memoria.capturar()
+    ckpt.reserva = sim.memoria.reserva(sim.hart_id)
+    ckpt.contadores = (sim.bolhas_hazard, sim.encaminhamentos, sim.ciclos_espera_memoria,
+                       sim._espera_mem, sim._acesso_feito)
+    # (tipo, bits, entradas da BTB, estado) ou None sem preditor
+    ckpt.desvios = None
+    if sim.desvios is not None:
+        ckpt.desvios = (sim.preditor, sim.bits_preditor, sim.entradas_btb, sim.desvios.capturar())
+    # (configuração, estado) ou None sem cache
+    ckpt.cache = None
+    if sim.cache is not None:
+        ckpt.cache = (sim.cache.configuracao, sim.cache.capturar())
+    ckpt.desempenho = sim.desempenho.capturar() if sim.desempenho is not None else None
+    return ckpt
+
+
+def restaurar(sim, ckpt):
+    sim.pc = ckpt.pc
+    sim.base_instrucoes = ckpt.base_instrucoes
+    sim.clock_cycle = ckpt.clock_cycle
+    sim.halted = ckpt.halted
+    sim._registradores.regs[:] = ckpt.registradores
+    for latch, valores in zip((sim.if_id, sim.id_ex, sim.ex_mem, sim.mem_wb), ckpt.latches):
+        latch.restaurar(valores)
+
+    if ckpt.instrucoes is not sim._memoria_instrucoes:
+        # Outra imagem: a decodificação é refeita sob demanda pelo estágio ID
+        sim._memoria_instrucoes = ckpt.instrucoes
+        sim.cache_decodificado = [None] * len(ckpt.instrucoes)
+    sim._instrucoes_compartilhadas = True
+
+    sim.dados_na_memoria = dict(ckpt.dados_na_memoria)
+    sim.escritas_ciclo = []
+    if ckpt.tipo_memoria != sim.tipo_memoria:
+        sim.tipo_memoria = ckpt.tipo_memoria
+        sim.memoria = criar_memoria(ckpt.tipo_memoria)
+    sim.memoria.restaurar(ckpt.memoria)
+    sim.memoria.definir_reserva(sim.hart_id, ckpt.reserva)
+
+    (sim.bolhas_hazard, sim.encaminhamentos, sim.ciclos_espera_memoria,
+     sim._espera_mem, sim._acesso_feito) = ckpt.contadores
+    if sim.desvios is not None:
+        configuracao = (sim.preditor, sim.bits_preditor, sim.entradas_btb)
+        if ckpt.desvios is not None and ckpt.desvios[:3] == configuracao:
+            sim.desvios.restaurar(ckpt.desvios[3])
+        else:
+            # Experimento com outro preditor: começa com tabelas e contadores zerados
+            sim.desvios = UnidadeDesvios(*configuracao)
+
+    if sim.cache is None:
+        # Sem cache não há falta pendente em MEM
+        sim._espera_mem, sim._acesso_feito = 0, False
+    elif ckpt.cache is not None and ckpt.cache[0] == sim.cache.configuracao:
+        sim.cache.restaurar(ckpt.cache[1])
+    else:
+        sim.cache = CacheDados(**sim.cache_dados)
+        sim._espera_mem, sim._acesso_feito = 0, False
+
+    if sim.desempenho is not None:
+        if ckpt.desempenho is not None:
+            sim.desempenho.restaurar(ckpt.desempenho)
+        else:
+            sim.desempenho = ContadoresDesempenho(ckpt.clock_cycle)
+
+
+# --- Formato em disco ---
+
+def _palavras(valores):
+    palavras = array("I", valores)
+    if sys.byteorder != "little":
+        palavras.byteswap()
+    return palavras.tobytes()
+
+
+def _escrever_info(f, info):
+    tipo = (info.tipo or "\0").encode("ascii")
+    f.write(_INFO.pack(info.op, tipo, info.rd, info.rs1, info.rs2, info.imm))
+
+
+def salvar(ckpt, caminho):
+    if_id, id_ex, ex_mem, mem_wb = ckpt.latches
+    with open(caminho, "wb") as f:
+        f.write(_CABECALHO.pack(MAGICO, VERSAO))
+        f.write(_ESTADO.pack(ckpt.pc, ckpt.base_instrucoes, ckpt.clock_cycle, ckpt.halted))
+        f.write(_palavras(ckpt.registradores))
+
+        # Latches: (valido, instrucao, pc), (valido, info, pc, val_rs1, val_rs2),
+        # (valido, info, resultado_ula, val_rs2, pc) e (valido, info, resultado_final, pc)
+        f.write(_IF_ID.pack(if_id[0], if_id[1] or 0, if_id[2]))
+        _escrever_info(f, id_ex[1])
+        f.write(_ID_EX.pack(id_ex[0], id_ex[2], id_ex[3], id_ex[4]))
+        _escrever_info(f, ex_mem[1])
+        f.write(_EX_MEM.pack(ex_mem[0], ex_mem[2], ex_mem[3], ex_mem[4]))
+        _escrever_info(f, mem_wb[1])
+        f.write(_MEM_WB.pack(mem_wb[0], mem_wb[2], mem_wb[3]))
+
+        f.write(_U32.pack(len(ckpt.instrucoes)))
+        f.write(_palavras(ckpt.instrucoes))
+        f.write(_U32.pack(len(ckpt.dados_na_memoria)))
+        f.write(_palavras(v for par in ckpt.dados_na_memoria.items() for v in par))
+
+        f.write(_U8.pack(_TIPOS_MEMORIA.index(ckpt.tipo_memoria)))
+        if ckpt.tipo_memoria == "densa":
+            f.write(_U32.pack(len(ckpt.memoria)))
+            f.write(ckpt.memoria)
+        else:
+            paginas = sorted(ckpt.memoria.items())
+            tamanho_pagina = len(paginas[0][1]) if paginas else 1 << 12
+            zero = bytes(tamanho_pagina)
+            paginas = [(num, pagina) for num, pagina in paginas if pagina != zero]
+            f.write(_U8.pack(tamanho_pagina.bit_length() - 1))
+            f.write(_U32.pack(len(paginas)))
+            for num, pagina in paginas:
+                f.write(_U32.pack(num))
+                f.write(pagina)
+
+        f.write(_CONTADORES_PIPELINE.pack(*ckpt.contadores))
+        _escrever_desvios(f, ckpt.desvios)
+        _escrever_cache(f, ckpt.cache)
+
+
+def _escrever_desvios(f, desvios):
+    if desvios is None:
+        f.write(_PREDITOR.pack(_SEM_PREDITOR, 0, 0))
+        return
+    tipo, bits, _, (preditor, btb, previsoes, erros, por_pc) = desvios
+    tabela, historico = preditor if preditor is not None else (b"", 0)
+    f.write(_PREDITOR.pack(TIPOS_PREDITOR.index(tipo), bits, historico))
+    f.write(_U32.pack(len(tabela)))
+    f.write(tabela)
+    tags, alvos, incondicionais = btb
+    f.write(_U32.pack(len(tags)))
+    for tag, alvo, incondicional in zip(tags, alvos, incondicionais):
+        f.write(_ENTRADA_BTB.pack(-1 if tag is None else tag, alvo, incondicional))
+    f.write(_CONTADORES.pack(previsoes, erros))
+    f.write(_U32.pack(len(por_pc)))
+    for pc, (n, acertos) in sorted(por_pc.items()):
+        f.write(_CONTAGEM_PC.pack(pc, n, acertos))
+
+
+def _ler_desvios(leitor):
+    indice, bits, historico = leitor.ler(_PREDITOR)
+    if indice == _SEM_PREDITOR:
+        return None
+    tipo = TIPOS_PREDITOR[indice]
+    tabela = bytes(leitor.ler_bytes(leitor.ler(_U32)[0]))
+    preditor = (tabela, historico) if tabela else None
+    tags, alvos, incondicionais = [], [], []
+    for _ in range(leitor.ler(_U32)[0]):
+        tag, alvo, incondicional = leitor.ler(_ENTRADA_BTB)
+        tags.append(None if tag == -1 else tag)
+        alvos.append(alvo)
+        incondicionais.append(bool(incondicional))
+    previsoes, erros = leitor.ler(_CONTADORES)
+    por_pc = {}
+    for _ in range(leitor.ler(_U32)[0]):
+        pc, n, acertos = leitor.ler(_CONTAGEM_PC)
+        por_pc[pc] = [n, acertos]
+    estado = (preditor, (tags, alvos, incondicionais), previsoes, erros, por_pc)
+    return tipo, bits, len(tags), estado
+
+
+def _escrever_cache(f, cache):
+    if cache is None:
+        f.write(_U8.pack(0))
+        return
+    c, (conjuntos, contadores, _) = cache
+    f.write(_U8.pack(1))
+    f.write(_CONFIG_CACHE.pack(c["tamanho"], c["tamanho_bloco"], c["associatividade"],
+                               SUBSTITUICOES.index(c["substituicao"]),
+                               POLITICAS_ESCRITA.index(c["politica_escrita"]),
+                               c["alocar_na_escrita"], c["penalidade_falta"], c["semente"]))
+    f.write(_CONTADORES_CACHE.pack(*contadores))
+    ocupados = [(indice, blocos) for indice, blocos in enumerate(conjuntos) if blocos]
+    f.write(_U32.pack(len(ocupados)))
+    for indice, blocos in ocupados:
+        f.write(_U32.pack(indice))
+        f.write(_U8.pack(len(blocos)))
+        for bloco, sujo in blocos:
+            f.write(_BLOCO_CACHE.pack(bloco, sujo))
+
+
+def _ler_cache(leitor):
+    if not leitor.ler(_U8)[0]:
+        return None
+    (tamanho, tamanho_bloco, associatividade, substituicao, politica,
+     alocar, penalidade, semente) = leitor.ler(_CONFIG_CACHE)
+    configuracao = {
+        "tamanho": tamanho,
+        "tamanho_bloco": tamanho_bloco,
+        "associatividade": associatividade,
+        "substituicao": SUBSTITUICOES[substituicao],
+        "politica_escrita": POLITICAS_ESCRITA[politica],
+        "alocar_na_escrita": bool(alocar),
+        "penalidade_falta": penalidade,
+        "semente": semente,
+    }
+    contadores = leitor.ler(_CONTADORES_CACHE)
+    conjuntos = [[] for _ in range(tamanho // (tamanho_bloco * associatividade))]
+    for _ in range(leitor.ler(_U32)[0]):
+        indice = leitor.ler(_U32)[0]
+        for _ in range(leitor.ler(_U8)[0]):
+            bloco, sujo = leitor.ler(_BLOCO_CACHE)
+            conjuntos[indice].append((bloco, bool(sujo)))
+    return configuracao, (conjuntos, contadores, None)
+
+
+class _Leitor:
+    def __init__(self, dados):
+        self.dados = memoryview(dados)
+        self.posicao = 0
+
+    def ler(self, formato):
+        valores = formato.unpack_from(self.dados, self.posicao)
+        self.posicao += formato.size
+        return valores
+
+    def ler_bytes(self, tamanho):
+        if self.posicao + tamanho > len(self.dados):
+            raise ValueError("Checkpoint truncado")
+        trecho = self.dados[self.posicao:self.posicao + tamanho]
+        self.posicao += tamanho
+        return trecho
+
+    def ler_palavras(self, quantidade):
+        palavras = array("I")
+        palavras.frombytes(self.ler_bytes(4 * quantidade))
+        if sys.byteorder != "little":
+            palavras.byteswap()
+        return palavras
+
+
+def _ler_info(leitor):
+    op, tipo, rd, rs1, rs2, imm = leitor.ler(_INFO)
+    tipo = None if tipo == b"\0" else tipo.decode("ascii")
+    return InstrucaoDecodificada(NOMES_INSTRUCOES[op], tipo, rd, rs1, rs2, imm)
+
+
+def _ler_latches(leitor):
+    valido, instrucao, pc = leitor.ler(_IF_ID)
+    if_id = (bool(valido), instrucao if valido else None, pc)
+    info = _ler_info(leitor)
+    valido, pc, val_rs1, val_rs2 = leitor.ler(_ID_EX)
+    id_ex = (bool(valido), info if valido else BOLHA, pc, val_rs1, val_rs2)
+    info = _ler_info(leitor)
+    valido, resultado_ula, val_rs2, pc = leitor.ler(_EX_MEM)
+    ex_mem = (bool(valido), info if valido else BOLHA, resultado_ula, val_rs2, pc)
+    info = _ler_info(leitor)
+    valido, resultado_final, pc = leitor.ler(_MEM_WB)
+    mem_wb = (bool(valido), info if valido else BOLHA, resultado_final, pc)
+    return if_id, id_ex, ex_mem, mem_wb
+
+
+def carregar(caminho):
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    leitor = _Leitor(dados)
+    try:
+        magico, versao = leitor.ler(_CABECALHO)
+    except struct.error:
+        raise ValueError("Arquivo de checkpoint inválido") from None
+    if magico != MAGICO:
+        raise ValueError("Arquivo de checkpoint inválido")
+    if versao != VERSAO:
+        raise ValueError(f"Versão de checkpoint não suportada: {versao} (esperada {VERSAO})")
+
+    try:
+        ckpt = Checkpoint()
+        ckpt.pc, ckpt.base_instrucoes, ckpt.clock_cycle, halted = leitor.ler(_ESTADO)
+        ckpt.halted = bool(halted)
+        ckpt.registradores = leitor.ler_palavras(32).tolist()
+        ckpt.latches = _ler_latches(leitor)
+        ckpt.instrucoes = leitor.ler_palavras(leitor.ler(_U32)[0])
+        pares = leitor.ler_palavras(2 * leitor.ler(_U32)[0])
+        ckpt.dados_na_memoria = dict(zip(pares[::2], pares[1::2]))
+
+        ckpt.tipo_memoria = _TIPOS_MEMORIA[leitor.ler(_U8)[0]]
+        if ckpt.tipo_memoria == "densa":
+            ckpt.memoria = bytes(leitor.ler_bytes(leitor.ler(_U32)[0]))
+        else:
+            tamanho_pagina = 1 << leitor.ler(_U8)[0]
+            ckpt.memoria = {}
+            for _ in range(leitor.ler(_U32)[0]):
+                num = leitor.ler(_U32)[0]
+                ckpt.memoria[num] = bytearray(leitor.ler_bytes(tamanho_pagina))
+        ckpt.reserva = None
+
+        *contadores, acesso_feito = leitor.ler(_CONTADORES_PIPELINE)
+        ckpt.contadores = (*contadores, bool(acesso_feito))
+        ckpt.desvios = _ler_desvios(leitor)
+        ckpt.cache = _ler_cache(leitor)
+        ckpt.desempenho = None
+    except (struct.error, IndexError):
+        raise ValueError("Checkpoint truncado ou corrompido") from None
+    return ckpt
@@ -1,125 +1,195 @@
+from componentes.isa import NOMES_INSTRUCOES, OP_ID
+
+MASK32 = 0xFFFFFFFF
+SIGN_BIT = 1 << 31
+
+
+def _signed(value):
+    """Convert unsigned to signed 32-bit int."""
+    return value - (1 << 32) if value & SIGN_BIT else value
+
+
+# Operações da ULA. Os operandos são registradores de 32 bits sem sinal; o segundo
+# pode ser um imediato já com sinal. Todas devolvem o resultado em 32 bits sem sinal.
+
+def _add(a, b):
+    return (a + b) & MASK32
+
+
+def _sub(a, b):
+    return (a - b) & MASK32
+
+
+def _and(a, b):
+    return a & b & MASK32
+
+
+def _or(a, b):
+    return (a | b) & MASK32
+
+
+def _xor(a, b):
+    return (a ^ b) & MASK32
+
+
+def _sll(a, b):
+    # Só os 5 bits menos significativos contam como deslocamento (0-31)
+    return (a << (b & 0x1F)) & MASK32
+
+
+def _srl(a, b):
+    return (a & MASK32) >> (b & 0x1F)
+
+
+def _sra(a, b):
+    return (_signed(a & MASK32) >> (b & 0x1F)) & MASK32
+
+
+def _slt(a, b):
+    return 1 if _signed(a & MASK32) < _signed(b & MASK32) else 0
+
+
+def _sltu(a, b):
+    return 1 if (a & MASK32) < (b & MASK32) else 0
+
+
+def _mul(a, b):
+    return (a * b) & MASK32
+
+
+def _mulh(a, b):
+    return (_signed(a & MASK32) * _signed(b & MASK32) >> 32) & MASK32
+
+
+def _mulhsu(a, b):
+    return (_signed(a & MASK32) * (b & MASK32) >> 32) & MASK32
+
+
+def _mulhu(a, b):
+    return ((a & MASK32) * (b & MASK32) >> 32) & MASK32
+
+
+# Divisão como na especificação do RISC-V: quociente truncado em direção a zero,
+# sem exceções. Divisão por zero: quociente com todos os bits em 1 e resto igual ao
+# dividendo; estouro (-2**31 / -1): quociente -2**31 e resto 0 (o mascaramento
+# para 32 bits já produz esses valores).
+
+def _div(a, b):
+    a, b = _signed(a & MASK32), _signed(b & MASK32)
+    if b == 0:
+        return MASK32
+    q = abs(a) // abs(b)
+    return (-q if (a < 0) != (b < 0) else q) & MASK32
+
+
+def _divu(a, b):
+    a, b = a & MASK32, b & MASK32
+    if b == 0:
+        return MASK32
+    return a // b
+
+
+def _rem(a, b):
+    a, b = _signed(a & MASK32), _signed(b & MASK32)
+    if b == 0:
+        return a & MASK32
+    r = abs(a) % abs(b)
+    return (-r if a < 0 else r) & MASK32
+
+
+def _remu(a, b):
+    a, b = a & MASK32, b & MASK32
+    if b == 0:
+        return a
+    return a % b
+
+
+def _lui(a, b):
+    return b & MASK32
+
+
+def _jalr(a, b):
+    return ((a + b) & ~1) & MASK32
+
+
+def _endereco(a, b):
+    # Atômicas: o endereço é o próprio rs1, sem deslocamento
+    return a & MASK32
+
+
+_OPERACOES = {
+    "add": _add, "addi": _add, "sub": _sub,
+    "and": _and, "andi": _and, "or": _or, "ori": _or, "xor": _xor, "xori": _xor,
+    "sll": _sll, "slli": _sll, "srl": _srl, "srli": _srl, "sra": _sra, "srai": _sra,
+    "slt": _slt, "slti": _slt, "sltu": _sltu, "sltiu": _sltu,
+    "mul": _mul, "mulh": _mulh, "mulhsu": _mulhsu, "mulhu": _mulhu,
+    "div": _div, "divu": _divu, "rem": _rem, "remu": _remu,
+    "lui": _lui,
+    "lw": _add, "sw": _add,     # endereço base + offset
+    "lr.w": _endereco, "sc.w": _endereco, "amoadd.w": _endereco,
+    "beq": _sub, "bne": _sub,   # compara pela diferença
+    "bge": _sub, "blt": _sub,
+    "j": _add, "jal": _add,     # PC + offset
+    "jalr": _jalr,
+}
+
+
+def _nao_suportada(nome):
+    def operacao(a, b):
+        raise ValueError(f"Unsupported operation: {nome}")
+    return operacao
+
+
+# Identificador da instrução (InstrucaoDecodificada.op) -> função, montada uma única vez
+TABELA_OPERACOES = tuple(_OPERACOES.get(nome) or _nao_suportada(nome) for nome in NOMES_INSTRUCOES)
+
+
 class ALU32Bit:
+    """
+    ULA de 32 bits com o conjunto computacional do RV32IM. As operações ficam em
+    `TABELA_OPERACOES`, indexada pelo identificador da instrução: `operar` é uma
+    indexação e uma chamada, sem montar dicionários nem converter nomes.
+    """
+
     def __init__(self):
-        self.mask32 = 0xFFFFFFFF  # To ensure 32-bit values
-        self.sign_bit = 1 << 31
+        self.mask32 = MASK32  # To ensure 32-bit values
+        self.sign_bit = SIGN_BIT
+        self.operacoes = TABELA_OPERACOES
 
     def to_32bit(self, value):
         """Simulate 32-bit overflow behavior."""
-        return value & self.mask32
-
-    def signed(self, value):
-        """Convert unsigned to signed 32-bit int."""
-        if value & self.sign_bit:
-            return value - (1 << 32)
-        return value
-
-    def add(self, a, b):
-        result = self.to_32bit(a + b)
-        return result
-
-    def sub(self, a, b):
-        result = self.to_32bit(a - b)
-        return result
-
-    def and_op(self, a, b):
-        return a & b
-
-    def or_op(self, a, b):
-        return a | b
-
-    def xor_op(self, a, b):
-        return a ^ b
-    
-    def mul(self, a, b):
-        # Multiplication, wrap to 32-bit
-        return (a * b) & self.mask32
-
-    def div(self, a, b):
-        # Division (unsigned)
-        if b == 0:
-            raise ZeroDivisionError("Division by zero")
-        return (a // b) & self.mask32
-
-    def rem(self, a, b):
-        # Remainder (modulo)
-        if b == 0:
-            raise ZeroDivisionError("Modulo by zero")
-        return (a % b) & self.mask32
-    
-    def srl(self, a, b):
-        # Logical right shift by b bits
-        shift = b & 0x1F  # Only use lower 5 bits for shift amount (0-31)
-        return (a >> shift) & self.mask32
-
-    def sll(self, a, b):
-        # Logical left shift by b bits
-        shift = b & 0x1F
-        return (a << shift) & self.mask32
-    def addi(self, a, imm):
-    # Soma registrador + imediato (como ADD, mas segundo operando é imediato)
-        return self.to_32bit(a + imm)
-
-    def lw(self, base, offset):
-        # Calcula endereço efetivo para load word
-        return self.to_32bit(base + offset)
-
-    def sw(self, base, offset):
-        # Calcula endereço efetivo para store word
-        return self.to_32bit(base + offset)
-
-    def beq(self, a, b):
-        # Subtrai para comparação de igualdade (resultado usado para decidir salto)
-        return self.to_32bit(a - b)
-
-    def bne(self, a, b):
-        # Subtrai para comparação de diferença (resultado usado para decidir salto)
-        return self.to_32bit(a - b)
-
-    def bge(self, a, b):
-        # Subtrai para comparação de maior ou igual (resultado usado para decidir salto)
-        return self.to_32bit(a - b)
-
-    def blt(self, a, b):
-        # Subtrai para comparação de menor (resultado usado para decidir salto)
-        return self.to_32bit(a - b)
-
-    def j(self, pc, offset):
-        # Calcula endereço de salto (jump)
-        return self.to_32bit(pc + offset)
-
-    def jal(self, pc, offset):
-        # Calcula endereço de salto e salva retorno (jump and link)
-        return self.to_32bit(pc + offset)
-
-    def jalr(self, base, offset):
-        # Calcula endereço de salto indireto (jump and link register)
-        return self.to_32bit((base + offset) & ~1)
+        return value & MASK32
+
+    signed = staticmethod(_signed)
+
+    add = addi = lw = sw = j = jal = staticmethod(_add)
+    sub = beq = bne = bge = blt = staticmethod(_sub)
+    and_op = staticmethod(_and)
+    or_op = staticmethod(_or)
+    xor_op = staticmethod(_xor)
+    sll = staticmethod(_sll)
+    srl = staticmethod(_srl)
+    sra = staticmethod(_sra)
+    slt = staticmethod(_slt)
+    sltu = staticmethod(_sltu)
+    mul = staticmethod(_mul)
+    mulh = staticmethod(_mulh)
+    mulhsu = staticmethod(_mulhsu)
+    mulhu = staticmethod(_mulhu)
+    div = staticmethod(_div)
+    divu = staticmethod(_divu)
+    rem = staticmethod(_rem)
+    remu = staticmethod(_remu)
+    jalr = staticmethod(_jalr)
+
+    def operar(self, op, a, b=0):
+        """Executa a operação do identificador `op` (InstrucaoDecodificada.op)."""
+        return TABELA_OPERACOES[op](a, b)
 
     def operate(self, op, a, b=0):
-        operations = {
-            'add': self.add,
-            'addi': self.add,
-            'sub': self.sub,
-            'and': self.and_op,
-            'or': self.or_op,
-            'xor': self.xor_op,
-            'mul': self.mul,
-            'div': self.div,
-            'rem': self.rem,
-            'srl': self.srl,
-            'sll': self.sll,
-            'lw': self.add,   # endereço base + offset
-            'sw': self.add,   # endereço base + offset
-            'beq': self.sub,  # compara diferença
-            'bne': self.sub,
-            'bge': self.sub,
-            'blt': self.sub,
-            'j': self.add,    # pode ser tratado como soma de PC + offset
-            'jal': self.add,
-            'jalr': self.add
-        }
+        """Executa a operação pelo nome da instrução (ex.: 'add', 'srai')."""
         op = op.lower()
-        if op not in operations:
+        op_id = OP_ID.get(op)
+        if op_id is None:
             raise ValueError(f"Unsupported operation: {op}")
-
-        return self.to_32bit(operations[op](a, b))
+        return TABELA_OPERACOES[op_id](a, b)
@@ -0,0 +1,159 @@
+"""
+Modelo de cache L1 de dados entre o estágio MEM e a memória.
+
+O modelo guarda apenas tags, ordem de substituição e bits de sujeira: os dados
+continuam na `Memoria`, que é sempre atualizada na hora (o resultado funcional
+não depende da cache). `acessar` retorna quantos ciclos o pipeline deve
+esperar: `penalidade_falta` em uma falta que busca o bloco, 0 nos acertos.
+Escritas na memória (write-through, escrita sem alocação e write-back de blocos
+sujos) passam por um buffer de escrita e não param o pipeline.
+
+Cada conjunto é um dicionário tag -> sujo, indexado pelo número do conjunto:
+a busca é uma consulta ao dicionário, sem percorrer as vias. A ordem de
+inserção do dicionário dá a ordem de substituição (LRU: o bloco acessado vai
+para o fim; FIFO: a ordem não muda no acerto).
+"""
+SUBSTITUICOES = ("lru", "fifo", "aleatoria")
+POLITICAS_ESCRITA = ("write-back", "write-through")
+
+
+def _potencia_de_dois(valor, nome):
+    if valor <= 0 or valor & (valor - 1):
+        raise ValueError(f"{nome} deve ser potência de dois: {valor}")
+    return valor.bit_length() - 1
+
+
+class CacheDados:
+    def __init__(self, tamanho=4096, tamanho_bloco=16, associatividade=2, substituicao="lru",
+                 politica_escrita="write-back", alocar_na_escrita=True, penalidade_falta=10, semente=0):
+        if substituicao not in SUBSTITUICOES:
+            raise ValueError(f"Substituição desconhecida: {substituicao} (use uma de {', '.join(SUBSTITUICOES)})")
+        if politica_escrita not in POLITICAS_ESCRITA:
+            raise ValueError(f"Política de escrita desconhecida: {politica_escrita} "
+                             f"(use uma de {', '.join(POLITICAS_ESCRITA)})")
+        self.bits_bloco = _potencia_de_dois(tamanho_bloco, "tamanho_bloco")
+        num_conjuntos = tamanho // (tamanho_bloco * associatividade)
+        _potencia_de_dois(num_conjuntos, "tamanho / (tamanho_bloco * associatividade)")
+
+        self.tamanho = tamanho
+        self.tamanho_bloco = tamanho_bloco
+        self.associatividade = associatividade
+        self.substituicao = substituicao
+        self.politica_escrita = politica_escrita
+        self.alocar_na_escrita = alocar_na_escrita
+        self.penalidade_falta = penalidade_falta
+        self.semente = semente
+        self._write_back = politica_escrita == "write-back"
+        self._lru = substituicao == "lru"
+        self._aleatorio = None
+        if substituicao == "aleatoria":
+            import random
+            self._aleatorio = random.Random(semente)
+        self.mascara_conjuntos = num_conjuntos - 1
+        self.conjuntos = [{} for _ in range(num_conjuntos)]
+
+        self.acessos = 0
+        self.acertos = 0
+        self.faltas = 0
+        self.despejos = 0
+        self.escritas_de_volta = 0
+        self.escritas_memoria = 0
+
+    def acessar(self, endereco, escrita):
+        """Registra um acesso e retorna os ciclos de espera do pipeline."""
+        bloco = endereco >> self.bits_bloco
+        conjunto = self.conjuntos[bloco & self.mascara_conjuntos]
+        self.acessos += 1
+
+        sujo = conjunto.get(bloco)
+        if sujo is not None:
+            self.acertos += 1
+            if self._lru:
+                del conjunto[bloco]
+                conjunto[bloco] = sujo
+            if escrita:
+                if self._write_back:
+                    conjunto[bloco] = True
+                else:
+                    self.escritas_memoria += 1
+            return 0
+
+        self.faltas += 1
+        if escrita and not self.alocar_na_escrita:
+            self.escritas_memoria += 1
+            return 0
+
+        if len(conjunto) >= self.associatividade:
+            if self._aleatorio is None:
+                vitima = next(iter(conjunto))
+            else:
+                vitima = self._aleatorio.choice(list(conjunto))
+            if conjunto.pop(vitima):
+                self.escritas_de_volta += 1
+            self.despejos += 1
+        conjunto[bloco] = escrita and self._write_back
+        if escrita and not self._write_back:
+            self.escritas_memoria += 1
+        return self.penalidade_falta
+
+    @property
+    def configuracao(self):
+        return {
+            "tamanho": self.tamanho,
+            "tamanho_bloco": self.tamanho_bloco,
+            "associatividade": self.associatividade,
+            "substituicao": self.substituicao,
+            "politica_escrita": self.politica_escrita,
+            "alocar_na_escrita": self.alocar_na_escrita,
+            "penalidade_falta": self.penalidade_falta,
+            "semente": self.semente,
+        }
+
+    def estatisticas(self):
+        return {
+            **self.configuracao,
+            "acessos": self.acessos,
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": self.acertos / self.acessos if self.acessos else None,
+            "despejos": self.despejos,
+            "escritas_de_volta": self.escritas_de_volta,
+            "escritas_memoria": self.escritas_memoria,
+        }
+
+    def _contadores(self):
+        return (self.acessos, self.acertos, self.faltas, self.despejos,
+                self.escritas_de_volta, self.escritas_memoria)
+
+    def _restaurar_contadores(self, contadores):
+        (self.acessos, self.acertos, self.faltas, self.despejos,
+         self.escritas_de_volta, self.escritas_memoria) = contadores
+
+    def capturar(self):
+        """Estado completo (checkpoint): conteúdo dos conjuntos, contadores e gerador aleatório."""
+        aleatorio = self._aleatorio.getstate() if self._aleatorio else None
+        return [list(c.items()) for c in self.conjuntos], self._contadores(), aleatorio
+
+    def restaurar(self, estado):
+        conjuntos, contadores, aleatorio = estado
+        self.conjuntos = [dict(c) for c in conjuntos]
+        self._restaurar_contadores(contadores)
+        if self._aleatorio is not None:
+            # Checkpoints em disco não guardam o gerador: recomeça da semente
+            if aleatorio is None:
+                self._aleatorio.seed(self.semente)
+            else:
+                self._aleatorio.setstate(aleatorio)
+
+    def capturar_entrada(self, endereco):
+        """Estado que `acessar(endereco, ...)` pode alterar (usado pelo step_back)."""
+        indice = (endereco >> self.bits_bloco) & self.mascara_conjuntos
+        aleatorio = self._aleatorio.getstate() if self._aleatorio else None
+        return indice, dict(self.conjuntos[indice]), self._contadores(), aleatorio
+
+    def restaurar_entrada(self, estado):
+        indice, conjunto, contadores, aleatorio = estado
+        self.conjuntos[indice] = conjunto
+        self._restaurar_contadores(contadores)
+        if aleatorio is not None:
+            self._aleatorio.setstate(aleatorio)
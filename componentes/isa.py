@@ -11,9 +11,26 @@ MONTADOR_ISA = {
     "or":   {"tipo": "R", "opcode": "0110011", "funct3": "110", "funct7": "0000000"},
     "sll":  {"tipo": "R", "opcode": "0110011", "funct3": "001", "funct7": "0000000"},
     "srl":  {"tipo": "R", "opcode": "0110011", "funct3": "101", "funct7": "0000000"},
+    "sra":  {"tipo": "R", "opcode": "0110011", "funct3": "101", "funct7": "0100000"},
+    "slt":  {"tipo": "R", "opcode": "0110011", "funct3": "010", "funct7": "0000000"},
+    "sltu": {"tipo": "R", "opcode": "0110011", "funct3": "011", "funct7": "0000000"},
+    "mulh":   {"tipo": "R", "opcode": "0110011", "funct3": "001", "funct7": "0000001"},
+    "mulhsu": {"tipo": "R", "opcode": "0110011", "funct3": "010", "funct7": "0000001"},
+    "mulhu":  {"tipo": "R", "opcode": "0110011", "funct3": "011", "funct7": "0000001"},
+    "divu": {"tipo": "R", "opcode": "0110011", "funct3": "101", "funct7": "0000001"},
+    "remu": {"tipo": "R", "opcode": "0110011", "funct3": "111", "funct7": "0000001"},
     "nop":  {"tipo": "I", "opcode": "0010011", "funct3": "000"},
 
     "addi": {"tipo": "I", "opcode": "0010011", "funct3": "000"},
+    "slti": {"tipo": "I", "opcode": "0010011", "funct3": "010"},
+    "sltiu": {"tipo": "I", "opcode": "0010011", "funct3": "011"},
+    "xori": {"tipo": "I", "opcode": "0010011", "funct3": "100"},
+    "ori":  {"tipo": "I", "opcode": "0010011", "funct3": "110"},
+    "andi": {"tipo": "I", "opcode": "0010011", "funct3": "111"},
+    # Deslocamentos com imediato: o funct7 ocupa os bits 11:5 do imediato
+    "slli": {"tipo": "I", "opcode": "0010011", "funct3": "001", "funct7": "0000000"},
+    "srli": {"tipo": "I", "opcode": "0010011", "funct3": "101", "funct7": "0000000"},
+    "srai": {"tipo": "I", "opcode": "0010011", "funct3": "101", "funct7": "0100000"},
     "lw":   {"tipo": "I", "opcode": "0000011", "funct3": "010"},
     "jalr": {"tipo": "I", "opcode": "1100111", "funct3": "000"},
 
@@ -26,8 +43,22 @@ MONTADOR_ISA = {
 
     "jal":  {"tipo": "J", "opcode": "1101111"},
     "j":    {"tipo": "J", "opcode": "1101111"},
+
+    "lui":   {"tipo": "U", "opcode": "0110111"},
+    "auipc": {"tipo": "U", "opcode": "0010111"},
+
+    # Leitura de CSR (csrrs rd, csr, x0); o imediato é o número do CSR, sem sinal
+    "csrr":  {"tipo": "I", "opcode": "1110011", "funct3": "010"},
+
+    # Atômicas (extensão A, formato R): o funct7 é funct5 + bits aq/rl (sempre 0)
+    "lr.w":     {"tipo": "A", "opcode": "0101111", "funct3": "010", "funct7": "0001000"},
+    "sc.w":     {"tipo": "A", "opcode": "0101111", "funct3": "010", "funct7": "0001100"},
+    "amoadd.w": {"tipo": "A", "opcode": "0101111", "funct3": "010", "funct7": "0000000"},
 }
 
+# CSRs que podem ser lidos com csrr (nome -> número)
+CSRS = {"mhartid": 0xF14}
+
 DECODIFICADOR_ISA = {
 "0110011": { # opcode
         "tipo": "R", # tipo de instrução
@@ -35,17 +66,27 @@ DECODIFICADOR_ISA = {
             "000": {
                 "funct7": {"0000000": "add", "0100000": "sub", "0000001": "mul"}
             },
-            "001": {"funct7": {"0000000": "sll"}},
+            "001": {"funct7": {"0000000": "sll", "0000001": "mulh"}},
+            "010": {"funct7": {"0000000": "slt", "0000001": "mulhsu"}},
+            "011": {"funct7": {"0000000": "sltu", "0000001": "mulhu"}},
             "100": {"funct7": {"0000000": "xor", "0000001": "div"}},
-            "101": {"funct7": {"0000000": "srl"}},
+            "101": {"funct7": {"0000000": "srl", "0100000": "sra", "0000001": "divu"}},
             "110": {"funct7": {"0000000": "or", "0000001": "rem"}},
-            "111": {"funct7": {"0000000": "and"}},
+            "111": {"funct7": {"0000000": "and", "0000001": "remu"}},
         },
     },
     "0010011": {
         "tipo": "I",
         "funct3": {
             "000": "addi",
+            "010": "slti",
+            "011": "sltiu",
+            "100": "xori",
+            "110": "ori",
+            "111": "andi",
+            # Deslocamentos: o funct7 (bits 31:25) separa srli de srai
+            "001": {"funct7": {"0000000": "slli"}},
+            "101": {"funct7": {"0000000": "srli", "0100000": "srai"}},
         },
     },
     "0000011": {
@@ -79,32 +120,142 @@ DECODIFICADOR_ISA = {
         "tipo": "J",
         "nome": "jal",
     },
+    "0110111": {
+        "tipo": "U",
+        "nome": "lui",
+    },
+    "0010111": {
+        "tipo": "U",
+        "nome": "auipc",
+    },
+    "1110011": {
+        "tipo": "I",
+        "funct3": {
+            "010": "csrr",
+        },
+    },
+    "0101111": {
+        "tipo": "A",
+        "funct3": {
+            # Indexado pelo funct5 (bits 31:27); os bits aq/rl são ignorados
+            "010": {"funct5": {"00010": "lr.w", "00011": "sc.w", "00000": "amoadd.w"}},
+        },
+    },
 }
 
 
+# Identificadores numéricos das instruções, usados pela forma pré-decodificada.
+# "nop" representa a bolha do pipeline (o nop montado é decodificado como addi).
+# Instruções novas entram no fim: os identificadores são gravados nos checkpoints.
+NOMES_INSTRUCOES = (
+    "nop", "add", "sub", "mul", "div", "rem", "xor", "and", "or", "sll", "srl",
+    "addi", "lw", "jalr", "sw", "beq", "bne", "bge", "blt", "jal", "j",
+    "desconhecida",
+    "sra", "slt", "sltu", "mulh", "mulhsu", "mulhu", "divu", "remu",
+    "slti", "sltiu", "xori", "ori", "andi", "slli", "srli", "srai",
+    "lui", "auipc",
+    "csrr", "lr.w", "sc.w", "amoadd.w",
+)
+OP_ID = {nome: i for i, nome in enumerate(NOMES_INSTRUCOES)}
+
+# Conjuntos de identificadores consultados pelos estágios do pipeline
+OPS_DESVIO = frozenset(OP_ID[n] for n in ("beq", "bne", "blt", "bge", "jal", "jalr", "j"))
+OPS_SALTO = frozenset(OP_ID[n] for n in ("jal", "jalr", "j"))
+# Instruções computacionais: o resultado de rd sai só da ULA, com os operandos
+# rs1 e rs2/imediato (auipc, que soma o PC, fica de fora)
+OPS_ARITMETICAS = frozenset(OP_ID[n] for n, campos in MONTADOR_ISA.items()
+                            if n in OP_ID and n != "nop" and n != "auipc"
+                            and (campos["tipo"] in ("R", "U") or campos["opcode"] == "0010011"))
+# Formatos cujo segundo operando da ULA é o imediato, e formatos que escrevem em rd
+OPS_IMEDIATO = frozenset(OP_ID[n] for n, campos in MONTADOR_ISA.items()
+                         if n in OP_ID and n != "nop" and campos["tipo"] in ("I", "S", "B", "J", "U"))
+OPS_ESCREVEM_RD = frozenset(OP_ID[n] for n, campos in MONTADOR_ISA.items()
+                            if n in OP_ID and n != "nop" and campos["tipo"] not in ("S", "B"))
+# Registradores-fonte realmente lidos (nos formatos I e J esses campos contêm bits do imediato)
+OPS_LEEM_RS1 = frozenset(OP_ID[n] for n, campos in MONTADOR_ISA.items()
+                         if n in OP_ID and n != "nop" and campos["tipo"] in ("R", "I", "S", "B", "A"))
+OPS_LEEM_RS2 = frozenset(OP_ID[n] for n, campos in MONTADOR_ISA.items()
+                         if n in OP_ID and n != "nop" and campos["tipo"] in ("R", "S", "B", "A"))
+# Acessos à memória de dados feitos em MEM: as atômicas (lr.w, sc.w, amoadd.w), as que
+# escrevem na memória e as que só entregam o valor de rd depois de MEM (como o lw)
+OPS_ATOMICAS = frozenset(OP_ID[n] for n in ("lr.w", "sc.w", "amoadd.w"))
+OPS_ACESSO_MEMORIA = OPS_ATOMICAS | {OP_ID["lw"], OP_ID["sw"]}
+OPS_ESCREVEM_MEMORIA = frozenset(OP_ID[n] for n in ("sw", "sc.w", "amoadd.w"))
+OPS_CARGA = OPS_ATOMICAS | {OP_ID["lw"]}
+
+
+class InstrucaoDecodificada:
+    """Forma compacta de uma instrução decodificada (uma por endereço de PC)."""
+    __slots__ = ("op", "nome", "tipo", "rd", "rs1", "rs2", "imm")
+
+    def __init__(self, nome, tipo=None, rd=0, rs1=0, rs2=0, imm=0):
+        self.op = OP_ID.get(nome, OP_ID["desconhecida"])
+        self.nome = nome
+        self.tipo = tipo
+        self.rd = rd
+        self.rs1 = rs1
+        self.rs2 = rs2
+        self.imm = imm
+
+    def __repr__(self):
+        return (f"InstrucaoDecodificada({self.nome}, tipo={self.tipo}, rd={self.rd}, "
+                f"rs1={self.rs1}, rs2={self.rs2}, imm={self.imm})")
+
+
+# Bolha do pipeline, compartilhada por todos os estágios
+BOLHA = InstrucaoDecodificada("nop")
+
+
 def _sign_extend(value, bits):
     sign_bit = 1 << (bits - 1)
     return (value & (sign_bit - 1)) - (value & sign_bit)
 
 
-def decodificar(inst_bin):
-    print("Decodificando:", inst_bin)
-    # Aceita string de bits ou inteiro
-    if isinstance(inst_bin, int):
-        inst_bin = f"{inst_bin:032b}"
-    if len(inst_bin) != 32:
+def _chaves_inteiras(tabela):
+    """Copia a tabela de decodificação trocando as chaves binárias por inteiros."""
+    convertida = {}
+    for chave, valor in tabela.items():
+        if isinstance(valor, dict):
+            valor = _chaves_inteiras(valor)
+        if set(chave) <= {"0", "1"}:
+            chave = int(chave, 2)
+        convertida[chave] = valor
+    return convertida
+
+
+# Mesma tabela acima, indexada pelos campos já extraídos como inteiros
+_DECODIFICADOR_INT = _chaves_inteiras(DECODIFICADOR_ISA)
+
+# Campos de montagem (opcode, funct3, funct7) convertidos para inteiros
+CODIFICACAO_ISA = {
+    nome: (int(info["opcode"], 2), int(info.get("funct3", "0"), 2), int(info.get("funct7", "0"), 2))
+    for nome, info in MONTADOR_ISA.items()
+}
+
+
+def formatar_binario(palavra):
+    """Representação em string de bits de uma palavra de instrução (apenas para exibição)."""
+    return f"{palavra:032b}"
+
+
+def decodificar(instrucao):
+    # Aceita inteiro de 32 bits ou string de bits
+    if isinstance(instrucao, str):
+        if len(instrucao) != 32:
+            return {"nome": "inválida", "error": "Tamanho incorreto"}
+        instrucao = int(instrucao, 2)
+    if not 0 <= instrucao <= 0xFFFFFFFF:
         return {"nome": "inválida", "error": "Tamanho incorreto"}
-    # ...restante do código...
 
     # Campos da instrução no formato do RISC-V 
-    opcode = inst_bin[25:32]
-    rd = int(inst_bin[20:25], 2)
-    funct3 = inst_bin[17:20]
-    rs1 = int(inst_bin[12:17], 2)
-    rs2 = int(inst_bin[7:12], 2)
-    funct7 = inst_bin[0:7]
+    opcode = instrucao & 0x7F
+    rd = (instrucao >> 7) & 0x1F
+    funct3 = (instrucao >> 12) & 0x7
+    rs1 = (instrucao >> 15) & 0x1F
+    rs2 = (instrucao >> 20) & 0x1F
+    funct7 = instrucao >> 25
 
-    inst_info = DECODIFICADOR_ISA.get(opcode)
+    inst_info = _DECODIFICADOR_INT.get(opcode)
 
     if not inst_info:
         return {"nome": "desconhecida", "opcode": opcode}
@@ -117,20 +268,25 @@ def decodificar(inst_bin):
             decodificada["nome"] = inst_info["funct3"][funct3]["funct7"][funct7]
         
         elif tipo == "I":
-            decodificada["nome"] = inst_info["funct3"][funct3]
-            imm_val = int(inst_bin[0:12], 2)
-            decodificada["imm"] = _sign_extend(imm_val, 12)
+            nome = inst_info["funct3"][funct3]
+            if isinstance(nome, dict):
+                # slli/srli/srai: o imediato é só o deslocamento (shamt, no campo rs2)
+                decodificada["nome"] = nome["funct7"][funct7]
+                decodificada["imm"] = rs2
+            else:
+                decodificada["nome"] = nome
+                # O número do CSR não tem sinal
+                decodificada["imm"] = instrucao >> 20 if opcode == 0b1110011 else _sign_extend(instrucao >> 20, 12)
         
         elif tipo == "S":
             decodificada["nome"] = inst_info["funct3"][funct3]
-            imm_str = inst_bin[0:7] + inst_bin[20:25]
-            imm_val = int(imm_str, 2)
+            imm_val = (funct7 << 5) | rd
             decodificada["imm"] = _sign_extend(imm_val, 12)
         
         elif tipo == "B":
             decodificada["nome"] = inst_info["funct3"][funct3]
-            imm_str = inst_bin[0] + inst_bin[24] + inst_bin[1:7] + inst_bin[20:24] + "0"
-            imm_val = int(imm_str, 2)
+            imm_val = (((instrucao >> 31) << 12) | (((instrucao >> 7) & 0x1) << 11) |
+                       (((instrucao >> 25) & 0x3F) << 5) | (((instrucao >> 8) & 0xF) << 1))
             decodificada["imm"] = _sign_extend(imm_val, 13)
         
         elif tipo == "J":
@@ -138,14 +294,31 @@ def decodificar(inst_bin):
             
             if decodificada["nome"] == "jal" and rd == 0:
                 decodificada["nome"] = "j"
-            imm_str = inst_bin[0] + inst_bin[12:20] + inst_bin[11] + inst_bin[1:11] + "0"
-            imm_val = int(imm_str, 2)
+            imm_val = (((instrucao >> 31) << 20) | (((instrucao >> 12) & 0xFF) << 12) |
+                       (((instrucao >> 20) & 0x1) << 11) | (((instrucao >> 21) & 0x3FF) << 1))
             decodificada["imm"] = _sign_extend(imm_val, 21)
 
+        elif tipo == "A":
+            decodificada["nome"] = inst_info["funct3"][funct3]["funct5"][funct7 >> 2]
+            decodificada["imm"] = 0
+
+        elif tipo == "U":
+            decodificada["nome"] = inst_info["nome"]
+            decodificada["imm"] = _sign_extend(instrucao & 0xFFFFF000, 32)
+
         else:
             return {"nome": "desconhecida", "tipo": tipo}
 
     except KeyError:
         return {"nome": "desconhecida", "opcode": opcode, "funct3": funct3, "funct7": funct7}
         
-    return decodificada
\ No newline at end of file
+    return decodificada
+
+
+def pre_decodificar(instrucao):
+    """Decodifica uma instrução para a forma compacta usada no pipeline."""
+    info = decodificar(instrucao)
+    return InstrucaoDecodificada(
+        info["nome"], info.get("tipo"), info.get("rd", 0),
+        info.get("rs1", 0), info.get("rs2", 0), info.get("imm", 0),
+    )
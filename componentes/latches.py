@@ -0,0 +1,83 @@
+from componentes.isa import BOLHA
+
+
+# Registradores entre os estágios do pipeline. São alocados uma única vez e
+# atualizados no lugar a cada ciclo; `valido=False` representa uma bolha.
+
+class LatchIFID:
+    __slots__ = ("valido", "instrucao", "pc")
+
+    def __init__(self):
+        self.esvaziar()
+
+    def esvaziar(self):
+        """Descarta o conteúdo (flush), deixando uma bolha."""
+        self.valido = False
+        self.instrucao = None
+        self.pc = 0
+
+    def capturar(self):
+        """Conteúdo como tupla (usado por checkpoints e pelo step_back)."""
+        return (self.valido, self.instrucao, self.pc)
+
+    def restaurar(self, valores):
+        self.valido, self.instrucao, self.pc = valores
+
+
+class LatchIDEX:
+    __slots__ = ("valido", "info", "pc", "val_rs1", "val_rs2")
+
+    def __init__(self):
+        self.esvaziar()
+
+    def esvaziar(self):
+        self.valido = False
+        self.info = BOLHA
+        self.pc = 0
+        self.val_rs1 = 0
+        self.val_rs2 = 0
+
+    def capturar(self):
+        return (self.valido, self.info, self.pc, self.val_rs1, self.val_rs2)
+
+    def restaurar(self, valores):
+        self.valido, self.info, self.pc, self.val_rs1, self.val_rs2 = valores
+
+
+class LatchEXMEM:
+    __slots__ = ("valido", "info", "resultado_ula", "val_rs2", "pc")
+
+    def __init__(self):
+        self.esvaziar()
+
+    def esvaziar(self):
+        self.valido = False
+        self.info = BOLHA
+        self.resultado_ula = 0
+        self.val_rs2 = 0
+        self.pc = 0
+
+    def capturar(self):
+        return (self.valido, self.info, self.resultado_ula, self.val_rs2, self.pc)
+
+    def restaurar(self, valores):
+        self.valido, self.info, self.resultado_ula, self.val_rs2, self.pc = valores
+
+
+class LatchMEMWB:
+    __slots__ = ("valido", "info", "resultado_final", "pc")
+
+    def __init__(self):
+        self.esvaziar()
+
+    def esvaziar(self):
+        self.valido = False
+        self.info = BOLHA
+        self.resultado_final = 0
+        self.pc = 0
+
+    def capturar(self):
+        return (self.valido, self.info, self.resultado_final, self.pc)
+
+    def restaurar(self, valores):
+        self.valido, self.info, self.resultado_final, self.pc = valores
@@ -1,8 +1,59 @@
-class Memoria:
+import mmap
+import os
+import struct
+
+_WORD = struct.Struct('<I')
+
+
+class _Reservas:
+    """
+    Instruções atômicas (lr.w, sc.w, amoadd.w). Cada hart tem no máximo uma reserva
+    (o endereço de uma palavra), criada pelo lr.w e desfeita por qualquer escrita
+    que alcance a palavra reservada, de qualquer hart.
+    """
+
+    def reservar(self, hart, endereco):
+        """lr.w: lê a palavra e reserva o endereço para `hart`."""
+        valor = self.ler_word(endereco)
+        self.reservas[hart] = endereco
+        return valor
+
+    def condicional(self, hart, endereco, valor):
+        """sc.w: escreve só se `hart` ainda tem a reserva de `endereco`. Retorna se escreveu."""
+        if self.reservas.pop(hart, None) != endereco:
+            return False
+        self.escrever_word(endereco, valor)
+        return True
+
+    def somar_atomico(self, endereco, valor):
+        """amoadd.w: soma `valor` à palavra e retorna o valor anterior."""
+        antigo = self.ler_word(endereco)
+        self.escrever_word(endereco, (antigo + valor) & 0xFFFFFFFF)
+        return antigo
+
+    def reserva(self, hart):
+        """Endereço reservado por `hart` (None sem reserva)."""
+        return self.reservas.get(hart)
+
+    def definir_reserva(self, hart, endereco):
+        if endereco is None:
+            self.reservas.pop(hart, None)
+        else:
+            self.reservas[hart] = endereco
+
+    def _invalidar_reservas(self, endereco):
+        for hart, reservado in list(self.reservas.items()):
+            if -4 < reservado - endereco < 4:
+                del self.reservas[hart]
+
+
+class Memoria(_Reservas):
     def __init__(self, tamanho=4096):
         # Inicializa a memória como um array de bytes
         self.tamanho = tamanho
         self.mem = bytearray(tamanho)
+        # hart -> endereço reservado pelo lr.w
+        self.reservas = {}
 
     def ler_byte(self, endereco):
         if 0 <= endereco < self.tamanho:
@@ -12,6 +63,8 @@ class Memoria:
     def escrever_byte(self, endereco, valor):
         if 0 <= endereco < self.tamanho:
             self.mem[endereco] = valor & 0xFF
+            if self.reservas:
+                self._invalidar_reservas(endereco)
         else:
             raise ValueError("Endereço fora do limite da memória")
 
@@ -23,6 +76,8 @@ class Memoria:
     def escrever_word(self, endereco, valor):
         if 0 <= endereco <= self.tamanho - 4:
             self.mem[endereco:endereco+4] = valor.to_bytes(4, 'little')
+            if self.reservas:
+                self._invalidar_reservas(endereco)
         else:
             raise ValueError("Endereço fora do limite da memória")
 
@@ -32,4 +87,330 @@ class Memoria:
             fim = endereco_inicial + len(dados)
             if fim > self.tamanho:
                 raise ValueError("Binário excede o tamanho da memória")
-            self.mem[endereco_inicial:fim] = dados
\ No newline at end of file
+            self.mem[endereco_inicial:fim] = dados
+
+    def mapear_imagem(self, caminho, endereco_base=0):
+        # A memória densa é pequena: a imagem é simplesmente copiada
+        self.carregar_binario(caminho, endereco_base)
+
+    def capturar(self):
+        """Estado para checkpoint: uma cópia do conteúdo (a memória densa é pequena)."""
+        return bytes(self.mem)
+
+    def restaurar(self, estado):
+        self.mem[:] = estado
+
+    @property
+    def bytes_residentes(self):
+        return self.tamanho
+
+
+class MemoriaPaginada(_Reservas):
+    """
+    Memória esparsa com todo o espaço de endereçamento de 32 bits.
+
+    As páginas (4 KiB por padrão) só são alocadas na primeira escrita; ler uma
+    página nunca escrita retorna zero sem alocar nada. A última página acessada
+    fica em cache, o que mantém rápidos os acessos sequenciais. A interface é a
+    mesma de `Memoria`.
+
+    Imagens binárias grandes podem ser mapeadas com `mapear_imagem`: as páginas
+    passam a ser fatias do mmap (sem cópia) e o mapeamento é privado, então uma
+    escrita do programa copia só a página afetada e nunca altera o arquivo.
+
+    `capturar` (checkpoint) também não copia nada: as páginas passam a ser
+    compartilhadas com o checkpoint e cada uma é copiada na primeira escrita
+    seguinte, de forma que o custo é proporcional às páginas alteradas.
+    """
+
+    def __init__(self, tamanho=1 << 32, bits_pagina=12):
+        self.tamanho = tamanho
+        self.bits_pagina = bits_pagina
+        self.tamanho_pagina = 1 << bits_pagina
+        self._mascara = self.tamanho_pagina - 1
+        self.paginas = {}
+        self._num_cache = -1
+        self._pagina_cache = None
+        self._mapeamentos = []
+        # Páginas compartilhadas com algum checkpoint (copiadas antes da próxima escrita)
+        self._compartilhadas = set()
+        self.reservas = {}
+
+    def _pagina(self, endereco, criar):
+        num = endereco >> self.bits_pagina
+        if num == self._num_cache:
+            return self._pagina_cache
+        pagina = self.paginas.get(num)
+        if pagina is None:
+            if not criar:
+                return None
+            pagina = self.paginas[num] = bytearray(self.tamanho_pagina)
+        elif num in self._compartilhadas:
+            if not criar:
+                # Leitura: a página compartilhada não entra no cache, que também serve às escritas
+                return pagina
+            pagina = self.paginas[num] = bytearray(pagina)
+            self._compartilhadas.discard(num)
+        self._num_cache = num
+        self._pagina_cache = pagina
+        return pagina
+
+    def ler_byte(self, endereco):
+        if 0 <= endereco < self.tamanho:
+            pagina = self._pagina(endereco, False)
+            return pagina[endereco & self._mascara] if pagina is not None else 0
+        raise ValueError("Endereço fora do limite da memória")
+
+    def escrever_byte(self, endereco, valor):
+        if 0 <= endereco < self.tamanho:
+            self._pagina(endereco, True)[endereco & self._mascara] = valor & 0xFF
+            if self.reservas:
+                self._invalidar_reservas(endereco)
+        else:
+            raise ValueError("Endereço fora do limite da memória")
+
+    def ler_word(self, endereco):
+        if 0 <= endereco <= self.tamanho - 4:
+            deslocamento = endereco & self._mascara
+            if deslocamento <= self.tamanho_pagina - 4:
+                pagina = self._pagina(endereco, False)
+                return _WORD.unpack_from(pagina, deslocamento)[0] if pagina is not None else 0
+            # Palavra atravessa a fronteira entre duas páginas
+            return int.from_bytes(bytes(self.ler_byte(endereco + i) for i in range(4)), 'little')
+        raise ValueError("Endereço fora do limite da memória")
+
+    def escrever_word(self, endereco, valor):
+        if 0 <= endereco <= self.tamanho - 4:
+            deslocamento = endereco & self._mascara
+            if deslocamento <= self.tamanho_pagina - 4:
+                _WORD.pack_into(self._pagina(endereco, True), deslocamento, valor & 0xFFFFFFFF)
+                if self.reservas:
+                    self._invalidar_reservas(endereco)
+            else:
+                for i, byte in enumerate(valor.to_bytes(4, 'little')):
+                    self.escrever_byte(endereco + i, byte)
+        else:
+            raise ValueError("Endereço fora do limite da memória")
+
+    def carregar_binario(self, caminho, endereco_inicial=0):
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+        if endereco_inicial + len(dados) > self.tamanho:
+            raise ValueError("Binário excede o tamanho da memória")
+        self.escrever_bytes(endereco_inicial, dados)
+
+    def mapear_imagem(self, caminho, endereco_base=0):
+        """Mapeia um arquivo binário a partir de `endereco_base` sem copiá-lo para a memória."""
+        tamanho_arquivo = os.path.getsize(caminho)
+        if endereco_base + tamanho_arquivo > self.tamanho:
+            raise ValueError("Binário excede o tamanho da memória")
+        if tamanho_arquivo == 0:
+            return
+        if endereco_base & self._mascara:
+            # Base fora do alinhamento de página: as páginas não coincidem com o arquivo
+            self.carregar_binario(caminho, endereco_base)
+            return
+        with open(caminho, 'rb') as f:
+            # ACCESS_COPY: mapeamento privado com cópia na escrita feita pelo sistema operacional
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._mapeamentos.append(mapa)
+        visao = memoryview(mapa)
+        paginas_inteiras = tamanho_arquivo >> self.bits_pagina
+        primeira = endereco_base >> self.bits_pagina
+        for i in range(paginas_inteiras):
+            inicio = i << self.bits_pagina
+            self.paginas[primeira + i] = visao[inicio:inicio + self.tamanho_pagina]
+        resto = tamanho_arquivo & self._mascara
+        if resto:
+            # Última página incompleta: copiada para uma página comum
+            inicio = paginas_inteiras << self.bits_pagina
+            self.escrever_bytes(endereco_base + inicio, visao[inicio:])
+        self._num_cache = -1
+
+    def escrever_bytes(self, endereco, dados):
+        """Copia um bloco de bytes, página por página."""
+        posicao = 0
+        while posicao < len(dados):
+            deslocamento = (endereco + posicao) & self._mascara
+            trecho = min(self.tamanho_pagina - deslocamento, len(dados) - posicao)
+            pagina = self._pagina(endereco + posicao, True)
+            pagina[deslocamento:deslocamento + trecho] = dados[posicao:posicao + trecho]
+            posicao += trecho
+
+    def capturar(self):
+        """Estado para checkpoint: as páginas atuais, agora compartilhadas (cópia na escrita)."""
+        self._compartilhadas = set(self.paginas)
+        self._num_cache = -1
+        return dict(self.paginas)
+
+    def restaurar(self, paginas):
+        self.paginas = dict(paginas)
+        self._compartilhadas = set(self.paginas)
+        self._num_cache = -1
+        self._pagina_cache = None
+
+    @property
+    def paginas_mapeadas(self):
+        """Páginas servidas diretamente do arquivo mapeado."""
+        return sum(1 for pagina in self.paginas.values() if isinstance(pagina, memoryview))
+
+    @property
+    def paginas_residentes(self):
+        """Páginas alocadas pelo simulador (não inclui as servidas pelo mmap)."""
+        return len(self.paginas) - self.paginas_mapeadas
+
+    @property
+    def bytes_residentes(self):
+        return self.paginas_residentes * self.tamanho_pagina
+
+
+class MemoriaCompartilhada:
+    """
+    Memória densa em um segmento `multiprocessing.shared_memory`, para harts que
+    rodam em processos diferentes (ver multihart.py). O segmento começa com a
+    tabela de reservas do lr.w (um int64 por hart, -1 sem reserva), seguida dos
+    dados. A interface é a mesma de `Memoria`.
+
+    Todo acesso passa por uma trava entre processos: as atômicas e as reservas
+    precisam dela, e as leituras nunca veem uma palavra escrita pela metade. Os
+    processos filhos recebem o objeto pelo fork ou o reabrem pelo nome (pickle);
+    só o processo que criou o segmento pode removê-lo (`liberar`).
+    """
+
+    def __init__(self, tamanho=4096, num_harts=1, nome=None, trava=None):
+        import multiprocessing
+        from multiprocessing import shared_memory
+        self.tamanho = tamanho
+        self.num_harts = num_harts
+        self._dono = nome is None
+        inicio = 8 * num_harts
+        self._shm = shared_memory.SharedMemory(name=nome, create=self._dono, size=inicio + tamanho)
+        self.nome = self._shm.name
+        self.trava = trava if trava is not None else multiprocessing.Lock()
+        self._reservas = self._shm.buf[:inicio].cast('q')
+        self.mem = self._shm.buf[inicio:inicio + tamanho]
+        if self._dono:
+            for hart in range(num_harts):
+                self._reservas[hart] = -1
+
+    def __reduce__(self):
+        return (MemoriaCompartilhada, (self.tamanho, self.num_harts, self.nome, self.trava))
+
+    def _verificar(self, endereco, largura=4):
+        if not 0 <= endereco <= self.tamanho - largura:
+            raise ValueError("Endereço fora do limite da memória")
+
+    def _invalidar_reservas(self, endereco):
+        reservas = self._reservas
+        for hart in range(self.num_harts):
+            if reservas[hart] >= 0 and -4 < reservas[hart] - endereco < 4:
+                reservas[hart] = -1
+
+    def ler_byte(self, endereco):
+        self._verificar(endereco, 1)
+        with self.trava:
+            return self.mem[endereco]
+
+    def escrever_byte(self, endereco, valor):
+        self._verificar(endereco, 1)
+        with self.trava:
+            self.mem[endereco] = valor & 0xFF
+            self._invalidar_reservas(endereco)
+
+    def ler_word(self, endereco):
+        self._verificar(endereco)
+        with self.trava:
+            return _WORD.unpack_from(self.mem, endereco)[0]
+
+    def escrever_word(self, endereco, valor):
+        self._verificar(endereco)
+        with self.trava:
+            _WORD.pack_into(self.mem, endereco, valor & 0xFFFFFFFF)
+            self._invalidar_reservas(endereco)
+
+    def reservar(self, hart, endereco):
+        self._verificar(endereco)
+        with self.trava:
+            self._reservas[hart] = endereco
+            return _WORD.unpack_from(self.mem, endereco)[0]
+
+    def condicional(self, hart, endereco, valor):
+        self._verificar(endereco)
+        with self.trava:
+            reservado = self._reservas[hart]
+            self._reservas[hart] = -1
+            if reservado != endereco:
+                return False
+            _WORD.pack_into(self.mem, endereco, valor & 0xFFFFFFFF)
+            self._invalidar_reservas(endereco)
+            return True
+
+    def somar_atomico(self, endereco, valor):
+        self._verificar(endereco)
+        with self.trava:
+            antigo = _WORD.unpack_from(self.mem, endereco)[0]
+            _WORD.pack_into(self.mem, endereco, (antigo + valor) & 0xFFFFFFFF)
+            self._invalidar_reservas(endereco)
+            return antigo
+
+    def reserva(self, hart):
+        endereco = self._reservas[hart]
+        return endereco if endereco >= 0 else None
+
+    def definir_reserva(self, hart, endereco):
+        with self.trava:
+            self._reservas[hart] = -1 if endereco is None else endereco
+
+    def carregar_binario(self, caminho, endereco_inicial=0):
+        with open(caminho, 'rb') as f:
+            dados = f.read()
+        fim = endereco_inicial + len(dados)
+        if fim > self.tamanho:
+            raise ValueError("Binário excede o tamanho da memória")
+        with self.trava:
+            self.mem[endereco_inicial:fim] = dados
+
+    def mapear_imagem(self, caminho, endereco_base=0):
+        self.carregar_binario(caminho, endereco_base)
+
+    def capturar(self):
+        with self.trava:
+            return bytes(self.mem)
+
+    def restaurar(self, estado):
+        with self.trava:
+            self.mem[:] = estado
+
+    @property
+    def bytes_residentes(self):
+        return self.tamanho
+
+    def fechar(self):
+        """Desfaz o mapeamento neste processo (o segmento continua existindo)."""
+        if self._shm is None:
+            return
+        self._reservas.release()
+        self.mem.release()
+        self._shm.close()
+        self._shm = None
+
+    def liberar(self):
+        """Fecha e remove o segmento; só tem efeito no processo que o criou."""
+        if self._shm is None:
+            return
+        shm = self._shm
+        self.fechar()
+        if self._dono:
+            shm.unlink()
+
+
+TIPOS_MEMORIA = ("densa", "paginada")
+
+
+def criar_memoria(tipo="densa"):
+    """Memória densa de 4 KiB (padrão) ou paginada com espaço de 32 bits."""
+    if tipo == "densa":
+        return Memoria()
+    if tipo == "paginada":
+        return MemoriaPaginada()
+    raise ValueError(f"Tipo de memória desconhecido: {tipo} (use um de {', '.join(TIPOS_MEMORIA)})")
@@ -0,0 +1,242 @@
+"""
+Previsão de desvios: preditores de direção, BTB e estatísticas.
+
+O estágio IF consulta `UnidadeDesvios.prever(pc)` para escolher o próximo PC;
+o estágio ID, que resolve os desvios, chama `resolver(...)` e, se a previsão
+estiver errada, usa o flush de IF/ID já existente (um ciclo perdido).
+
+Preditores de direção (só para desvios condicionais; jal/j/jalr seguem a BTB):
+    nao_tomado  estático, sempre não tomado
+    btfn        estático, tomado se o alvo (da BTB) estiver para trás
+    1bit        tabela de 1 bit indexada pelo PC
+    2bits       tabela de contadores saturantes de 2 bits
+    gshare      contadores de 2 bits indexados por PC xor histórico global
+"""
+
+TIPOS_PREDITOR = ("nao_tomado", "btfn", "1bit", "2bits", "gshare")
+
+
+class PreditorNaoTomado:
+    nome = "nao_tomado"
+
+    def __init__(self, bits=10):
+        self.bits = bits
+
+    def prever(self, pc, alvo):
+        return False
+
+    def atualizar(self, pc, tomado):
+        pass
+
+    # Preditores estáticos não têm estado
+    def capturar(self):
+        return None
+
+    def restaurar(self, estado):
+        pass
+
+    def capturar_entrada(self, pc):
+        return None
+
+    def restaurar_entrada(self, estado):
+        pass
+
+
+class PreditorBTFN(PreditorNaoTomado):
+    nome = "btfn"
+
+    def prever(self, pc, alvo):
+        return alvo < pc
+
+
+class Preditor1Bit:
+    """Tabela de 2**bits entradas indexada por (pc >> 2); guarda o último resultado."""
+    nome = "1bit"
+    inicial = 0
+    maximo = 1
+    limiar = 1
+
+    def __init__(self, bits=10):
+        self.bits = bits
+        self.mascara = (1 << bits) - 1
+        self.tabela = bytearray([self.inicial]) * (1 << bits)
+        self.historico = 0
+
+    def indice(self, pc):
+        return (pc >> 2) & self.mascara
+
+    def prever(self, pc, alvo):
+        return self.tabela[self.indice(pc)] >= self.limiar
+
+    def atualizar(self, pc, tomado):
+        i = self.indice(pc)
+        contador = self.tabela[i]
+        if tomado:
+            if contador < self.maximo:
+                self.tabela[i] = contador + 1
+        elif contador > 0:
+            self.tabela[i] = contador - 1
+
+    def capturar(self):
+        return bytes(self.tabela), self.historico
+
+    def restaurar(self, estado):
+        tabela, self.historico = estado
+        self.tabela[:] = tabela
+
+    def capturar_entrada(self, pc):
+        """Estado que `atualizar(pc, ...)` pode alterar (usado pelo step_back)."""
+        i = self.indice(pc)
+        return i, self.tabela[i], self.historico
+
+    def restaurar_entrada(self, estado):
+        i, valor, self.historico = estado
+        self.tabela[i] = valor
+
+
+class Preditor2Bits(Preditor1Bit):
+    """Contadores saturantes de 2 bits (0-1 não tomado, 2-3 tomado), iniciando em 1."""
+    nome = "2bits"
+    inicial = 1
+    maximo = 3
+    limiar = 2
+
+
+class PreditorGshare(Preditor2Bits):
+    """Contadores de 2 bits indexados por (pc >> 2) xor histórico global de `bits` desvios."""
+    nome = "gshare"
+
+    def indice(self, pc):
+        return ((pc >> 2) ^ self.historico) & self.mascara
+
+    def atualizar(self, pc, tomado):
+        Preditor2Bits.atualizar(self, pc, tomado)
+        self.historico = ((self.historico << 1) | tomado) & self.mascara
+
+
+_PREDITORES = {classe.nome: classe for classe in
+               (PreditorNaoTomado, PreditorBTFN, Preditor1Bit, Preditor2Bits, PreditorGshare)}
+
+
+def criar_preditor(tipo, bits=10):
+    if tipo not in _PREDITORES:
+        raise ValueError(f"Preditor desconhecido: {tipo} (use um de {', '.join(TIPOS_PREDITOR)})")
+    return _PREDITORES[tipo](bits)
+
+
+class BTB:
+    """Branch target buffer de mapeamento direto: PC -> (alvo, incondicional)."""
+
+    def __init__(self, entradas=64):
+        self.entradas = entradas
+        self.tags = [None] * entradas
+        self.alvos = [0] * entradas
+        self.incondicionais = [False] * entradas
+
+    def consultar(self, pc):
+        i = (pc >> 2) % self.entradas
+        if self.tags[i] != pc:
+            return None, False
+        return self.alvos[i], self.incondicionais[i]
+
+    def inserir(self, pc, alvo, incondicional):
+        i = (pc >> 2) % self.entradas
+        self.tags[i] = pc
+        self.alvos[i] = alvo
+        self.incondicionais[i] = incondicional
+
+    def capturar(self):
+        return list(self.tags), list(self.alvos), list(self.incondicionais)
+
+    def restaurar(self, estado):
+        tags, alvos, incondicionais = estado
+        self.tags[:], self.alvos[:], self.incondicionais[:] = tags, alvos, incondicionais
+
+    def capturar_entrada(self, pc):
+        i = (pc >> 2) % self.entradas
+        return i, self.tags[i], self.alvos[i], self.incondicionais[i]
+
+    def restaurar_entrada(self, estado):
+        i, self.tags[i], self.alvos[i], self.incondicionais[i] = estado
+
+
+class UnidadeDesvios:
+    """Preditor de direção + BTB + contadores de acerto (totais e por PC)."""
+
+    def __init__(self, tipo="2bits", bits=10, entradas_btb=64):
+        self.preditor = criar_preditor(tipo, bits)
+        self.btb = BTB(entradas_btb)
+        self.previsoes = 0
+        self.erros = 0
+        # pc -> [execuções, acertos]
+        self.por_pc = {}
+
+    def prever(self, pc):
+        """Próximo PC a buscar depois da instrução em `pc`."""
+        alvo, incondicional = self.btb.consultar(pc)
+        if alvo is not None and (incondicional or self.preditor.prever(pc, alvo)):
+            return alvo
+        return pc + 4
+
+    def resolver(self, pc, condicional, tomado, alvo, acertou):
+        """Atualiza preditor, BTB e contadores com o resultado real de um desvio."""
+        if condicional:
+            self.preditor.atualizar(pc, tomado)
+        if tomado:
+            self.btb.inserir(pc, alvo, not condicional)
+        self.previsoes += 1
+        contagem = self.por_pc.get(pc)
+        if contagem is None:
+            contagem = self.por_pc[pc] = [0, 0]
+        contagem[0] += 1
+        if acertou:
+            contagem[1] += 1
+        else:
+            self.erros += 1
+
+    def registrar_erro_btb(self):
+        """Instrução que não é desvio, mas foi prevista como tomada (código alterado)."""
+        self.erros += 1
+
+    @property
+    def ciclos_flush(self):
+        # Cada previsão errada descarta uma instrução buscada no caminho errado
+        return self.erros
+
+    def estatisticas(self):
+        return {
+            "preditor": self.preditor.nome,
+            "previsoes": self.previsoes,
+            "erros": self.erros,
+            "acuracia": 1 - self.erros / self.previsoes if self.previsoes else None,
+            "ciclos_flush": self.ciclos_flush,
+            "por_pc": {
+                f"0x{pc:08x}": {"execucoes": n, "acertos": acertos, "acuracia": acertos / n}
+                for pc, (n, acertos) in sorted(self.por_pc.items())
+            },
+        }
+
+    def capturar(self):
+        por_pc = {pc: list(contagem) for pc, contagem in self.por_pc.items()}
+        return (self.preditor.capturar(), self.btb.capturar(), self.previsoes, self.erros, por_pc)
+
+    def restaurar(self, estado):
+        preditor, btb, self.previsoes, self.erros, por_pc = estado
+        self.preditor.restaurar(preditor)
+        self.btb.restaurar(btb)
+        self.por_pc = {pc: list(contagem) for pc, contagem in por_pc.items()}
+
+    def capturar_entrada(self, pc):
+        """Estado que `resolver(pc, ...)` pode alterar, para desfazer um ciclo."""
+        contagem = self.por_pc.get(pc)
+        return (pc, self.preditor.capturar_entrada(pc), self.btb.capturar_entrada(pc),
+                self.previsoes, self.erros, list(contagem) if contagem else None)
+
+    def restaurar_entrada(self, estado):
+        pc, preditor, btb, self.previsoes, self.erros, contagem = estado
+        self.preditor.restaurar_entrada(preditor)
+        self.btb.restaurar_entrada(btb)
+        if contagem is None:
+            self.por_pc.pop(pc, None)
+        else:
+            self.por_pc[pc] = contagem
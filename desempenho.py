@@ -0,0 +1,118 @@
+"""
+Contadores de desempenho do SimuladorPipeline (opção `contadores_desempenho`).
+
+Contam ciclos, instruções retiradas (no WB), CPI, o mix de instruções por nome
+e por tipo e as bolhas por causa:
+    stall          ID parado esperando um operando (detecção de hazards)
+    flush          instrução buscada no caminho errado (previsão de desvio errada)
+    stall_memoria  MEM parado esperando uma falta da cache de dados
+    drain          o restante dos ciclos: enchimento do pipeline no início e
+                   esvaziamento no fim
+Cada bolha é atribuída ao PC que a causou (a instrução parada, o desvio, o
+lw/sw) e, pelo mapa de linhas do montador, à linha do código-fonte.
+
+Desligados (padrão), o simulador guarda None e o custo é um teste por ciclo.
+"""
+from componentes.isa import MONTADOR_ISA, NOMES_INSTRUCOES
+
+# Posições em `totais` e nas contagens por PC
+RETIRADAS, STALL, FLUSH, STALL_MEMORIA = range(4)
+CAUSAS = ("stall", "flush", "stall_memoria")
+
+
+class ContadoresDesempenho:
+    def __init__(self, ciclo_inicial=0):
+        # Ciclo em que a contagem começou (diferente de 0 depois de zerar ou de um checkpoint em disco)
+        self.ciclo_inicial = ciclo_inicial
+        # retiradas, stall, flush, stall_memoria
+        self.totais = [0, 0, 0, 0]
+        self.mix = [0] * len(NOMES_INSTRUCOES)
+        # pc -> [retiradas, stall, flush, stall_memoria]
+        self.por_pc = {}
+
+    def _contagem(self, pc):
+        contagem = self.por_pc.get(pc)
+        if contagem is None:
+            contagem = self.por_pc[pc] = [0, 0, 0, 0]
+        return contagem
+
+    def retirar(self, pc, op):
+        self.totais[RETIRADAS] += 1
+        self.mix[op] += 1
+        self._contagem(pc)[RETIRADAS] += 1
+
+    def bolha(self, causa, pc):
+        """Uma bolha de `causa` (STALL, FLUSH ou STALL_MEMORIA) provocada pela instrução em `pc`."""
+        self.totais[causa] += 1
+        self._contagem(pc)[causa] += 1
+
+    def estatisticas(self, ciclo_atual, linhas_fonte=None, texto_fonte=None, base_instrucoes=0):
+        ciclos = ciclo_atual - self.ciclo_inicial
+        retiradas, stall, flush, stall_memoria = self.totais
+        mix, mix_por_tipo = {}, {}
+        for op, n in enumerate(self.mix):
+            if n:
+                nome = NOMES_INSTRUCOES[op]
+                tipo = MONTADOR_ISA.get(nome, {}).get("tipo", "?")
+                mix[nome] = n
+                mix_por_tipo[tipo] = mix_por_tipo.get(tipo, 0) + n
+
+        por_pc = {}
+        for pc, contagem in sorted(self.por_pc.items()):
+            entrada = {"linha": None, "fonte": None}
+            indice = (pc - base_instrucoes) >> 2
+            if linhas_fonte and 0 <= indice < len(linhas_fonte):
+                linha = linhas_fonte[indice]
+                entrada["linha"] = linha
+                if texto_fonte and linha <= len(texto_fonte):
+                    entrada["fonte"] = texto_fonte[linha - 1].strip()
+            entrada["retiradas"] = contagem[RETIRADAS]
+            for causa, n in zip(CAUSAS, contagem[STALL:]):
+                entrada[causa] = n
+            por_pc[f"0x{pc:08x}"] = entrada
+
+        return {
+            "ciclos": ciclos,
+            "instrucoes_retiradas": retiradas,
+            "cpi": ciclos / retiradas if retiradas else None,
+            "bolhas": {
+                "stall": stall,
+                "flush": flush,
+                "stall_memoria": stall_memoria,
+                "drain": ciclos - retiradas - stall - flush - stall_memoria,
+            },
+            "mix": mix,
+            "mix_por_tipo": mix_por_tipo,
+            "por_pc": por_pc,
+        }
+
+    def capturar(self):
+        por_pc = {pc: list(contagem) for pc, contagem in self.por_pc.items()}
+        return self.ciclo_inicial, list(self.totais), list(self.mix), por_pc
+
+    def restaurar(self, estado):
+        self.ciclo_inicial, totais, mix, por_pc = estado
+        self.totais[:] = totais
+        self.mix[:] = mix
+        self.por_pc = {pc: list(contagem) for pc, contagem in por_pc.items()}
+
+    def capturar_entrada(self, op, pcs):
+        """Estado que um ciclo pode alterar: retirar `op` e contar bolhas nos `pcs` (usado pelo step_back)."""
+        contagens = [(pc, list(self.por_pc[pc]) if pc in self.por_pc else None) for pc in pcs]
+        return list(self.totais), op, self.mix[op], contagens
+
+    def restaurar_entrada(self, estado):
+        totais, op, self.mix[op], contagens = estado
+        self.totais[:] = totais
+        for pc, contagem in contagens:
+            if contagem is None:
+                self.por_pc.pop(pc, None)
+            else:
+                self.por_pc[pc] = contagem
+
+
+def exportar_json(estatisticas, caminho):
+    import json
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(estatisticas, f, ensure_ascii=False, indent=2)
+        f.write("\n")
@@ -0,0 +1,110 @@
+"""
+Ganchos de instrumentação do SimuladorPipeline.
+
+`sim.registrar_gancho(evento, funcao)` faz `funcao(sim, objeto_evento)` ser
+chamada a cada evento do tipo pedido:
+    busca          IF buscou uma instrução                EventoBusca
+    decodificacao  ID decodificou e leu os operandos      EventoDecodificacao
+    execucao       EX calculou o resultado                EventoExecucao
+    memoria        MEM concluiu um lw/sw                  EventoMemoria
+    escrita        WB escreveu um registrador             EventoEscrita
+    retirada       uma instrução saiu do pipeline (WB)    EventoRetirada
+    fim_ciclo      fim do ciclo (depois do log de saída)  EventoFimCiclo
+
+Sem ganchos registrados o simulador usa o `step` normal; com ao menos um,
+usa uma versão instrumentada (`_step_com_ganchos`), então o custo só existe
+enquanto há ganchos. As re-execuções internas do step_back não disparam
+eventos.
+"""
+
+EVENTOS = ("busca", "decodificacao", "execucao", "memoria", "escrita", "retirada", "fim_ciclo")
+
+
+class Evento:
+    __slots__ = ("ciclo", "pc")
+    tipo = None
+
+    def __repr__(self):
+        campos = [nome for classe in reversed(type(self).__mro__)
+                  for nome in getattr(classe, "__slots__", ())]
+        valores = ", ".join(f"{nome}={getattr(self, nome)!r}" for nome in campos)
+        return f"{type(self).__name__}({valores})"
+
+
+class EventoBusca(Evento):
+    __slots__ = ("instrucao",)
+    tipo = "busca"
+
+    def __init__(self, ciclo, pc, instrucao):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.instrucao = instrucao
+
+
+class EventoDecodificacao(Evento):
+    __slots__ = ("info", "val_rs1", "val_rs2")
+    tipo = "decodificacao"
+
+    def __init__(self, ciclo, pc, info, val_rs1, val_rs2):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.info = info
+        self.val_rs1 = val_rs1
+        self.val_rs2 = val_rs2
+
+
+class EventoExecucao(Evento):
+    __slots__ = ("info", "resultado")
+    tipo = "execucao"
+
+    def __init__(self, ciclo, pc, info, resultado):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.info = info
+        self.resultado = resultado
+
+
+class EventoMemoria(Evento):
+    __slots__ = ("info", "endereco", "valor", "escrita")
+    tipo = "memoria"
+
+    def __init__(self, ciclo, pc, info, endereco, valor, escrita):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.info = info
+        self.endereco = endereco
+        self.valor = valor
+        self.escrita = escrita
+
+
+class EventoEscrita(Evento):
+    __slots__ = ("info", "rd", "valor")
+    tipo = "escrita"
+
+    def __init__(self, ciclo, pc, info, rd, valor):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.info = info
+        self.rd = rd
+        self.valor = valor
+
+
+class EventoRetirada(Evento):
+    __slots__ = ("info",)
+    tipo = "retirada"
+
+    def __init__(self, ciclo, pc, info):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.info = info
+
+
+class EventoFimCiclo(Evento):
+    """`pc` é o próximo endereço a ser buscado."""
+    __slots__ = ("halted",)
+    tipo = "fim_ciclo"
+
+    def __init__(self, ciclo, pc, halted):
+        self.ciclo = ciclo
+        self.pc = pc
+        self.halted = halted
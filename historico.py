@@ -0,0 +1,153 @@
+"""
+Histórico para execução reversa do SimuladorPipeline (`step_back`).
+
+Antes de cada ciclo é registrado apenas o que o ciclo vai alterar: o valor
+antigo do registrador que o WB escreverá, a palavra de memória que o MEM
+sobrescreverá (e a entrada antiga de `dados_na_memoria`), a reserva do lr.w que
+um acesso à memória pode criar ou desfazer, a entrada do preditor
+de desvios que o ID pode atualizar, o conjunto da cache de dados que o MEM vai
+acessar, os contadores de desempenho que o ciclo pode alterar, os latches, os contadores, o PC, o ciclo e
+o estado de término. Desfazer um ciclo custa O(alterações).
+
+O log guarda no máximo `limite` ciclos; os mais antigos são descartados. Para
+voltar além do log, a cada `intervalo_checkpoint` ciclos é feito um checkpoint
+(barato, com cópia na escrita; ver checkpoint.py): o simulador é restaurado no
+checkpoint anterior mais próximo e re-executado até o ciclo pedido. Quando há
+mais de `max_checkpoints`, metade deles é descartada (mantendo o primeiro), de
+forma que o espaçamento cresce com a duração da execução e a memória fica
+limitada.
+"""
+from collections import deque
+
+from componentes.isa import OP_ID, OPS_ACESSO_MEMORIA, OPS_ATOMICAS, OPS_ESCREVEM_MEMORIA, OPS_ESCREVEM_RD
+import checkpoint
+from rastreador import RastreadorSaida
+
+# Acessos que podem alterar a reserva do próprio hart (lr.w cria, sc.w consome, escritas desfazem)
+_OPS_RESERVA = OPS_ATOMICAS | {OP_ID["sw"]}
+# Marca de endereço ausente em dados_na_memoria antes da escrita
+_AUSENTE = object()
+
+
+class HistoricoDesfazer:
+    def __init__(self, limite=10000, intervalo_checkpoint=1000, max_checkpoints=32):
+        self.limite = limite
+        self.intervalo_checkpoint = intervalo_checkpoint
+        self.max_checkpoints = max_checkpoints
+        self.log = deque(maxlen=limite)
+        self.checkpoints = []
+
+    def registrar_ciclo(self, sim):
+        """Chamado no início de `step`, antes de qualquer estágio alterar o estado."""
+        if sim.clock_cycle % self.intervalo_checkpoint == 0 or not self.checkpoints:
+            self._guardar_checkpoint(sim)
+
+        registrador = None
+        mem_wb = sim.mem_wb
+        if mem_wb.valido and mem_wb.info.op in OPS_ESCREVEM_RD:
+            rd = mem_wb.info.rd
+            registrador = (rd, sim._registradores.regs[rd])
+
+        memoria = None
+        ex_mem = sim.ex_mem
+        if ex_mem.valido and ex_mem.info.op in OPS_ESCREVEM_MEMORIA:
+            endereco = ex_mem.resultado_ula
+            try:
+                antigo = sim.memoria.ler_word(endereco)
+            except ValueError:
+                antigo = None  # o próprio ciclo vai falhar com endereço inválido
+            memoria = (endereco, antigo, sim.dados_na_memoria.get(endereco, _AUSENTE))
+        reserva = _AUSENTE
+        if ex_mem.valido and ex_mem.info.op in _OPS_RESERVA:
+            reserva = sim.memoria.reserva(sim.hart_id)
+
+        # Instrução em IF/ID: ao passar por ID pode atualizar o preditor, a BTB e os contadores
+        desvios = None
+        if sim.desvios is not None and sim.if_id.valido:
+            desvios = sim.desvios.capturar_entrada(sim.if_id.pc)
+
+        # Instrução em EX/MEM que ainda não acessou a cache de dados
+        cache = None
+        if (sim.cache is not None and ex_mem.valido and ex_mem.info.op in OPS_ACESSO_MEMORIA
+                and not sim._acesso_feito):
+            cache = sim.cache.capturar_entrada(ex_mem.resultado_ula)
+
+        # Retirada no WB e bolhas atribuídas às instruções em IF/ID e EX/MEM
+        desempenho = None
+        if sim.desempenho is not None:
+            desempenho = sim.desempenho.capturar_entrada(mem_wb.info.op, (mem_wb.pc, sim.if_id.pc, ex_mem.pc))
+
+        latches = (sim.if_id.capturar(), sim.id_ex.capturar(),
+                   sim.ex_mem.capturar(), sim.mem_wb.capturar())
+        contadores = (sim.bolhas_hazard, sim.encaminhamentos, sim.ciclos_espera_memoria,
+                      sim._espera_mem, sim._acesso_feito)
+        self.log.append((sim.clock_cycle, sim.pc, sim.halted, latches, tuple(sim.escritas_ciclo),
+                         registrador, memoria, reserva, desvios, cache, desempenho, contadores))
+
+    def _guardar_checkpoint(self, sim):
+        if self.checkpoints and self.checkpoints[-1].clock_cycle == sim.clock_cycle:
+            return
+        self.checkpoints.append(checkpoint.capturar(sim))
+        if len(self.checkpoints) > self.max_checkpoints:
+            self.checkpoints = self.checkpoints[:1] + self.checkpoints[2::2]
+
+    def voltar(self, sim, n=1):
+        """Desfaz `n` ciclos (até o ciclo 0). Retorna o número de ciclos desfeitos."""
+        inicio = sim.clock_cycle
+        alvo = max(0, inicio - n)
+        log = self.log
+        while log and sim.clock_cycle > alvo:
+            self._desfazer(sim, log.pop())
+        if sim.clock_cycle > alvo:
+            self._reexecutar(sim, alvo)
+        # Checkpoints posteriores ao ciclo atual deixam de valer se o programa for alterado
+        self.checkpoints = [ckpt for ckpt in self.checkpoints if ckpt.clock_cycle <= sim.clock_cycle]
+        return inicio - sim.clock_cycle
+
+    def _desfazer(self, sim, entrada):
+        (ciclo, pc, halted, latches, escritas, registrador, memoria, reserva, desvios, cache,
+         desempenho, contadores) = entrada
+        if registrador is not None:
+            sim._registradores.regs[registrador[0]] = registrador[1]
+        if memoria is not None:
+            endereco, antigo, dado = memoria
+            if antigo is not None:
+                sim.memoria.escrever_word(endereco, antigo)
+            if dado is _AUSENTE:
+                sim.dados_na_memoria.pop(endereco, None)
+            else:
+                sim.dados_na_memoria[endereco] = dado
+        if reserva is not _AUSENTE:
+            # Depois da memória: a escrita acima desfaz reservas do endereço
+            sim.memoria.definir_reserva(sim.hart_id, reserva)
+        for latch, valores in zip((sim.if_id, sim.id_ex, sim.ex_mem, sim.mem_wb), latches):
+            latch.restaurar(valores)
+        if desvios is not None:
+            sim.desvios.restaurar_entrada(desvios)
+        if cache is not None:
+            sim.cache.restaurar_entrada(cache)
+        if desempenho is not None:
+            sim.desempenho.restaurar_entrada(desempenho)
+        (sim.bolhas_hazard, sim.encaminhamentos, sim.ciclos_espera_memoria,
+         sim._espera_mem, sim._acesso_feito) = contadores
+        sim.escritas_ciclo = list(escritas)
+        sim.clock_cycle = ciclo
+        sim.pc = pc
+        sim.halted = halted
+
+    def _reexecutar(self, sim, alvo):
+        """Restaura o checkpoint mais próximo antes de `alvo` e avança até ele sem gravar o log de saída."""
+        anteriores = [ckpt for ckpt in self.checkpoints if ckpt.clock_cycle <= alvo]
+        if not anteriores:
+            return
+        self.checkpoints = anteriores
+        self.log.clear()
+        checkpoint.restaurar(sim, anteriores[-1])
+        rastreador, sim.rastreador = sim.rastreador, RastreadorSaida(None)
+        try:
+            # `step` da classe: os ganchos registrados não veem a re-execução
+            passo = type(sim).step
+            while sim.clock_cycle < alvo:
+                passo(sim)
+        finally:
+            sim.rastreador = rastreador
@@ -1,23 +1,57 @@
 import sys
 import os
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 from componentes.memoria import Memoria
 from componentes.registradores import Registradores
 from componentes.alu  import ALU32Bit
 from simulador_pipeline import SimuladorPipeline
+from montador_incremental import MontadorIncremental
 
 # Adiciona o diretório de componentes ao path
 COMPONENTES_PATH = os.path.join(os.path.dirname(__file__), "componentes")
 if COMPONENTES_PATH not in sys.path:
     sys.path.append(COMPONENTES_PATH)
 
+# Ciclos que o botão "Voltar" consegue desfazer diretamente (além disso, re-executa de um checkpoint)
+LIMITE_DESFAZER = 10000
+# Espera (ms) depois da última tecla antes de remontar as linhas editadas
+ATRASO_VERIFICACAO = 200
+# Execução em segundo plano: limite de ciclos, ciclos por lote (entre verificações de
+# pausa/cancelamento) e quantas vezes por segundo a tela é redesenhada durante a execução
+MAX_CICLOS_EXECUCAO = 1_000_000
+CICLOS_POR_LOTE = 256
+REDESENHOS_POR_SEGUNDO = 10
+# Ciclos do log mantidos em memória para a caixa de saída e limite de linhas da caixa
+CICLOS_SAIDA_MEMORIA = 200
+MAX_LINHAS_SAIDA = 10000
+
+_ABI_MAP = {v: k for k, v in Registradores().ABI.items()}
+
 class InterfaceSimuladorRISCV(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Simulador RISC-V")
         self.geometry("900x600")
         self.simulador = None
+        # Montagem incremental do código: cada edição recodifica só as linhas afetadas
+        self.montador = MontadorIncremental()
+        # Edições ainda não levadas ao simulador em execução: palavras trocadas ou endereços deslocados
+        self._palavras_pendentes = set()
+        self._reiniciar = False
+        self._texto_simulado = None
+        self._verificacao = None
+        # Execução em segundo plano: o thread de trabalho só avança o simulador (sob a trava);
+        # os widgets são atualizados pelo thread do Tk, no máximo REDESENHOS_POR_SEGUNDO vezes
+        self._trava = threading.Lock()
+        self._thread = None
+        self._continuar = threading.Event()
+        self._cancelar = threading.Event()
+        self._erro_execucao = None
+        # O que já está na tela: último ciclo da caixa de saída e valores dos registradores
+        self._ciclo_exibido = 0
+        self._regs_exibidos = None
 
         self.create_widgets()
 
@@ -27,6 +61,10 @@ class InterfaceSimuladorRISCV(tk.Tk):
         self.code_label.pack(anchor="nw")
         self.code_text = scrolledtext.ScrolledText(self, height=15, width=100)
         self.code_text.pack(fill="x", padx=5, pady=5)
+        self.code_text.tag_configure("erro", background="#ffd6d6")
+        self.code_text.bind("<KeyRelease>", self.agendar_verificacao)
+        self.status_label = tk.Label(self, text="", fg="red", anchor="w")
+        self.status_label.pack(fill="x", padx=5)
 
         # Botões
         self.button_frame = tk.Frame(self)
@@ -37,8 +75,18 @@ class InterfaceSimuladorRISCV(tk.Tk):
         self.run_button.pack(side="left", padx=5)
         self.step_button = tk.Button(self.button_frame, text="Step", command=self.step_simulation)
         self.step_button.pack(side="left", padx=5)
+        self.back_button = tk.Button(self.button_frame, text="Voltar", command=self.step_back_simulation)
+        self.back_button.pack(side="left", padx=5)
         self.reset_button = tk.Button(self.button_frame, text="Resetar", command=self.reset_simulation)
         self.reset_button.pack(side="left", padx=5)
+        self.pause_button = tk.Button(self.button_frame, text="Pausar", command=self.pause_simulation,
+                                      state="disabled")
+        self.pause_button.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(self.button_frame, text="Cancelar", command=self.cancel_simulation,
+                                       state="disabled")
+        self.cancel_button.pack(side="left", padx=5)
+        self.progress_label = tk.Label(self.button_frame, text="", anchor="w")
+        self.progress_label.pack(side="left", padx=10)
 
         # Saída
         self.output_label = tk.Label(self, text="Saída do Simulador:")
@@ -60,25 +108,104 @@ class InterfaceSimuladorRISCV(tk.Tk):
             self.code_text.delete("1.0", tk.END)
             self.code_text.insert(tk.END, code)
             self.reset_simulation()
+            self.verificar_codigo()
 
     def run_simulation(self):
-        code = self.code_text.get("1.0", tk.END)
-        self.simulador = self.criar_simulador(code)
-        if self.simulador:
-            self.simulador.executar()
-            self.update_output()
-            self.update_registradores()
+        self.simulador = self.criar_simulador()
+        if not self.simulador:
+            return
+        self.update_output()
+        self.update_registradores()
+        self._erro_execucao = None
+        self._cancelar.clear()
+        self._continuar.set()
+        self._thread = threading.Thread(target=self._executar_em_segundo_plano, args=(self.simulador,),
+                                        daemon=True)
+        self._definir_execucao(True)
+        self._thread.start()
+        self.after(1000 // REDESENHOS_POR_SEGUNDO, self._acompanhar_execucao)
+
+    def _executar_em_segundo_plano(self, sim):
+        """Thread de trabalho: avança em lotes até o fim, o limite ou o cancelamento. Não toca nos widgets."""
+        try:
+            while not sim.halted and sim.clock_cycle < MAX_CICLOS_EXECUCAO:
+                self._continuar.wait()
+                if self._cancelar.is_set():
+                    break
+                with self._trava:
+                    fim = min(sim.clock_cycle + CICLOS_POR_LOTE, MAX_CICLOS_EXECUCAO)
+                    while not sim.halted and sim.clock_cycle < fim:
+                        sim.step()
+        except Exception as e:
+            self._erro_execucao = e
+
+    def _acompanhar_execucao(self):
+        """Redesenha o progresso da execução em segundo plano e a encerra quando o thread termina."""
+        terminou = not self._thread.is_alive()
+        self.update_output()
+        self.update_registradores()
+        if not terminou:
+            self.after(1000 // REDESENHOS_POR_SEGUNDO, self._acompanhar_execucao)
+            return
+        self._thread = None
+        self._definir_execucao(False)
+        sim = self.simulador
+        sim.rastreador.descarregar()
+        if self._erro_execucao is not None:
+            self.progress_label.config(text=f"Erro no ciclo {sim.clock_cycle}")
+            messagebox.showerror("Erro", f"Erro durante a simulação: {self._erro_execucao}")
+        elif self._cancelar.is_set():
+            self.progress_label.config(text=f"Cancelado no ciclo {sim.clock_cycle}")
+        elif not sim.halted:
+            self.progress_label.config(text=f"Limite de {MAX_CICLOS_EXECUCAO} ciclos atingido")
+        else:
+            self.progress_label.config(text=f"Concluído em {sim.clock_cycle} ciclos")
+
+    def _definir_execucao(self, executando):
+        """Durante a execução em segundo plano só Pausar e Cancelar ficam habilitados."""
+        estado, controles = ("disabled", "normal") if executando else ("normal", "disabled")
+        for botao in (self.load_button, self.run_button, self.step_button, self.back_button, self.reset_button):
+            botao.config(state=estado)
+        self.pause_button.config(state=controles, text="Pausar")
+        self.cancel_button.config(state=controles)
+
+    def pause_simulation(self):
+        if self._thread is None:
+            return
+        if self._continuar.is_set():
+            self._continuar.clear()
+            self.pause_button.config(text="Continuar")
+        else:
+            self._continuar.set()
+            self.pause_button.config(text="Pausar")
+        self.update_output()
+        self.update_registradores()
+
+    def cancel_simulation(self):
+        if self._thread is None:
+            return
+        self._cancelar.set()
+        self._continuar.set()
 
     def step_simulation(self):
+        if self.simulador and not self.aplicar_edicoes():
+            return
         if not self.simulador:
-            code = self.code_text.get("1.0", tk.END)
-            self.simulador = self.criar_simulador(code)
+            self.simulador = self.criar_simulador()
         if self.simulador:
             self.simulador.step()
             self.update_output()
             self.update_registradores()
 
+    def step_back_simulation(self):
+        if self.simulador and self.simulador.clock_cycle > 0:
+            self.simulador.step_back()
+            self.update_output()
+            self.update_registradores()
+
     def reset_simulation(self):
+        if self.simulador:
+            self.simulador.fechar()
         self.simulador = None
         self.output_text.config(state="normal")
         self.output_text.delete("1.0", tk.END)
@@ -86,41 +213,146 @@ class InterfaceSimuladorRISCV(tk.Tk):
         self.reg_text.config(state="normal")
         self.reg_text.delete("1.0", tk.END)
         self.reg_text.config(state="disabled")
+        self._ciclo_exibido = 0
+        self._regs_exibidos = None
+        self.progress_label.config(text="")
+
+    def agendar_verificacao(self, event=None):
+        if self._verificacao is not None:
+            self.after_cancel(self._verificacao)
+        self._verificacao = self.after(ATRASO_VERIFICACAO, self.verificar_codigo)
+
+    def verificar_codigo(self):
+        """Remonta só as linhas editadas e marca as linhas com erro."""
+        self._verificacao = None
+        texto = self.code_text.get("1.0", "end-1c")
+        self.montador.atualizar(texto)
+        if self.montador.deslocou:
+            self._reiniciar = True
+        else:
+            self._palavras_pendentes.update(self.montador.palavras_alteradas)
 
-    def criar_simulador(self, code):
+        self.code_text.tag_remove("erro", "1.0", tk.END)
+        erros = self.montador.erros()
+        for num_linha, _ in erros:
+            self.code_text.tag_add("erro", f"{num_linha}.0", f"{num_linha}.end")
+        if erros:
+            extra = f" (+{len(erros) - 1} erro(s))" if len(erros) > 1 else ""
+            self.status_label.config(text=erros[0][1] + extra)
+        else:
+            self.status_label.config(text="")
+        return texto
+
+    def aplicar_edicoes(self):
+        """
+        Leva as edições do código ao simulador em execução: as palavras alteradas são
+        trocadas no lugar; se endereços ou labels mudaram, a simulação recomeça.
+        Retorna False se o código tem erros.
+        """
+        texto = self.verificar_codigo()
+        if texto == self._texto_simulado:
+            return True
+        montagem = self.montador.montagem()
+        if montagem is None:
+            messagebox.showerror("Erro", "\n".join(mensagem for _, mensagem in self.montador.erros()))
+            return False
+        if self._reiniciar:
+            self.simulador = self.criar_simulador()
+            return self.simulador is not None
+        base = self.simulador.base_instrucoes
+        for indice in sorted(self._palavras_pendentes):
+            self.simulador.escrever_instrucao(base + 4 * indice, montagem.palavras[indice])
+        self._palavras_pendentes.clear()
+        self.simulador.linhas_fonte = montagem.linhas
+        self.simulador.texto_fonte = texto.splitlines()
+        self._texto_simulado = texto
+        return True
+
+    def criar_simulador(self):
         print("Criado\n")
+        if self.simulador:
+            self.simulador.fechar()
+        texto = self.verificar_codigo()
+        montagem = self.montador.montagem()
+        if montagem is None:
+            messagebox.showerror("Erro", "\n".join(mensagem for _, mensagem in self.montador.erros()))
+            return None
+        self._palavras_pendentes.clear()
+        self._reiniciar = False
+        self._texto_simulado = texto
         try:
-            # Ajuste conforme a interface do seu SimuladorRISCV
-            return SimuladorPipeline(code)
+            simulador = SimuladorPipeline(limite_desfazer=LIMITE_DESFAZER,
+                                          ciclos_saida_memoria=CICLOS_SAIDA_MEMORIA)
+            simulador.carregar_montagem(montagem, texto)
+            # Simulador novo: as caixas de saída e de registradores são redesenhadas do zero
+            self._ciclo_exibido = 0
+            self._regs_exibidos = None
+            self.progress_label.config(text="")
+            self.output_text.config(state="normal")
+            self.output_text.delete("1.0", tk.END)
+            self.output_text.config(state="disabled")
+            return simulador
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao criar simulador: {e}")
             return None
 
     def update_output(self):
-        """Lê o arquivo saida.out e atualiza a caixa de texto de saída."""
+        """
+        Acrescenta à caixa de saída os ciclos novos, lidos do buffer em memória do
+        rastreador (o saida.out completo continua sendo gravado, mas não é relido).
+        """
+        sim = self.simulador
+        if not sim:
+            return
+        with self._trava:
+            ciclo = sim.clock_cycle
+            recentes = list(sim.rastreador.recentes)
         self.output_text.config(state="normal")
-        self.output_text.delete("1.0", tk.END)
-        try:
-            with open("saida.out", "r") as f:
-                self.output_text.insert(tk.END, f.read())
-        except FileNotFoundError:
-            self.output_text.insert(tk.END, "Arquivo saida.out ainda não foi criado. Execute um passo.")
+        if ciclo < self._ciclo_exibido:
+            # Depois de "Voltar": redesenha a partir do que restou no buffer
+            self.output_text.delete("1.0", tk.END)
+            self._ciclo_exibido = recentes[0][0] - 1 if recentes else ciclo
+        novos = [texto for c, texto in recentes if c > self._ciclo_exibido]
+        if novos:
+            omitidos = (ciclo - self._ciclo_exibido) - len(novos)
+            if omitidos > 0:
+                self.output_text.insert(tk.END, f"... {omitidos} ciclo(s) omitido(s); veja o saida.out ...\n\n")
+            self.output_text.insert(tk.END, "".join(novos))
+            excesso = int(self.output_text.index("end-1c").split(".")[0]) - MAX_LINHAS_SAIDA
+            if excesso > 0:
+                # Corta no começo de um ciclo, para a caixa não começar no meio de um
+                corte = self.output_text.search("--- Ciclo", f"{excesso + 1}.0", tk.END) or f"{excesso + 1}.0"
+                self.output_text.delete("1.0", corte)
+            self.output_text.see(tk.END) # Rola para o final
+        self._ciclo_exibido = ciclo
         self.output_text.config(state="disabled")
-        self.output_text.see(tk.END) # Rola para o final
+        if self._thread is not None:
+            estado = "pausado" if not self._continuar.is_set() else "executando"
+            self.progress_label.config(text=f"Ciclo {ciclo} ({estado})")
 
     def update_registradores(self):
-        """Atualiza a caixa de texto dos registradores."""
+        """Atualiza a caixa de texto dos registradores, reescrevendo só as linhas que mudaram."""
+        if not self.simulador:
+            return
+        with self._trava:
+            regs = list(self.simulador._registradores.get_all())
         self.reg_text.config(state="normal")
-        self.reg_text.delete("1.0", tk.END)
-        if self.simulador:
-            regs = self.simulador.registradores
-            abi_map = {v: k for k, v in self.simulador._registradores.ABI.items()}
-            for i in range(32):
-                abi_name = abi_map.get(i, f'x{i}')
-                valor = regs.get(f"x{i}", 0)
-                self.reg_text.insert(tk.END, f"x{i:<2} ({abi_name:<4}): 0x{valor:08x} ({valor})\n")
+        if self._regs_exibidos is None:
+            self.reg_text.delete("1.0", tk.END)
+            self.reg_text.insert(tk.END, "".join(self._linha_registrador(i, valor) + "\n"
+                                                 for i, valor in enumerate(regs)))
+        else:
+            for i, (valor, anterior) in enumerate(zip(regs, self._regs_exibidos)):
+                if valor != anterior:
+                    self.reg_text.delete(f"{i + 1}.0", f"{i + 1}.end")
+                    self.reg_text.insert(f"{i + 1}.0", self._linha_registrador(i, valor))
+        self._regs_exibidos = regs
         self.reg_text.config(state="disabled")
 
+    @staticmethod
+    def _linha_registrador(i, valor):
+        return f"x{i:<2} ({_ABI_MAP.get(i, f'x{i}'):<4}): 0x{valor:08x} ({valor})"
+
 if __name__ == "__main__":
     app = InterfaceSimuladorRISCV()
     app.mainloop()
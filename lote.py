@@ -0,0 +1,189 @@
+"""
+Execução em lote (sem interface gráfica) de vários programas .asm.
+
+Uso:
+    python lote.py <diretório ou glob> [--workers N] [--max-ciclos N] [--timeout S]
+                   [--modo pipeline|funcional|traduzido] [--memoria densa|paginada]
+                   [--rastros DIR] [--saida resultados.jsonl]
+                   [--forwarding] [--deteccao-hazards] [--preditor TIPO]
+                   [--cache [OPCOES]] [--contadores] [--cache-montagem DIR]
+
+Cada programa é montado e simulado em um processo do pool; os resultados são
+emitidos em JSON Lines (um objeto por programa) à medida que terminam.
+
+--cache liga a cache de dados no modo pipeline; OPCOES são pares chave=valor
+separados por vírgula com os parâmetros de CacheDados, por exemplo
+"tamanho=1024,associatividade=4,substituicao=fifo,penalidade_falta=20".
+
+--cache-montagem guarda os programas montados em DIR (ver cache_montagem.py),
+compartilhados entre os processos do pool e entre execuções.
+"""
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from componentes.preditor import TIPOS_PREDITOR
+
+# Ciclos executados entre verificações do tempo limite
+CICLOS_POR_VERIFICACAO = 4096
+
+
+def ler_opcoes_cache(texto):
+    """Converte "chave=valor,..." nas opções de CacheDados (números e booleanos convertidos)."""
+    opcoes = {}
+    for par in filter(None, (p.strip() for p in texto.split(","))):
+        chave, separador, valor = par.partition("=")
+        if not separador:
+            raise argparse.ArgumentTypeError(f"Opção de cache sem valor: {par}")
+        if valor.isdigit():
+            valor = int(valor)
+        elif valor.lower() in ("sim", "true", "nao", "não", "false"):
+            valor = valor.lower() in ("sim", "true")
+        opcoes[chave.strip()] = valor
+    return opcoes
+
+
+def listar_programas(alvo):
+    """Aceita um diretório (todos os .asm/.s dentro dele) ou um padrão glob."""
+    if os.path.isdir(alvo):
+        caminhos = glob.glob(os.path.join(alvo, "*.asm")) + glob.glob(os.path.join(alvo, "*.s"))
+    else:
+        caminhos = glob.glob(alvo, recursive=True)
+    return sorted(caminhos)
+
+
+def executar_programa(caminho, max_ciclos=100000, timeout=None, modo="pipeline", dir_rastros=None,
+                      tipo_memoria="densa", forwarding=False, deteccao_hazards=False, preditor=None,
+                      cache_dados=None, contadores=False, dir_cache_montagem=None):
+    """Monta e simula um programa; retorna um dicionário serializável em JSON."""
+    from simulador import coletar_resultados, criar_simulador
+    import cache_montagem
+
+    if dir_cache_montagem:
+        cache_montagem.cache_padrao.diretorio = dir_cache_montagem
+
+    resultado = {"programa": caminho, "ciclos": 0, "concluido": False, "erro": None}
+    inicio = time.perf_counter()
+    # As mensagens do montador são capturadas (para relatar erros) e não se misturam com o JSON
+    mensagens = io.StringIO()
+    try:
+        with open(caminho, "r", encoding="utf-8") as f:
+            codigo = f.read()
+
+        opcoes = {"tipo_memoria": tipo_memoria}
+        if modo == "pipeline":
+            opcoes["arquivo_saida"] = None
+            opcoes["enable_forwarding"] = forwarding
+            opcoes["enable_hazard_detection"] = deteccao_hazards
+            opcoes["preditor"] = preditor
+            opcoes["cache_dados"] = cache_dados
+            opcoes["contadores_desempenho"] = contadores
+            if dir_rastros:
+                nome = os.path.splitext(os.path.basename(caminho))[0] + ".out"
+                opcoes["arquivo_saida"] = os.path.join(dir_rastros, nome)
+
+        with contextlib.redirect_stdout(mensagens):
+            sim = criar_simulador(codigo, modo=modo, **opcoes)
+        if codigo.strip() and not len(sim.memoria_instrucoes):
+            erros = [linha for linha in mensagens.getvalue().splitlines() if "Erro" in linha]
+            raise ValueError("; ".join(erros) or "Programa vazio após a montagem")
+
+        # As mensagens da execução não são usadas: descartadas, em vez de acumuladas em memória
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            limite_tempo = time.monotonic() + timeout if timeout else None
+            while not sim.halted and sim.clock_cycle < max_ciclos:
+                sim.executar(max_ciclos=min(sim.clock_cycle + CICLOS_POR_VERIFICACAO, max_ciclos))
+                if limite_tempo and time.monotonic() > limite_tempo:
+                    resultado["erro"] = f"Tempo limite ({timeout}s) atingido"
+                    break
+            if hasattr(sim, "fechar"):
+                sim.fechar()
+
+        if not sim.halted and resultado["erro"] is None:
+            resultado["erro"] = f"Limite de ciclos ({max_ciclos}) atingido"
+        resultado.update(coletar_resultados(sim, modo))
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {e}"
+    resultado["tempo"] = round(time.perf_counter() - inicio, 6)
+    return resultado
+
+
+def executar_lote(caminhos, saida, workers=None, max_ciclos=100000, timeout=None,
+                  modo="pipeline", dir_rastros=None, tipo_memoria="densa",
+                  forwarding=False, deteccao_hazards=False, preditor=None, cache_dados=None,
+                  contadores=False, dir_cache_montagem=None):
+    """Distribui os programas pelo pool e escreve cada resultado em `saida` assim que termina."""
+    if dir_rastros:
+        os.makedirs(dir_rastros, exist_ok=True)
+    falhas = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {
+            pool.submit(executar_programa, caminho, max_ciclos, timeout, modo, dir_rastros, tipo_memoria,
+                        forwarding, deteccao_hazards, preditor, cache_dados, contadores,
+                        dir_cache_montagem): caminho
+            for caminho in caminhos
+        }
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception as e:  # processo do pool encerrado de forma anormal
+                resultado = {"programa": futuros[futuro], "erro": f"{type(e).__name__}: {e}"}
+            if resultado.get("erro"):
+                falhas += 1
+            saida.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+            saida.flush()
+    return falhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Executa programas .asm em lote e emite resultados em JSON Lines.")
+    parser.add_argument("alvo", help="diretório com arquivos .asm ou padrão glob (ex.: 'testes/**/*.asm')")
+    parser.add_argument("--workers", type=int, default=None, help="número de processos (padrão: núcleos da máquina)")
+    parser.add_argument("--max-ciclos", type=int, default=100000, help="limite de ciclos por programa")
+    parser.add_argument("--timeout", type=float, default=None, help="tempo limite por programa, em segundos")
+    parser.add_argument("--modo", default="pipeline", choices=("pipeline", "funcional", "traduzido"))
+    parser.add_argument("--memoria", default="densa", choices=("densa", "paginada"),
+                        help="memória densa de 4 KiB ou paginada com espaço de 32 bits")
+    parser.add_argument("--forwarding", action="store_true", help="modo pipeline: liga o forwarding")
+    parser.add_argument("--deteccao-hazards", action="store_true",
+                        help="modo pipeline: liga a detecção de hazards (bolhas em vez de nops)")
+    parser.add_argument("--preditor", default=None, choices=TIPOS_PREDITOR,
+                        help="modo pipeline: preditor de desvios (padrão: resolução ideal em ID)")
+    parser.add_argument("--cache", nargs="?", const={}, default=None, type=ler_opcoes_cache, metavar="OPCOES",
+                        help="modo pipeline: liga a cache de dados (opções chave=valor,... de CacheDados)")
+    parser.add_argument("--contadores", action="store_true",
+                        help="modo pipeline: inclui os contadores de desempenho (CPI, bolhas, mix, por PC)")
+    parser.add_argument("--cache-montagem", default=None, metavar="DIR",
+                        help="diretório da cache de montagem em disco (padrão: só em memória)")
+    parser.add_argument("--rastros", default=None, help="diretório para o saida.out de cada programa (padrão: nenhum)")
+    parser.add_argument("--saida", default=None, help="arquivo .jsonl de resultados (padrão: saída padrão)")
+    args = parser.parse_args(argv)
+
+    caminhos = listar_programas(args.alvo)
+    if not caminhos:
+        print(f"Nenhum programa encontrado em '{args.alvo}'", file=sys.stderr)
+        return 1
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as saida:
+            falhas = executar_lote(caminhos, saida, args.workers, args.max_ciclos, args.timeout,
+                                   args.modo, args.rastros, args.memoria,
+                                   args.forwarding, args.deteccao_hazards, args.preditor, args.cache,
+                                   args.contadores, args.cache_montagem)
+    else:
+        falhas = executar_lote(caminhos, sys.stdout, args.workers, args.max_ciclos, args.timeout,
+                               args.modo, args.rastros, args.memoria,
+                               args.forwarding, args.deteccao_hazards, args.preditor, args.cache,
+                               args.contadores, args.cache_montagem)
+    print(f"{len(caminhos)} programas executados, {falhas} com erro", file=sys.stderr)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,9 @@
-from componentes.isa import MONTADOR_ISA
+from array import array
+import mmap
+import os
+import sys
+from componentes.isa import CSRS, MONTADOR_ISA, CODIFICACAO_ISA, formatar_binario
 from componentes.registradores import Registradores
-import re
 
 # --- Bloco de Inicialização e Funções Auxiliares ---
 
@@ -8,6 +11,11 @@ import re
 registradores_info = Registradores()
 ABI_NAMES = registradores_info.ABI
 
+# Versão da codificação gerada pelo montador. Faz parte da chave da cache de
+# montagem (cache_montagem.py): incrementar sempre que a saída de montar_linhas
+# mudar para o mesmo texto (novas instruções, correções de codificação).
+VERSAO_MONTADOR = 3
+
 def get_reg_num(reg_str):
     """
     Converte um nome de registrador (ex: 't0' ou 'x5') para seu número inteiro.
@@ -31,99 +39,112 @@ def parse_mem_access(partes):
     Retorna (registrador_operando, imediato, registrador_base).
     """
     reg_operando = partes[1]
-    match = re.match(r'(-?\d+)\((\w+)\)', partes[2])
-    if not match:
+    # Mesmo formato que re.match(r'(-?\d+)\((\w+)\)', ...), sem importar o módulo re
+    # (reduz o tempo de partida da linha de comando)
+    operando = partes[2]
+    abre = operando.find('(')
+    fecha = operando.find(')', abre + 1)
+    imediato = operando[:abre]
+    reg_base = operando[abre + 1:fecha]
+    digitos = imediato[1:] if imediato.startswith('-') else imediato
+    if (abre < 0 or fecha < 0 or not digitos.isdecimal() or not reg_base
+            or not all(c.isalnum() or c == '_' for c in reg_base)):
         raise ValueError(f"Formato de acesso à memória inválido: {' '.join(partes)}")
-    
-    imediato = match.group(1)
-    reg_base = match.group(2)
     return reg_operando, imediato, reg_base
 
+def parse_endereco_atomico(operando):
+    """Registrador base de '(t0)' ou '0(t0)': as atômicas não têm deslocamento."""
+    abre = operando.find('(')
+    if abre < 0 or not operando.endswith(')') or operando[:abre] not in ('', '0'):
+        raise ValueError(f"Endereço de instrução atômica inválido (use '(reg)'): {operando}")
+    return operando[abre + 1:-1]
+
+def parse_csr(texto):
+    """Número do CSR, pelo nome (ex: 'mhartid') ou em decimal/hexadecimal."""
+    numero = CSRS.get(texto.lower())
+    if numero is None:
+        numero = int(texto, 0)
+    if not 0 <= numero < (1 << 12):
+        raise ValueError(f"Número de CSR fora do intervalo de 12 bits: {texto}")
+    return numero
+
 # --- Funções de Montagem por Tipo de Instrução ---
 
+# Cada função devolve a palavra de 32 bits da instrução como inteiro
+
 def montar_tipo_r(partes):
-    info = MONTADOR_ISA[partes[0]]
+    opcode, funct3, funct7 = CODIFICACAO_ISA[partes[0]]
     rd_num = get_reg_num(partes[1])
     rs1_num = get_reg_num(partes[2])
     rs2_num = get_reg_num(partes[3])
 
-    rd_bin = format(rd_num, '05b')
-    rs1_bin = format(rs1_num, '05b')
-    rs2_bin = format(rs2_num, '05b')
-    
-    return f"{info['funct7']}{rs2_bin}{rs1_bin}{info['funct3']}{rd_bin}{info['opcode']}"
+    return (funct7 << 25) | (rs2_num << 20) | (rs1_num << 15) | (funct3 << 12) | (rd_num << 7) | opcode
 
 def montar_tipo_i(partes):
     nome_inst = partes[0]
-    info = MONTADOR_ISA[nome_inst]
+    opcode, funct3, funct7 = CODIFICACAO_ISA[nome_inst]
     
     if nome_inst == 'nop':
         rd_str, rs1_str, imediato_str = 'zero', 'zero', '0'
+    elif nome_inst == 'csrr':
+        # csrr rd, csr (csrrs rd, csr, x0); o número do CSR ocupa o imediato sem sinal
+        return (parse_csr(partes[2]) << 20) | (funct3 << 12) | (get_reg_num(partes[1]) << 7) | opcode
     elif nome_inst in ['lw', 'jalr']:
         rd_str, imediato_str, rs1_str = parse_mem_access(partes)
-    else: # addi
+    else: # addi, slti, sltiu, xori, ori, andi, slli, srli, srai
         rd_str, rs1_str, imediato_str = partes[1], partes[2], partes[3]
 
     rd_num = get_reg_num(rd_str)
     rs1_num = get_reg_num(rs1_str)
     
-    rd_bin = format(rd_num, '05b')
-    rs1_bin = format(rs1_num, '05b')
-    
     imediato = int(imediato_str)
-    imm_bin = format(imediato & 0xFFF, '012b')
+    if nome_inst in ('slli', 'srli', 'srai'):
+        # Deslocamento de 5 bits; o funct7 ocupa os bits 11:5 do imediato
+        if not 0 <= imediato < 32:
+            raise ValueError(f"Deslocamento fora do intervalo 0-31: {imediato}")
+        imediato |= funct7 << 5
     
-    return f"{imm_bin}{rs1_bin}{info['funct3']}{rd_bin}{info['opcode']}"
+    return ((imediato & 0xFFF) << 20) | (rs1_num << 15) | (funct3 << 12) | (rd_num << 7) | opcode
 
 def montar_tipo_s(partes):
-    info = MONTADOR_ISA[partes[0]]
+    opcode, funct3, _ = CODIFICACAO_ISA[partes[0]]
     rs2_str, imediato_str, rs1_str = parse_mem_access(partes)
 
     rs1_num = get_reg_num(rs1_str)
     rs2_num = get_reg_num(rs2_str)
 
-    rs1_bin = format(rs1_num, '05b')
-    rs2_bin = format(rs2_num, '05b')
-    
-    imediato = int(imediato_str)
-    imm_bin_12 = format(imediato & 0xFFF, '012b')
+    imediato = int(imediato_str) & 0xFFF
     
-    imm_11_5 = imm_bin_12[0:7]
-    imm_4_0 = imm_bin_12[7:12]
+    imm_11_5 = imediato >> 5
+    imm_4_0 = imediato & 0x1F
 
-    return f"{imm_11_5}{rs2_bin}{rs1_bin}{info['funct3']}{imm_4_0}{info['opcode']}"
+    return (imm_11_5 << 25) | (rs2_num << 20) | (rs1_num << 15) | (funct3 << 12) | (imm_4_0 << 7) | opcode
 
 def montar_tipo_b(partes, labels, endereco_atual):
-    info = MONTADOR_ISA[partes[0]]
+    opcode, funct3, _ = CODIFICACAO_ISA[partes[0]]
     rs1_str, rs2_str, label = partes[1], partes[2], partes[3]
     
     rs1_num = get_reg_num(rs1_str)
     rs2_num = get_reg_num(rs2_str)
 
-    rs1_bin = format(rs1_num, '05b')
-    rs2_bin = format(rs2_num, '05b')
-    
     endereco_alvo = labels[label]
     offset = endereco_alvo - endereco_atual
     
-    # Converte para binário de 13 bits (complemento de dois)
-    offset_bin_13 = format(offset & 0x1FFF, '013b')
+    # Offset de 13 bits (complemento de dois)
+    offset &= 0x1FFF
 
     # Reorganiza os bits do offset conforme o formato Tipo B
-    # offset_bin[0]   -> imm[12]
-    # offset_bin[1]   -> imm[11]
-    # offset_bin[2:8] -> imm[10:5]
-    # offset_bin[8:12]-> imm[4:1]
-    imm_12 = offset_bin_13[0]
-    imm_11 = offset_bin_13[1]
-    imm_10_5 = offset_bin_13[2:8]
-    imm_4_1 = offset_bin_13[8:12]
+    imm_12 = (offset >> 12) & 0x1
+    imm_11 = (offset >> 11) & 0x1
+    imm_10_5 = (offset >> 5) & 0x3F
+    imm_4_1 = (offset >> 1) & 0xF
     
-    return f"{imm_12}{imm_10_5}{rs2_bin}{rs1_bin}{info['funct3']}{imm_4_1}{imm_11}{info['opcode']}"
+    return ((imm_12 << 31) | (imm_10_5 << 25) | (rs2_num << 20) | (rs1_num << 15) |
+            (funct3 << 12) | (imm_4_1 << 8) | (imm_11 << 7) | opcode)
 
 def montar_tipo_j(partes, labels, endereco_atual):
     nome_inst = partes[0]
-    info = MONTADOR_ISA[nome_inst]
+    opcode, _, _ = CODIFICACAO_ISA[nome_inst]
 
     if nome_inst == 'j':
         rd_str = 'zero'
@@ -133,26 +154,44 @@ def montar_tipo_j(partes, labels, endereco_atual):
         label = partes[2]
 
     rd_num = get_reg_num(rd_str)
-    rd_bin = format(rd_num, '05b')
     
     endereco_alvo = labels[label]
-    offset = endereco_alvo - endereco_atual
-    
-    offset_bin_21 = format(offset & 0x1FFFFF, '021b')
+    offset = (endereco_alvo - endereco_atual) & 0x1FFFFF
     
     # Reorganiza os bits do offset conforme o formato Tipo J
-    # offset_bin[0]    -> imm[20]
-    # offset_bin[1:9]  -> imm[19:12]
-    # offset_bin[9]    -> imm[11]
-    # offset_bin[10:20]-> imm[10:1]
-    imm_20 = offset_bin_21[0]
-    imm_19_12 = offset_bin_21[1:9]
-    imm_11 = offset_bin_21[9]
-    imm_10_1 = offset_bin_21[10:20]
+    imm_20 = (offset >> 20) & 0x1
+    imm_19_12 = (offset >> 12) & 0xFF
+    imm_11 = (offset >> 11) & 0x1
+    imm_10_1 = (offset >> 1) & 0x3FF
     
-    imm_reorganizado = f"{imm_20}{imm_10_1}{imm_11}{imm_19_12}"
+    imm_reorganizado = (imm_20 << 19) | (imm_10_1 << 9) | (imm_11 << 8) | imm_19_12
     
-    return f"{imm_reorganizado}{rd_bin}{info['opcode']}"
+    return (imm_reorganizado << 12) | (rd_num << 7) | opcode
+
+def montar_tipo_u(partes):
+    opcode, _, _ = CODIFICACAO_ISA[partes[0]]
+    rd_num = get_reg_num(partes[1])
+
+    # Imediato de 20 bits (os bits 31:12 do resultado); aceita decimal ou hexadecimal (0x...)
+    imediato = int(partes[2], 0)
+    if not -(1 << 19) <= imediato < (1 << 20):
+        raise ValueError(f"Imediato fora do intervalo de 20 bits: {partes[2]}")
+
+    return ((imediato & 0xFFFFF) << 12) | (rd_num << 7) | opcode
+
+def montar_tipo_a(partes):
+    nome_inst = partes[0]
+    opcode, funct3, funct7 = CODIFICACAO_ISA[nome_inst]
+    rd_num = get_reg_num(partes[1])
+
+    if nome_inst == 'lr.w':  # lr.w rd, (rs1)
+        rs2_num = 0
+        rs1_num = get_reg_num(parse_endereco_atomico(partes[2]))
+    else:  # sc.w/amoadd.w rd, rs2, (rs1)
+        rs2_num = get_reg_num(partes[2])
+        rs1_num = get_reg_num(parse_endereco_atomico(partes[3]))
+
+    return (funct7 << 25) | (rs2_num << 20) | (rs1_num << 15) | (funct3 << 12) | (rd_num << 7) | opcode
 
 # --- Funções Principais do Montador (Passagens) ---
 
@@ -184,7 +223,7 @@ def primeira_passagem(caminho_arquivo):
     return labels
 
 def segunda_passagem(caminho_arquivo, labels):
-    programa_binario = []
+    programa_binario = array('I')
     endereco_atual = 0
     with open(caminho_arquivo, 'r') as f:
         for num_linha, linha in enumerate(f, 1):
@@ -204,26 +243,15 @@ def segunda_passagem(caminho_arquivo, labels):
                 continue
             
             try:
-                binario_final = ""
-                if info['tipo'] == 'R':
-                    binario_final = montar_tipo_r(partes)
-                elif info['tipo'] == 'I':
-                    binario_final = montar_tipo_i(partes)
-                elif info['tipo'] == 'S':
-                    binario_final = montar_tipo_s(partes)
-                elif info['tipo'] == 'B':
-                    binario_final = montar_tipo_b(partes, labels, endereco_atual)
-                elif info['tipo'] == 'J':
-                    binario_final = montar_tipo_j(partes, labels, endereco_atual)
-                
-                if binario_final:
-                    assert len(binario_final) == 32
-                    programa_binario.append(binario_final)
+                palavra = codificar_instrucao(partes, labels, endereco_atual)
+                if palavra is not None:
+                    assert 0 <= palavra <= 0xFFFFFFFF
+                    programa_binario.append(palavra)
                     endereco_atual += 4
 
             except (ValueError, KeyError, IndexError) as e:
                 print(f"Erro de montagem na linha {num_linha} ('{linha.strip()}'): {e}")
-                return [] # Retorna lista vazia em caso de erro
+                return array('I') # Retorna programa vazio em caso de erro
 
     return programa_binario
 
@@ -238,64 +266,120 @@ def montar(caminho_arquivo):
     return programa_binario
 # ...existing code...
 
-def montar_linhas(linhas):
+def analisar_linha(linha):
+    """
+    Separa uma linha de código em (label, ocupa_endereco, partes): o label
+    definido na linha (ou None), se a primeira passagem reserva um endereço para
+    ela e os campos da instrução para a segunda passagem (lista vazia se não houver).
+    """
+    texto = linha.split('#')[0].strip()
+    if not texto:
+        return None, False, []
+    label, ocupa = None, True
+    if ':' in texto:
+        partes = [p.strip() for p in texto.split(':')]
+        label = partes[0] or None
+        ocupa = len(partes) >= 2 and bool(partes[1])
+        texto = texto.split(':', 1)[1].strip()
+    return label, ocupa, texto.replace(',', ' ').split()
+
+def codificar_instrucao(partes, labels, endereco_atual):
+    """Palavra de 32 bits da instrução em `partes`, ou None se a instrução for desconhecida."""
+    info = MONTADOR_ISA.get(partes[0].lower())
+    if not info:
+        return None
+    if info['tipo'] == 'R':
+        return montar_tipo_r(partes)
+    elif info['tipo'] == 'I':
+        return montar_tipo_i(partes)
+    elif info['tipo'] == 'S':
+        return montar_tipo_s(partes)
+    elif info['tipo'] == 'B':
+        return montar_tipo_b(partes, labels, endereco_atual)
+    elif info['tipo'] == 'J':
+        return montar_tipo_j(partes, labels, endereco_atual)
+    elif info['tipo'] == 'U':
+        return montar_tipo_u(partes)
+    elif info['tipo'] == 'A':
+        return montar_tipo_a(partes)
+    return None
+
+def montar_linhas(linhas, mapa_linhas=None, tabela_labels=None):
     """
     Monta um programa a partir de uma lista de linhas de código assembly (strings).
-    Retorna uma lista de instruções binárias (strings de 32 bits).
+    Retorna um array('I') com as palavras de 32 bits das instruções.
+    Se `mapa_linhas` for uma lista, recebe o número da linha (a partir de 1) de
+    cada instrução montada, na mesma ordem das palavras. Se `tabela_labels` for
+    um dicionário, recebe os labels e seus endereços.
     """
+    analisadas = [analisar_linha(linha) for linha in linhas]
+
     # Primeira passagem: mapeia labels
-    labels = {}
+    labels = {} if tabela_labels is None else tabela_labels
     endereco_atual = 0
-    for linha in linhas:
-        linha_sem_comentario = linha.split('#')[0].strip()
-        if not linha_sem_comentario:
-            continue
-        if ':' in linha_sem_comentario:
-            partes = [p.strip() for p in linha_sem_comentario.split(':')]
-            if partes[0]:
-                labels[partes[0]] = endereco_atual
-            if len(partes) < 2 or not partes[1]:
-                continue
-            linha_processada = partes[1]
-        else:
-            linha_processada = linha_sem_comentario
-        if linha_processada:
+    for label, ocupa, _ in analisadas:
+        if label:
+            labels[label] = endereco_atual
+        if ocupa:
             endereco_atual += 4
 
-    # Segunda passagem: monta instruções
-    programa_binario = []
+    # Segunda passagem: monta instruções (as desconhecidas são ignoradas)
+    programa_binario = array('I')
     endereco_atual = 0
-    for num_linha, linha in enumerate(linhas, 1):
-        linha_limpa = linha.split('#')[0].strip()
-        if ':' in linha_limpa:
-            linha_limpa = linha_limpa.split(':', 1)[1].strip()
-        if not linha_limpa:
-            continue
-        partes = linha_limpa.replace(',', ' ').split()
+    for num_linha, (linha, (_, _, partes)) in enumerate(zip(linhas, analisadas), 1):
         if not partes:
             continue
-        nome_inst = partes[0].lower()
-        info = MONTADOR_ISA.get(nome_inst)
-        if not info:
-            continue  # Ignora instruções desconhecidas
         try:
-            binario_final = ""
-            if info['tipo'] == 'R':
-                binario_final = montar_tipo_r(partes)
-            elif info['tipo'] == 'I':
-                binario_final = montar_tipo_i(partes)
-            elif info['tipo'] == 'S':
-                binario_final = montar_tipo_s(partes)
-            elif info['tipo'] == 'B':
-                binario_final = montar_tipo_b(partes, labels, endereco_atual)
-            elif info['tipo'] == 'J':
-                binario_final = montar_tipo_j(partes, labels, endereco_atual)
-            if binario_final:
-                assert len(binario_final) == 32
-                programa_binario.append(binario_final)
+            palavra = codificar_instrucao(partes, labels, endereco_atual)
+            if palavra is not None:
+                assert 0 <= palavra <= 0xFFFFFFFF
+                programa_binario.append(palavra)
                 endereco_atual += 4
+                if mapa_linhas is not None:
+                    mapa_linhas.append(num_linha)
         except Exception as e:
             print(f"Erro de montagem na linha {num_linha} ('{linha.strip()}'): {e}")
-            return []
-    print("Programa binário montado:", programa_binario)
-    return programa_binario
\ No newline at end of file
+            if mapa_linhas is not None:
+                mapa_linhas.clear()
+            labels.clear()
+            return array('I')
+    print(f"Programa binário montado: {len(programa_binario)} instruções")
+    return programa_binario
+
+
+def listar_binario(programa):
+    """Converte as palavras montadas em strings de bits, apenas para exibição."""
+    return [formatar_binario(palavra) for palavra in programa]
+
+
+def salvar_binario(programa, caminho_arquivo):
+    """Grava o programa montado como imagem binária crua (little-endian)."""
+    palavras = array('I', programa)
+    if sys.byteorder != 'little':
+        palavras.byteswap()
+    with open(caminho_arquivo, 'wb') as f:
+        palavras.tofile(f)
+
+
+def mapear_binario(caminho_arquivo):
+    """
+    Mapeia uma imagem binária crua (little-endian) com mmap, sem copiar o arquivo.
+    O mapeamento é privado: escritas na memória de instruções não alteram o arquivo.
+    Retorna uma sequência de palavras de 32 bits indexável como o array('I').
+    """
+    tamanho = os.path.getsize(caminho_arquivo)
+    if tamanho < 4 or sys.byteorder != 'little':
+        return carregar_binario(caminho_arquivo)
+    with open(caminho_arquivo, 'rb') as f:
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    return memoryview(mapa)[:tamanho - tamanho % 4].cast('I')
+
+
+def carregar_binario(caminho_arquivo):
+    """Lê uma imagem binária crua (little-endian) gravada por salvar_binario."""
+    palavras = array('I')
+    with open(caminho_arquivo, 'rb') as f:
+        palavras.frombytes(f.read())
+    if sys.byteorder != 'little':
+        palavras.byteswap()
+    return palavras
\ No newline at end of file
@@ -0,0 +1,182 @@
+"""
+Montagem incremental para a edição do código na interface.
+
+`MontadorIncremental` guarda, para cada linha do texto, a análise da linha
+(label, campos da instrução), a palavra montada e a instrução pré-decodificada.
+`atualizar(texto)` compara o texto novo com o anterior (prefixo e sufixo
+comuns) e processa só as linhas alteradas:
+
+* se as linhas editadas continuam definindo os mesmos labels e ocupando os
+  mesmos endereços, só elas são recodificadas e as palavras são trocadas no
+  lugar (índices em `palavras_alteradas`);
+* caso contrário, endereços e labels são recalculados a partir das análises
+  guardadas (sem reanalisar o texto) e, além das linhas editadas, só são
+  recodificados os desvios e saltos cujo endereço ou label de destino mudou.
+  `deslocou` indica que algum endereço ou label mudou de fato: um programa em
+  execução precisa recomeçar.
+
+Os erros de montagem das linhas editadas são retornados na hora por
+`atualizar`. O resultado (`montagem()`) é o mesmo de `montador.montar_linhas`
+sobre o texto inteiro: mesmas palavras, labels e mapa de linhas.
+"""
+from array import array
+
+from cache_montagem import Montagem
+from componentes.isa import MONTADOR_ISA, pre_decodificar
+import montador
+
+# Tipos cuja codificação depende do próprio endereço e dos labels
+_TIPOS_RELATIVOS = ("B", "J")
+
+
+class _Linha:
+    __slots__ = ("texto", "label", "ocupa", "partes", "emite", "relativa", "endereco", "palavra", "info", "erro")
+
+    def __init__(self, texto):
+        self.texto = texto
+        self.label, self.ocupa, self.partes = montador.analisar_linha(texto)
+        info = MONTADOR_ISA.get(self.partes[0].lower()) if self.partes else None
+        # Instruções desconhecidas reservam endereço para os labels, mas não geram palavra (como no montador)
+        self.emite = info is not None
+        self.relativa = self.emite and info["tipo"] in _TIPOS_RELATIVOS
+        # Endereço da palavra gerada; -1 enquanto a linha não foi posicionada
+        self.endereco = -1
+        self.palavra = 0
+        self.info = None
+        self.erro = None
+
+
+class MontadorIncremental:
+    def __init__(self, texto=""):
+        self.linhas = []
+        self.labels = {}
+        self._palavras = array("I")
+        self._decodificado = []
+        self._mapa = []
+        self._num_erros = 0
+
+        # Resultado da última atualização
+        self.deslocou = False
+        self.palavras_alteradas = []
+        self.codificadas = 0
+        if texto:
+            self.atualizar(texto)
+
+    def atualizar(self, texto):
+        """Aplica o texto novo; retorna os erros das linhas alteradas como (número da linha, mensagem)."""
+        novas = texto.splitlines()
+        linhas = self.linhas
+        n_antigas, n_novas = len(linhas), len(novas)
+        limite = min(n_antigas, n_novas)
+        inicio = 0
+        while inicio < limite and linhas[inicio].texto == novas[inicio]:
+            inicio += 1
+        fim = 0
+        while fim < limite - inicio and linhas[n_antigas - 1 - fim].texto == novas[n_novas - 1 - fim]:
+            fim += 1
+        return self.editar_linhas(inicio, n_antigas - fim, novas[inicio:n_novas - fim])
+
+    def editar_linhas(self, inicio, fim, novas):
+        """Troca as linhas [inicio, fim) (a partir de 0) pelos textos `novas`; retorna os erros delas."""
+        self.deslocou = False
+        self.palavras_alteradas = []
+        self.codificadas = 0
+
+        removidas = self.linhas[inicio:fim]
+        inseridas = [_Linha(texto) for texto in novas]
+        self.linhas[inicio:fim] = inseridas
+        self._num_erros -= sum(1 for linha in removidas if linha.erro is not None)
+
+        if len(removidas) == len(inseridas) and all(
+                (antiga.label, antiga.ocupa, antiga.emite) == (nova.label, nova.ocupa, nova.emite)
+                for antiga, nova in zip(removidas, inseridas)):
+            # Mesmos endereços e labels: só as linhas editadas mudam
+            for antiga, nova in zip(removidas, inseridas):
+                if nova.emite:
+                    nova.endereco = antiga.endereco
+                    self._codificar(nova)
+                    self._trocar_palavra(nova)
+        else:
+            self._reposicionar(inseridas)
+
+        return [(inicio + i + 1, self._mensagem(inicio + i + 1, linha))
+                for i, linha in enumerate(inseridas) if linha.erro is not None]
+
+    def _reposicionar(self, inseridas):
+        """Recalcula endereços e labels e recodifica as linhas novas e os desvios afetados."""
+        labels = {}
+        proximo_label = proximo = 0
+        movidas = []
+        for linha in self.linhas:
+            if linha.label:
+                labels[linha.label] = proximo_label
+            if linha.ocupa:
+                proximo_label += 4
+            if linha.emite:
+                if linha.endereco != proximo:
+                    movidas.append(linha)
+                    linha.endereco = proximo
+                proximo += 4
+
+        alterados = {nome for nome in labels.keys() | self.labels.keys()
+                     if labels.get(nome) != self.labels.get(nome)}
+        novas = set(map(id, inseridas))
+        movidas = {id(linha) for linha in movidas} - novas
+        self.deslocou = bool(alterados) or bool(movidas) or proximo != 4 * len(self._palavras)
+        self.labels = labels
+
+        recodificar = [linha for linha in inseridas if linha.emite]
+        recodificar += [linha for linha in self.linhas if linha.relativa and id(linha) not in novas and (
+            id(linha) in movidas or not alterados.isdisjoint(linha.partes[1:]))]
+        for linha in recodificar:
+            self._codificar(linha)
+
+        if self.deslocou:
+            emitidas = [(num, linha) for num, linha in enumerate(self.linhas, 1) if linha.emite]
+            self._palavras = array("I", [linha.palavra for _, linha in emitidas])
+            self._decodificado = [linha.info for _, linha in emitidas]
+            self._mapa = [num for num, _ in emitidas]
+        else:
+            # Só números de linha mudaram (linhas sem instrução inseridas ou removidas)
+            for linha in recodificar:
+                self._trocar_palavra(linha)
+            self._mapa = [num for num, linha in enumerate(self.linhas, 1) if linha.emite]
+
+    def _codificar(self, linha):
+        self.codificadas += 1
+        tinha_erro = linha.erro is not None
+        try:
+            palavra = montador.codificar_instrucao(linha.partes, self.labels, linha.endereco)
+            assert 0 <= palavra <= 0xFFFFFFFF
+            linha.palavra, linha.info, linha.erro = palavra, pre_decodificar(palavra), None
+        except Exception as e:
+            linha.palavra, linha.info, linha.erro = 0, None, str(e) or type(e).__name__
+        self._num_erros += (linha.erro is not None) - tinha_erro
+
+    def _trocar_palavra(self, linha):
+        indice = linha.endereco >> 2
+        if self._palavras[indice] != linha.palavra or self._decodificado[indice] is None:
+            self._palavras[indice] = linha.palavra
+            self._decodificado[indice] = linha.info
+            self.palavras_alteradas.append(indice)
+
+    @staticmethod
+    def _mensagem(num_linha, linha):
+        return f"Erro de montagem na linha {num_linha} ('{linha.texto.strip()}'): {linha.erro}"
+
+    def erros(self):
+        """Erros de todas as linhas, como (número da linha, mensagem)."""
+        if not self._num_erros:
+            return []
+        return [(num, self._mensagem(num, linha)) for num, linha in enumerate(self.linhas, 1)
+                if linha.erro is not None]
+
+    def palavra(self, indice):
+        return self._palavras[indice]
+
+    def montagem(self):
+        """Cópia do programa atual como `Montagem`, ou None se houver erros."""
+        if self._num_erros:
+            return None
+        return Montagem(array("I", self._palavras), dict(self.labels), list(self._mapa),
+                        list(self._decodificado))
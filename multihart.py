@@ -0,0 +1,253 @@
+"""
+Simulação de vários harts (núcleos) RISC-V com a memória de dados compartilhada.
+
+Cada hart é um SimuladorPipeline completo, com PC, registradores, latches,
+preditor e cache próprios e o seu identificador em `csrr rd, mhartid`; todos
+executam o mesmo programa sobre uma única memória de dados. As atômicas lr.w,
+sc.w e amoadd.w usam as reservas por hart da memória (componentes/memoria.py).
+
+Modos:
+    "lockstep"  todos os harts no mesmo processo, avançando um ciclo por vez
+                na ordem do mhartid (0, 1, ...): a intercalação dos acessos à
+                memória é determinística e a execução se repete exatamente.
+    "livre"     os harts são distribuídos entre `num_processos` processos do
+                sistema operacional, que rodam sem sincronização sobre uma
+                MemoriaCompartilhada (multiprocessing.shared_memory). A ordem
+                dos acessos depende do escalonador, como em hardware real; a
+                vazão agregada cresce com o número de processos, até o número
+                de núcleos da máquina. Cada processo alterna os seus harts a
+                cada `CICLOS_POR_FATIA` ciclos.
+
+Os harts não gravam o log ciclo a ciclo (saida.out), e step_back e checkpoints
+continuam sendo recursos de um único SimuladorPipeline.
+
+Uso:
+    mh = SimuladorMultiHart(codigo, num_harts=4, modo="livre", num_processos=4,
+                            enable_forwarding=True, enable_hazard_detection=True)
+    mh.executar(max_ciclos=100000)
+    mh.registradores[2]["x10"], mh.ler_word(0x100), mh.estatisticas()
+    mh.fechar()
+
+Linha de comando:
+    python multihart.py programa.asm [--harts N] [--modo lockstep|livre] [--processos P]
+                        [--max-ciclos N] [--forwarding] [--deteccao-hazards]
+"""
+import sys
+import time
+
+from componentes.memoria import Memoria, MemoriaCompartilhada
+import cache_montagem
+
+MODOS = ("lockstep", "livre")
+# Modo livre: ciclos seguidos de um hart antes de o processo passar ao próximo
+CICLOS_POR_FATIA = 64
+
+
+def _criar_harts(codigo_assembly, ids, memoria, opcoes):
+    from simulador_pipeline import SimuladorPipeline
+
+    montagem = cache_montagem.montar(codigo_assembly.strip())
+    harts = []
+    for hart_id in ids:
+        sim = SimuladorPipeline(arquivo_saida=None, hart_id=hart_id, memoria=memoria, **opcoes)
+        sim.carregar_montagem(montagem, codigo_assembly)
+        harts.append(sim)
+    return harts
+
+
+def _estado_hart(sim):
+    return {"hart": sim.hart_id, "pc": sim.pc, "ciclos": sim.clock_cycle, "concluido": sim.halted,
+            "registradores": sim.registradores, "dados_na_memoria": dict(sim.dados_na_memoria),
+            "bolhas_hazard": sim.bolhas_hazard, "encaminhamentos": sim.encaminhamentos}
+
+
+def _executar_processo(codigo_assembly, ids, memoria, opcoes, max_ciclos, fila):
+    """Processo do modo livre: alterna entre os seus harts até todos terminarem."""
+    import contextlib
+    import os
+
+    # As mensagens dos harts de processos diferentes se misturariam: são descartadas
+    try:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            harts = _criar_harts(codigo_assembly, ids, memoria, opcoes)
+            inicio = time.perf_counter()
+            ativos = harts
+            while ativos:
+                for sim in ativos:
+                    limite = min(sim.clock_cycle + CICLOS_POR_FATIA, max_ciclos)
+                    while not sim.halted and sim.clock_cycle < limite:
+                        sim.step()
+                ativos = [sim for sim in ativos if not sim.halted and sim.clock_cycle < max_ciclos]
+        fila.put({"estados": [_estado_hart(sim) for sim in harts],
+                  "tempo": time.perf_counter() - inicio, "erro": None})
+    except Exception as e:
+        fila.put({"estados": [], "tempo": 0.0, "erro": f"{type(e).__name__}: {e}"})
+    finally:
+        memoria.fechar()
+
+
+class SimuladorMultiHart:
+    """
+    `num_harts` pipelines executando o mesmo programa sobre uma memória de dados
+    compartilhada de `tamanho_memoria` bytes. As demais opções (forwarding,
+    detecção de hazards, preditor, cache...) são repassadas a cada SimuladorPipeline.
+    """
+
+    def __init__(self, codigo_assembly, num_harts=2, modo="lockstep", num_processos=None,
+                 tamanho_memoria=4096, **opcoes):
+        if modo not in MODOS:
+            raise ValueError(f"Modo desconhecido: {modo} (use um de {', '.join(MODOS)})")
+        if num_harts < 1:
+            raise ValueError("É necessário pelo menos um hart")
+        self.codigo_assembly = codigo_assembly
+        self.num_harts = num_harts
+        self.modo = modo
+        self.num_processos = min(num_processos or num_harts, num_harts)
+        self.opcoes = opcoes
+        self.tempo_execucao = 0.0
+        # Estado de cada hart ao fim da execução no modo livre (os simuladores ficam nos processos)
+        self._estados = None
+        if modo == "lockstep":
+            self.memoria = Memoria(tamanho_memoria)
+            self.harts = _criar_harts(codigo_assembly, range(num_harts), self.memoria, opcoes)
+        else:
+            self.memoria = MemoriaCompartilhada(tamanho_memoria, num_harts)
+            self.harts = []
+
+    def executar(self, max_ciclos=100000):
+        """Executa até todos os harts terminarem ou chegarem a `max_ciclos` ciclos cada."""
+        inicio = time.perf_counter()
+        if self.modo == "lockstep":
+            self._executar_lockstep(max_ciclos)
+        else:
+            self._executar_livre(max_ciclos)
+        self.tempo_execucao += time.perf_counter() - inicio
+
+    def _executar_lockstep(self, max_ciclos):
+        ativos = [sim for sim in self.harts if not sim.halted and sim.clock_cycle < max_ciclos]
+        while ativos:
+            for sim in ativos:
+                sim.step()
+            if any(sim.halted or sim.clock_cycle >= max_ciclos for sim in ativos):
+                ativos = [sim for sim in ativos if not sim.halted and sim.clock_cycle < max_ciclos]
+
+    def _executar_livre(self, max_ciclos):
+        import multiprocessing
+
+        if self._estados is not None:
+            raise RuntimeError("No modo livre o programa é executado uma única vez")
+        # Harts distribuídos em rodízio: o processo p fica com p, p + P, p + 2P, ...
+        grupos = [list(range(p, self.num_harts, self.num_processos)) for p in range(self.num_processos)]
+        fila = multiprocessing.Queue()
+        processos = [multiprocessing.Process(target=_executar_processo,
+                                             args=(self.codigo_assembly, ids, self.memoria, self.opcoes,
+                                                   max_ciclos, fila), daemon=True)
+                     for ids in grupos]
+        for processo in processos:
+            processo.start()
+        # Os resultados são lidos antes do join: um processo só termina depois de esvaziar a fila
+        resultados = [fila.get() for _ in processos]
+        for processo in processos:
+            processo.join()
+        erros = [r["erro"] for r in resultados if r["erro"]]
+        if erros:
+            raise RuntimeError("; ".join(erros))
+        self._estados = sorted((estado for r in resultados for estado in r["estados"]),
+                               key=lambda estado: estado["hart"])
+
+    def _estados_harts(self):
+        if self.modo == "lockstep":
+            return [_estado_hart(sim) for sim in self.harts]
+        if self._estados is None:
+            return []
+        return self._estados
+
+    @property
+    def halted(self):
+        estados = self._estados_harts()
+        return bool(estados) and all(estado["concluido"] for estado in estados)
+
+    @property
+    def clock_cycle(self):
+        """Ciclos do hart mais longo."""
+        return max((estado["ciclos"] for estado in self._estados_harts()), default=0)
+
+    @property
+    def registradores(self):
+        """Registradores de cada hart, indexados pelo mhartid."""
+        return [estado["registradores"] for estado in self._estados_harts()]
+
+    @property
+    def dados_na_memoria(self):
+        """Endereços escritos por qualquer hart, com o valor final da memória compartilhada."""
+        enderecos = set()
+        for estado in self._estados_harts():
+            enderecos.update(estado["dados_na_memoria"])
+        return {endereco: self.memoria.ler_word(endereco) for endereco in sorted(enderecos)}
+
+    def ler_word(self, endereco):
+        return self.memoria.ler_word(endereco)
+
+    def estatisticas(self):
+        """Ciclos por hart, tempo de execução e vazão agregada (ciclos simulados por segundo)."""
+        estados = self._estados_harts()
+        ciclos = sum(estado["ciclos"] for estado in estados)
+        return {
+            "modo": self.modo,
+            "harts": self.num_harts,
+            "processos": self.num_processos if self.modo == "livre" else 1,
+            "ciclos_por_hart": [estado["ciclos"] for estado in estados],
+            "ciclos_totais": ciclos,
+            "tempo": self.tempo_execucao,
+            "ciclos_por_segundo": ciclos / self.tempo_execucao if self.tempo_execucao else 0.0,
+        }
+
+    def fechar(self):
+        """Libera a memória compartilhada do modo livre; o conteúdo final continua legível."""
+        if isinstance(self.memoria, MemoriaCompartilhada):
+            copia = Memoria(self.memoria.tamanho)
+            copia.mem[:] = self.memoria.capturar()
+            self.memoria.liberar()
+            self.memoria = copia
+
+
+def main(argv=None):
+    import argparse
+    import contextlib
+    import io
+
+    parser = argparse.ArgumentParser(prog="python multihart.py",
+                                     description="Executa um programa .asm em vários harts com memória compartilhada.")
+    parser.add_argument("programa", help="arquivo .asm")
+    parser.add_argument("--harts", type=int, default=2)
+    parser.add_argument("--modo", default="lockstep", choices=MODOS)
+    parser.add_argument("--processos", type=int, default=None, help="modo livre: processos (padrão: um por hart)")
+    parser.add_argument("--max-ciclos", type=int, default=100000, help="limite de ciclos de cada hart")
+    parser.add_argument("--forwarding", action="store_true")
+    parser.add_argument("--deteccao-hazards", action="store_true")
+    args = parser.parse_args(argv)
+
+    with open(args.programa, "r", encoding="utf-8") as f:
+        codigo = f.read()
+    # As mensagens do montador e dos harts são descartadas
+    with contextlib.redirect_stdout(io.StringIO()):
+        mh = SimuladorMultiHart(codigo, args.harts, args.modo, args.processos,
+                                enable_forwarding=args.forwarding,
+                                enable_hazard_detection=args.deteccao_hazards)
+        try:
+            mh.executar(max_ciclos=args.max_ciclos)
+        finally:
+            mh.fechar()
+
+    estatisticas = mh.estatisticas()
+    print(f"Modo: {estatisticas['modo']}  Harts: {estatisticas['harts']}  Processos: {estatisticas['processos']}")
+    print(f"Ciclos por hart: {estatisticas['ciclos_por_hart']}  Concluído: {'sim' if mh.halted else 'não'}")
+    print(f"Tempo: {estatisticas['tempo']:.3f} s  Vazão: {estatisticas['ciclos_por_segundo']:.0f} ciclos/s")
+    print("\nMemória:")
+    for endereco, valor in mh.dados_na_memoria.items():
+        print(f"0x{endereco:08x}: 0x{valor:08x} ({valor})")
+    return 0 if mh.halted else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
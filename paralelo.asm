@@ -0,0 +1,36 @@
+# Programa para vários harts com memória compartilhada (ver multihart.py).
+# Execute com forwarding e detecção de hazards ligados, por exemplo:
+#   python multihart.py paralelo.asm --harts 4 --forwarding --deteccao-hazards
+#
+# Cada hart soma a sua faixa de 200 números: o hart h soma h*200+1 até (h+1)*200.
+# Ao final, o endereço 256 tem a soma de 1 até 200*N (amoadd.w) e o endereço 264
+# conta os harts que passaram pela seção crítica protegida pela trava em 260 (lr.w/sc.w).
+
+# --- Faixa deste hart ---
+    csrr  s0, mhartid       # s0 = número do hart
+    addi  s1, zero, 200     # s1 = tamanho da faixa
+    mul   t0, s0, s1        # t0 = primeiro número - 1
+    add   t1, t0, s1        # t1 = último número
+    addi  t2, zero, 0       # t2 = soma parcial
+
+laco:
+    addi  t0, t0, 1
+    add   t2, t2, t0
+    blt   t0, t1, laco
+
+# --- Soma atômica no total compartilhado ---
+    addi  a0, zero, 256
+    amoadd.w zero, t2, (a0)
+
+# --- Seção crítica: trava em 260, contador em 264 ---
+    addi  a1, zero, 260
+    addi  t3, zero, 1
+trava:
+    lr.w  t4, (a1)          # lê a trava e reserva o endereço
+    bne   t4, zero, trava   # ocupada: tenta de novo
+    sc.w  t5, t3, (a1)      # tenta marcar como ocupada
+    bne   t5, zero, trava   # outro hart escreveu antes: tenta de novo
+    lw    t6, 4(a1)
+    addi  t6, t6, 1
+    sw    t6, 4(a1)
+    sw    zero, 0(a1)       # libera a trava
@@ -0,0 +1,167 @@
+from collections import deque
+
+from componentes.isa import formatar_binario
+from componentes.registradores import Registradores
+
+# Níveis de detalhamento do arquivo de saída
+NIVEL_DESLIGADO = "desligado"   # nenhum arquivo é criado
+NIVEL_RESUMO = "resumo"         # apenas o estado final da simulação
+NIVEL_PIPELINE = "pipeline"     # PC e estágios do pipeline a cada ciclo
+NIVEL_COMPLETO = "completo"     # formato original: pipeline, registradores e memória a cada ciclo
+NIVEIS = (NIVEL_DESLIGADO, NIVEL_RESUMO, NIVEL_PIPELINE, NIVEL_COMPLETO)
+
+SEPARADOR = "=" * 50
+
+# Mapa número -> nome ABI, montado uma única vez
+_ABI_MAP = {v: k for k, v in Registradores().ABI.items()}
+_NOMES_REGS = [f"x{i:<2} ({_ABI_MAP.get(i, f'x{i}'):<4})" for i in range(32)]
+
+
+class RastreadorSaida:
+    """
+    Escreve o log da simulação (saida.out) mantendo um único arquivo aberto e
+    bufferizado durante toda a execução.
+
+    No modo delta (nível completo), cada ciclo registra apenas os registradores
+    e palavras de memória que mudaram; a cada `intervalo_snapshot` ciclos é
+    escrito um estado completo, cuja posição no arquivo fica em
+    `indice_snapshots` (ciclo -> offset) para permitir saltar direto a ele.
+    Depois de um step_back ou da restauração de um checkpoint, o próximo ciclo
+    também é um estado completo (ver `forcar_snapshot`).
+
+    Com `ciclos_memoria` > 0, o texto dos últimos ciclos também fica em
+    `recentes`, um buffer circular de (ciclo, texto) que a interface lê para
+    acrescentar à tela só o que é novo, sem reler o arquivo. O buffer funciona
+    mesmo sem arquivo (`caminho` None).
+    """
+
+    def __init__(self, caminho="saida.out", nivel=NIVEL_COMPLETO, delta=False,
+                 intervalo_snapshot=1000, tamanho_buffer=1 << 20, ciclos_memoria=0):
+        if nivel not in NIVEIS:
+            raise ValueError(f"Nível de saída inválido: {nivel}")
+        self.caminho = caminho
+        self.nivel = nivel if caminho or ciclos_memoria > 0 else NIVEL_DESLIGADO
+        self.recentes = deque(maxlen=ciclos_memoria) if ciclos_memoria > 0 else None
+        self.delta = delta
+        self.intervalo_snapshot = intervalo_snapshot
+        self.indice_snapshots = {}
+        self._regs_anteriores = [0] * 32
+        self._forcar_snapshot = False
+        self._arquivo = None
+
+        if self.nivel != NIVEL_DESLIGADO and caminho:
+            self._arquivo = open(caminho, "w", buffering=tamanho_buffer)
+            self._arquivo.write("Simulador RISC-V com Pipeline - Início da Execução\n")
+            self._arquivo.write(SEPARADOR + "\n\n")
+
+    @property
+    def ativo(self):
+        return self._arquivo is not None
+
+    def registrar_ciclo(self, sim):
+        if self.nivel in (NIVEL_DESLIGADO, NIVEL_RESUMO):
+            return
+        partes = [self._formatar_pipeline(sim)]
+        if self.nivel == NIVEL_COMPLETO:
+            regs = sim._registradores.get_all()
+            if not self.delta:
+                partes.append(self._formatar_estado(regs, sim.dados_na_memoria))
+            elif self._forcar_snapshot or sim.clock_cycle % self.intervalo_snapshot == 0:
+                self._forcar_snapshot = False
+                if self._arquivo is not None:
+                    self.indice_snapshots[sim.clock_cycle] = self._arquivo.tell()
+                partes.append("Snapshot completo\n")
+                partes.append(self._formatar_estado(regs, sim.dados_na_memoria))
+            else:
+                partes.append(self._formatar_delta(regs, sim.escritas_ciclo))
+            self._regs_anteriores[:] = regs
+        partes.append("\n" + SEPARADOR + "\n\n")
+        texto = "".join(partes)
+        if self._arquivo is not None:
+            self._arquivo.write(texto)
+        if self.recentes is not None:
+            self.recentes.append((sim.clock_cycle, texto))
+
+    def descartar_apos(self, ciclo):
+        """Tira do buffer em memória e do índice de snapshots os ciclos posteriores a `ciclo` (após um `step_back`)."""
+        recentes = self.recentes
+        while recentes and recentes[-1][0] > ciclo:
+            recentes.pop()
+        for desfeito in [c for c in self.indice_snapshots if c > ciclo]:
+            del self.indice_snapshots[desfeito]
+
+    def forcar_snapshot(self):
+        """
+        O próximo ciclo do modo delta grava o estado completo: depois que o
+        simulador volta a um estado anterior, as alterações não seriam mais
+        relativas ao último ciclo escrito no arquivo.
+        """
+        self._forcar_snapshot = True
+
+    def registrar_fim(self, sim):
+        if not self.ativo:
+            return
+        if self.nivel == NIVEL_RESUMO:
+            self._arquivo.write(self._formatar_estado(sim._registradores.get_all(), sim.dados_na_memoria))
+        self._arquivo.write(f"\n--- Fim da Simulação ({sim.clock_cycle} ciclos) ---\n")
+        self._arquivo.flush()
+
+    def descarregar(self):
+        if self.ativo:
+            self._arquivo.flush()
+
+    def fechar(self):
+        if self.ativo:
+            self._arquivo.close()
+            self._arquivo = None
+
+    def _formatar_pipeline(self, sim):
+        if sim.largura > 1:
+            return self._formatar_pipeline_superescalar(sim)
+        if_id = sim.if_id
+        texto_if = formatar_binario(if_id.instrucao) if if_id.valido else 'nop'
+        return (
+            f"--- Ciclo {sim.clock_cycle} ---\n"
+            f"PC: 0x{sim.pc:08x}\n\n"
+            "Estágios do Pipeline:\n"
+            f"  IF/ID : {texto_if} (PC=0x{if_id.pc:04x})\n"
+            f"  ID/EX : {sim.id_ex.info.nome}\n"
+            f"  EX/MEM: {sim.ex_mem.info.nome}\n"
+            f"  MEM/WB: {sim.mem_wb.info.nome}\n\n"
+        )
+
+    def _formatar_pipeline_superescalar(self, sim):
+        """Um slot por instrução do estágio, da mais antiga para a mais nova (ver simulador_superescalar.py)."""
+        texto_if = " | ".join(f"{if_id.instrucao:08x} (PC=0x{if_id.pc:04x})" if if_id.valido else "nop"
+                              for if_id in sim.if_ids)
+        return (
+            f"--- Ciclo {sim.clock_cycle} ---\n"
+            f"PC: 0x{sim.pc:08x}\n\n"
+            "Estágios do Pipeline:\n"
+            f"  IF/ID : {texto_if}\n"
+            f"  ID/EX : {' | '.join(latch.info.nome for latch in sim.id_exs)}\n"
+            f"  EX/MEM: {' | '.join(latch.info.nome for latch in sim.ex_mems)}\n"
+            f"  MEM/WB: {' | '.join(latch.info.nome for latch in sim.mem_wbs)}\n\n"
+        )
+
+    def _formatar_estado(self, regs, dados_na_memoria):
+        linhas = ["Registradores:\n"]
+        for i in range(32):
+            linhas.append(f"  {_NOMES_REGS[i]}: 0x{regs[i]:08x} ({regs[i]})\n")
+        if dados_na_memoria:
+            linhas.append("\nMemória (posições escritas):\n")
+            for addr, val in sorted(dados_na_memoria.items()):
+                linhas.append(f"  Endereço[0x{addr:04x}]: 0x{val:08x}\n")
+        return "".join(linhas)
+
+    def _formatar_delta(self, regs, escritas):
+        anteriores = self._regs_anteriores
+        linhas = []
+        for i in range(32):
+            if regs[i] != anteriores[i]:
+                linhas.append(f"  {_NOMES_REGS[i]}: 0x{regs[i]:08x} ({regs[i]})\n")
+        for addr, val in escritas:
+            linhas.append(f"  Endereço[0x{addr:04x}]: 0x{val:08x}\n")
+        if not linhas:
+            return "Alterações: nenhuma\n"
+        return "Alterações:\n" + "".join(linhas)
@@ -0,0 +1,208 @@
+"""
+Ponto único de criação dos simuladores.
+
+    modo='pipeline'  -> SimuladorPipeline (modelo ciclo a ciclo de 5 estágios)
+    modo='funcional' -> SimuladorFuncional (uma instrução por iteração, só o estado final)
+    modo='traduzido' -> SimuladorFuncional com tradução de blocos básicos (tradutor.py)
+    modo='vetorial'  -> SimuladorVetorial (N entradas em paralelo com NumPy; use num_instancias=N)
+    modo='superescalar' -> SimuladorSuperescalar (pipeline em ordem emitindo até `largura` instruções por ciclo)
+
+Também é a linha de comando, sem interface gráfica:
+
+    python -m simulador programa.asm [--modo pipeline|funcional|traduzido|superescalar] [--max-ciclos N]
+                        [--formato texto|json] [--saida ARQ] [--rastro ARQ] [--nivel-rastro NIVEL]
+                        [--forwarding] [--deteccao-hazards] [--preditor TIPO] [--cache [OPCOES]]
+                        [--contadores] [--largura W] [--memoria densa|paginada] [--mensagens]
+
+Monta e executa o programa ("-" lê da entrada padrão) e imprime registradores,
+memória escrita e estatísticas. Nenhum arquivo é gravado sem --saida ou
+--rastro (o saida.out ciclo a ciclo do modo pipeline). As opções também
+aceitam os nomes --max-cycles, --output e --trace. Só o simulador do modo
+escolhido é importado (o tkinter nunca é).
+"""
+import sys
+
+MODOS = ("pipeline", "funcional", "traduzido", "vetorial", "superescalar")
+
+
+def criar_simulador(codigo_assembly=None, modo="pipeline", **opcoes):
+    """Cria o simulador do modo escolhido; `opcoes` são repassadas ao construtor."""
+    if modo == "pipeline":
+        from simulador_pipeline import SimuladorPipeline
+        return SimuladorPipeline(codigo_assembly, **opcoes)
+    if modo == "funcional":
+        from simulador_funcional import SimuladorFuncional
+        return SimuladorFuncional(codigo_assembly, **opcoes)
+    if modo == "traduzido":
+        from simulador_funcional import SimuladorFuncional
+        return SimuladorFuncional(codigo_assembly, traducao=True, **opcoes)
+    if modo == "vetorial":
+        from simulador_vetorial import SimuladorVetorial
+        return SimuladorVetorial(codigo_assembly, **opcoes)
+    if modo == "superescalar":
+        from simulador_superescalar import SimuladorSuperescalar
+        return SimuladorSuperescalar(codigo_assembly, **opcoes)
+    raise ValueError(f"Modo de simulação desconhecido: {modo} (use um de {', '.join(MODOS)})")
+
+
+def coletar_resultados(sim, modo="pipeline"):
+    """Estado final e estatísticas de um simulador (exceto o vetorial), serializáveis em JSON."""
+    resultado = {"ciclos": sim.clock_cycle, "concluido": sim.halted}
+    if modo in ("pipeline", "superescalar"):
+        resultado["bolhas_hazard"] = sim.bolhas_hazard
+        resultado["encaminhamentos"] = sim.encaminhamentos
+        resultado["desvios"] = sim.estatisticas_desvios()
+        resultado["cache"] = sim.estatisticas_cache()
+        if sim.desempenho is not None:
+            resultado["desempenho"] = sim.estatisticas_desempenho()
+        if modo == "superescalar":
+            resultado["emissao"] = sim.estatisticas_emissao()
+    else:
+        resultado["instrucoes_retiradas"] = sim.instrucoes_retiradas
+    resultado["registradores"] = sim.registradores
+    resultado["memoria"] = {f"0x{addr:08x}": val for addr, val in sorted(sim.dados_na_memoria.items())}
+    return resultado
+
+
+def formatar_texto(resultado):
+    from componentes.registradores import Registradores
+
+    abi = {num: nome for nome, num in Registradores().ABI.items()}
+    linhas = [f"Programa: {resultado['programa']} ({resultado['modo']})",
+              f"Ciclos: {resultado['ciclos']}  Concluído: {'sim' if resultado['concluido'] else 'não'}"
+              f"  Tempo: {resultado['tempo']:.6f} s"]
+    if resultado.get("erro"):
+        linhas.append(f"Erro: {resultado['erro']}")
+
+    linhas.append("\nRegistradores:")
+    for i in range(32):
+        valor = resultado["registradores"][f"x{i}"]
+        linhas.append(f"x{i:<2} ({abi.get(i, f'x{i}'):<4}): 0x{valor & 0xFFFFFFFF:08x} ({valor})")
+    linhas.append("\nMemória:")
+    linhas.extend(f"{endereco}: 0x{valor & 0xFFFFFFFF:08x} ({valor})"
+                  for endereco, valor in resultado["memoria"].items())
+    if not resultado["memoria"]:
+        linhas.append("(nenhuma escrita)")
+
+    estatisticas = {chave: valor for chave, valor in resultado.items()
+                    if chave not in ("programa", "modo", "ciclos", "concluido", "tempo", "erro",
+                                     "registradores", "memoria") and valor is not None}
+    if estatisticas:
+        linhas.append("\nEstatísticas:")
+        for chave, valor in estatisticas.items():
+            if isinstance(valor, dict):
+                linhas.append(f"{chave}:")
+                linhas.extend(f"  {sub}: {v}" for sub, v in valor.items() if not isinstance(v, dict))
+            else:
+                linhas.append(f"{chave}: {valor}")
+    return "\n".join(linhas) + "\n"
+
+
+def _opcoes_cache(texto):
+    from lote import ler_opcoes_cache
+    return ler_opcoes_cache(texto)
+
+
+def main(argv=None):
+    import argparse
+    import contextlib
+    import io
+    import os
+    import time
+
+    from componentes.preditor import TIPOS_PREDITOR
+    from rastreador import NIVEIS, NIVEL_COMPLETO
+
+    parser = argparse.ArgumentParser(prog="python -m simulador",
+                                     description="Monta e executa um programa .asm sem interface gráfica.")
+    parser.add_argument("programa", help='arquivo .asm ("-" para a entrada padrão)')
+    parser.add_argument("--modo", default="pipeline", choices=("pipeline", "funcional", "traduzido", "superescalar"))
+    parser.add_argument("--max-ciclos", "--max-cycles", type=int, default=100000,
+                        help="limite de ciclos (instruções nos modos funcionais)")
+    parser.add_argument("--formato", default="texto", choices=("texto", "json"))
+    parser.add_argument("--saida", "--output", default=None,
+                        help="grava os resultados neste arquivo (padrão: saída padrão)")
+    parser.add_argument("--rastro", "--trace", default=None,
+                        help="modo pipeline: grava o log ciclo a ciclo (formato do saida.out)")
+    parser.add_argument("--nivel-rastro", default=NIVEL_COMPLETO, choices=NIVEIS, help="detalhe do --rastro")
+    parser.add_argument("--memoria", default="densa", choices=("densa", "paginada"))
+    parser.add_argument("--forwarding", action="store_true", help="modo pipeline: liga o forwarding")
+    parser.add_argument("--deteccao-hazards", action="store_true", help="modo pipeline: liga a detecção de hazards")
+    parser.add_argument("--preditor", default=None, choices=TIPOS_PREDITOR, help="modo pipeline: preditor de desvios")
+    parser.add_argument("--cache", nargs="?", const={}, default=None, type=_opcoes_cache, metavar="OPCOES",
+                        help="modo pipeline: liga a cache de dados (opções chave=valor,... de CacheDados)")
+    parser.add_argument("--contadores", action="store_true", help="modo pipeline: inclui os contadores de desempenho")
+    parser.add_argument("--largura", type=int, default=2,
+                        help="modo superescalar: instruções buscadas e emitidas por ciclo")
+    parser.add_argument("--mensagens", action="store_true",
+                        help="mostra em stderr as mensagens do montador e do simulador")
+    args = parser.parse_args(argv)
+
+    if args.modo not in ("pipeline", "superescalar") and (args.rastro or args.forwarding or args.deteccao_hazards or args.preditor
+                                    or args.cache is not None or args.contadores):
+        parser.error("--rastro, --forwarding, --deteccao-hazards, --preditor, --cache e --contadores "
+                     "valem só nos modos pipeline e superescalar")
+    if args.modo == "superescalar" and args.contadores:
+        parser.error("--contadores não vale no modo superescalar (veja as estatísticas de emissão)")
+
+    if args.programa == "-":
+        codigo = sys.stdin.read()
+    else:
+        try:
+            with open(args.programa, "r", encoding="utf-8") as f:
+                codigo = f.read()
+        except OSError as e:
+            print(f"Erro ao ler '{args.programa}': {e}", file=sys.stderr)
+            return 1
+
+    opcoes = {"tipo_memoria": args.memoria}
+    if args.modo == "pipeline":
+        opcoes.update(arquivo_saida=args.rastro, nivel_saida=args.nivel_rastro,
+                      enable_forwarding=args.forwarding, enable_hazard_detection=args.deteccao_hazards,
+                      preditor=args.preditor, cache_dados=args.cache, contadores_desempenho=args.contadores)
+    elif args.modo == "superescalar":
+        # A detecção de hazards é sempre ligada no modo superescalar
+        opcoes.update(arquivo_saida=args.rastro, nivel_saida=args.nivel_rastro, largura=args.largura,
+                      enable_forwarding=args.forwarding, preditor=args.preditor, cache_dados=args.cache)
+
+    resultado = {"programa": args.programa, "modo": args.modo}
+    inicio = time.perf_counter()
+    # As mensagens da montagem são guardadas para relatar erros; as da execução são descartadas
+    montagem = io.StringIO()
+    with contextlib.redirect_stdout(sys.stderr if args.mensagens else montagem):
+        sim = criar_simulador(codigo, modo=args.modo, **opcoes)
+    if codigo.strip() and not len(sim.memoria_instrucoes):
+        erros = [linha for linha in montagem.getvalue().splitlines() if "Erro" in linha]
+        print("; ".join(erros) or "Programa vazio após a montagem", file=sys.stderr)
+        return 1
+
+    erro = None
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(sys.stderr if args.mensagens else nulo):
+        try:
+            sim.executar(max_ciclos=args.max_ciclos)
+        except Exception as e:
+            erro = f"{type(e).__name__}: {e}"
+        finally:
+            if hasattr(sim, "fechar"):
+                sim.fechar()
+    if erro is None and not sim.halted:
+        erro = f"Limite de ciclos ({args.max_ciclos}) atingido"
+    resultado["tempo"] = round(time.perf_counter() - inicio, 6)
+    resultado.update(coletar_resultados(sim, args.modo))
+    resultado["erro"] = erro
+
+    if args.formato == "json":
+        import json
+        texto = json.dumps(resultado, ensure_ascii=False, indent=2) + "\n"
+    else:
+        texto = formatar_texto(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        sys.stdout.write(texto)
+    return 1 if erro else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+from array import array
+from componentes.memoria import criar_memoria
+from componentes.alu import ALU32Bit
+from componentes.isa import CSRS, OP_ID, OPS_ARITMETICAS, OPS_IMEDIATO, pre_decodificar
+from componentes.registradores import Registradores
+from tradutor import CacheTraducao
+import time
+import cache_montagem
+import montador
+
+# Identificadores das instruções, copiados para constantes locais do interpretador
+_ADD, _SUB = OP_ID["add"], OP_ID["sub"]
+_ADDI, _LW, _JALR, _SW = (OP_ID[n] for n in ("addi", "lw", "jalr", "sw"))
+_BEQ, _BNE, _BGE, _BLT = (OP_ID[n] for n in ("beq", "bne", "bge", "blt"))
+_JAL, _J, _AUIPC = OP_ID["jal"], OP_ID["j"], OP_ID["auipc"]
+_CSRR, _LR, _SC, _AMOADD = (OP_ID[n] for n in ("csrr", "lr.w", "sc.w", "amoadd.w"))
+
+MASK32 = 0xFFFFFFFF
+
+
+class SimuladorFuncional:
+    """
+    Simulador funcional (nível de ISA): executa uma instrução por iteração, sem
+    modelar o pipeline. Usa os mesmos componentes do SimuladorPipeline e expõe
+    a mesma interface (executar, step, registradores), mas só produz o estado
+    arquitetural final: registradores, memória e instruções retiradas.
+
+    Como não há pipeline, não existem hazards: o resultado corresponde ao de um
+    processador sem atrasos, independentemente dos nops de espera no código.
+
+    Com traducao=True, os blocos básicos são traduzidos para funções Python
+    (ver tradutor.py) e executados de uma vez; as estatísticas ficam em
+    `estatisticas_traducao()`.
+
+    hart_id: valor lido por `csrr rd, mhartid`; as atômicas (lr.w, sc.w,
+    amoadd.w) usam as reservas da memória com esse identificador.
+    """
+
+    def __init__(self, codigo_assembly=None, traducao=False, tipo_memoria="densa", hart_id=0):
+        # "densa" (4 KiB) ou "paginada" (espaço de 32 bits alocado sob demanda)
+        self.tipo_memoria = tipo_memoria
+        self.hart_id = hart_id
+        self.traducao = CacheTraducao() if traducao else None
+        self.tempo_execucao = 0.0
+        self.reset()
+
+        if codigo_assembly:
+            self.carregar_codigo_assembly(codigo_assembly)
+
+    def reset(self):
+        self.pc = 0
+        self.base_instrucoes = 0
+        self.instrucoes_retiradas = 0
+        self.halted = False
+
+        self._registradores = Registradores()
+        self.alu = ALU32Bit()
+        self.memoria = criar_memoria(self.tipo_memoria)
+        self.memoria_instrucoes = []
+
+        self.dados_na_memoria = {}
+
+    def carregar_codigo_assembly(self, codigo_assembly):
+        self.reset()
+        # Cópias: a imagem e a tabela decodificada da cache de montagem são compartilhadas
+        montagem = cache_montagem.montar(codigo_assembly.strip())
+        self._memoria_instrucoes = array('I', montagem.palavras)
+        self.cache_decodificado = list(montagem.decodificado)
+
+    def carregar_binario_instrucoes(self, caminho):
+        """Carrega um programa já montado a partir de uma imagem binária crua."""
+        self.reset()
+        self.memoria_instrucoes = montador.carregar_binario(caminho)
+
+    def carregar_imagem_instrucoes(self, caminho, endereco_base=0):
+        """Mapeia (mmap) uma imagem binária de instruções em `endereco_base`; decodifica sob demanda."""
+        self.reset()
+        self.base_instrucoes = self.pc = endereco_base
+        self._memoria_instrucoes = montador.mapear_binario(caminho)
+        self.cache_decodificado = [None] * len(self._memoria_instrucoes)
+
+    def carregar_imagem_dados(self, caminho, endereco_base=0):
+        """Mapeia uma imagem binária de dados na memória (sem cópia na memória paginada)."""
+        self.memoria.mapear_imagem(caminho, endereco_base)
+
+    @property
+    def memoria_instrucoes(self):
+        return self._memoria_instrucoes
+
+    @memoria_instrucoes.setter
+    def memoria_instrucoes(self, instrucoes):
+        self._memoria_instrucoes = instrucoes
+        self.cache_decodificado = [pre_decodificar(inst) for inst in instrucoes]
+        if self.traducao:
+            self.traducao.invalidar()
+
+    def escrever_instrucao(self, endereco, instrucao):
+        """Escreve na memória de instruções e invalida a entrada pré-decodificada."""
+        if isinstance(instrucao, str):
+            instrucao = int(instrucao, 2)
+        indice = (endereco - self.base_instrucoes) // 4
+        self._memoria_instrucoes[indice] = instrucao
+        self.cache_decodificado[indice] = None
+        if self.traducao:
+            self.traducao.invalidar(endereco)
+
+    @property
+    def clock_cycle(self):
+        # Sem pipeline, cada "ciclo" retira exatamente uma instrução
+        return self.instrucoes_retiradas
+
+    def executar(self, max_ciclos=1000):
+        if self.halted:
+            return
+        if self.traducao:
+            retiradas = self._executar_traduzido(max_ciclos - self.instrucoes_retiradas)
+        else:
+            retiradas = self._executar(max_ciclos - self.instrucoes_retiradas)
+        if not self.halted:
+            print(f"Alerta: Limite de ciclos ({max_ciclos}) atingido.")
+        else:
+            print(f"\nSimulação concluída: {retiradas} instruções retiradas.")
+
+    def step(self):
+        if self.halted:
+            return
+        self._executar(1)
+        if self.halted:
+            print(f"\nSimulação concluída: {self.instrucoes_retiradas} instruções retiradas.")
+
+    def _executar(self, limite):
+        """Laço principal do interpretador. Retorna o total de instruções retiradas."""
+        regs = self._registradores.regs
+        tabela = self.cache_decodificado
+        memoria = self.memoria
+        dados_na_memoria = self.dados_na_memoria
+        alu = self.alu
+        signed = alu.signed
+        operacoes = alu.operacoes
+        base = self.base_instrucoes
+        fim = base + len(tabela) * 4
+        pc = self.pc
+        executadas = 0
+
+        while executadas < limite:
+            if not base <= pc < fim:
+                self.halted = True
+                break
+            indice = (pc - base) >> 2
+            inst = tabela[indice]
+            if inst is None:
+                inst = tabela[indice] = pre_decodificar(self._memoria_instrucoes[indice])
+            op = inst.op
+            rd = inst.rd
+            executadas += 1
+
+            if op == _ADDI:
+                if rd:
+                    regs[rd] = (regs[inst.rs1] + inst.imm) & MASK32
+            elif op == _BNE:
+                if regs[inst.rs1] != regs[inst.rs2]:
+                    pc = (pc + inst.imm) & MASK32
+                    continue
+            elif op == _BEQ:
+                if regs[inst.rs1] == regs[inst.rs2]:
+                    pc = (pc + inst.imm) & MASK32
+                    continue
+            elif op == _BLT:
+                if signed(regs[inst.rs1]) < signed(regs[inst.rs2]):
+                    pc = (pc + inst.imm) & MASK32
+                    continue
+            elif op == _BGE:
+                if signed(regs[inst.rs1]) >= signed(regs[inst.rs2]):
+                    pc = (pc + inst.imm) & MASK32
+                    continue
+            elif op == _ADD:
+                if rd:
+                    regs[rd] = (regs[inst.rs1] + regs[inst.rs2]) & MASK32
+            elif op == _SUB:
+                if rd:
+                    regs[rd] = (regs[inst.rs1] - regs[inst.rs2]) & MASK32
+            elif op == _LW:
+                valor = memoria.ler_word((regs[inst.rs1] + inst.imm) & MASK32)
+                if rd:
+                    regs[rd] = valor
+            elif op == _SW:
+                endereco = (regs[inst.rs1] + inst.imm) & MASK32
+                valor = regs[inst.rs2]
+                memoria.escrever_word(endereco, valor)
+                dados_na_memoria[endereco] = valor
+            elif op == _JAL or op == _J:
+                if rd:
+                    regs[rd] = pc + 4
+                pc = (pc + inst.imm) & MASK32
+                continue
+            elif op == _JALR:
+                destino = ((regs[inst.rs1] + inst.imm) & ~1) & MASK32
+                if rd:
+                    regs[rd] = pc + 4
+                pc = destino
+                continue
+            elif op in OPS_ARITMETICAS:
+                valor = operacoes[op](regs[inst.rs1], inst.imm if op in OPS_IMEDIATO else regs[inst.rs2])
+                if rd:
+                    regs[rd] = valor
+            elif op == _AUIPC:
+                if rd:
+                    regs[rd] = (pc + inst.imm) & MASK32
+            elif op == _LR or op == _SC or op == _AMOADD:
+                self.pc = pc
+                valor = self._atomica(op, regs[inst.rs1], regs[inst.rs2])
+                if rd:
+                    regs[rd] = valor
+            elif op == _CSRR:
+                if inst.imm != CSRS["mhartid"]:
+                    self.pc = pc
+                    raise ValueError(f"CSR não suportado: {inst.imm:#x}")
+                if rd:
+                    regs[rd] = self.hart_id
+            else:
+                self.pc = pc
+                raise ValueError(f"Instrução desconhecida em PC=0x{pc:08x}: {inst.nome}")
+            pc += 4
+
+        self.pc = pc
+        self.instrucoes_retiradas += executadas
+        return self.instrucoes_retiradas
+
+    def _atomica(self, op, endereco, valor):
+        """lr.w, sc.w (0 se escreveu, 1 se falhou) e amoadd.w (valor anterior)."""
+        if endereco & 3:
+            raise ValueError(f"Endereço desalinhado em atômica: 0x{endereco:08x}")
+        memoria = self.memoria
+        if op == _LR:
+            return memoria.reservar(self.hart_id, endereco)
+        if op == _SC:
+            if not memoria.condicional(self.hart_id, endereco, valor):
+                return 1
+            self.dados_na_memoria[endereco] = valor
+            return 0
+        antigo = memoria.somar_atomico(endereco, valor)
+        self.dados_na_memoria[endereco] = (antigo + valor) & MASK32
+        return antigo
+
+    def _executar_traduzido(self, limite):
+        """Executa bloco a bloco pelo cache de tradução; o resto do limite é interpretado."""
+        inicio = time.perf_counter()
+        traducao_antes = self.traducao.tempo_traducao
+        regs = self._registradores.regs
+        memoria = self.memoria
+        dados_na_memoria = self.dados_na_memoria
+        blocos = self.traducao.blocos
+        traduzir_falta = self.traducao.traduzir_falta
+        tabela = self.cache_decodificado
+        instrucoes = self._memoria_instrucoes
+        base = self.base_instrucoes
+        fim = base + len(tabela) * 4
+        pc = self.pc
+        restante = limite
+        acertos = 0
+
+        while restante > 0:
+            if not base <= pc < fim:
+                self.halted = True
+                break
+            bloco = blocos.get(pc)
+            if bloco is not None:
+                acertos += 1
+            else:
+                bloco = traduzir_falta(pc, tabela, instrucoes, base)
+            if bloco is None or bloco.num_instrucoes > restante:
+                # Instrução não traduzível ou bloco maior que o restante do limite
+                self.pc = pc
+                antes = self.instrucoes_retiradas
+                self._executar(1)
+                restante -= self.instrucoes_retiradas - antes
+                pc = self.pc
+                continue
+            pc = bloco.funcao(regs, memoria, dados_na_memoria)
+            self.instrucoes_retiradas += bloco.num_instrucoes
+            restante -= bloco.num_instrucoes
+
+        self.pc = pc
+        self.traducao.acertos += acertos
+        self.tempo_execucao += (time.perf_counter() - inicio) - (self.traducao.tempo_traducao - traducao_antes)
+        return self.instrucoes_retiradas
+
+    def estatisticas_traducao(self):
+        if not self.traducao:
+            return None
+        estatisticas = self.traducao.estatisticas()
+        estatisticas["tempo_execucao"] = self.tempo_execucao
+        return estatisticas
+
+    @property
+    def registradores(self):
+        regs = self._registradores.get_all()
+        return {f"x{i}": regs[i] for i in range(32)}
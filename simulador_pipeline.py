@@ -1,14 +1,100 @@
 import sys
-from componentes.memoria import Memoria
+from array import array
+from componentes.memoria import criar_memoria
 from componentes.alu import ALU32Bit
-from componentes.isa import decodificar
+from componentes.cache import CacheDados
+from componentes.isa import (CSRS, NOMES_INSTRUCOES, OP_ID, OPS_ACESSO_MEMORIA, OPS_ATOMICAS,
+                            OPS_CARGA, OPS_DESVIO, OPS_ESCREVEM_MEMORIA, OPS_ESCREVEM_RD, OPS_IMEDIATO,
+                            OPS_LEEM_RS1, OPS_LEEM_RS2, OPS_SALTO, pre_decodificar)
+from componentes.latches import LatchIFID, LatchIDEX, LatchEXMEM, LatchMEMWB
+from componentes.preditor import UnidadeDesvios
 from componentes.registradores import Registradores
+from rastreador import RastreadorSaida, NIVEL_COMPLETO
+from ganchos import (EVENTOS, EventoBusca, EventoDecodificacao, EventoEscrita, EventoExecucao,
+                     EventoFimCiclo, EventoMemoria, EventoRetirada)
+from desempenho import FLUSH, STALL, STALL_MEMORIA, ContadoresDesempenho, exportar_json
+import cache_montagem
 import montador
 
+_BEQ, _BNE, _BLT, _BGE = (OP_ID[n] for n in ("beq", "bne", "blt", "bge"))
+_JALR, _LW, _SW, _AUIPC = OP_ID["jalr"], OP_ID["lw"], OP_ID["sw"], OP_ID["auipc"]
+_CSRR, _LR, _SC = OP_ID["csrr"], OP_ID["lr.w"], OP_ID["sc.w"]
+_MHARTID = CSRS["mhartid"]
+# (rd, valor) escrito pelo WB no ciclo atual; rd=0 quando não há escrita
+_SEM_ESCRITA = (0, 0)
+
 class SimuladorPipeline:
-    def __init__(self, codigo_assembly=None, enable_forwarding=False, enable_hazard_detection=False):
+    """
+    Pipeline de 5 estágios. Os estágios rodam em ordem inversa (WB, MEM, EX, ID,
+    IF) dentro de cada ciclo, então o banco de registradores é escrito antes de
+    ser lido e os desvios são resolvidos em ID sem ciclos perdidos.
+
+    enable_forwarding: EX recebe os resultados da instrução anterior (fonte
+    EX/MEM, exceto lw) e da escrita do WB no ciclo (fonte MEM/WB); desvios em ID
+    recebem o resultado de uma instrução em MEM que não seja lw.
+
+    enable_hazard_detection: ID insere bolhas enquanto um operando não pode ser
+    obtido: uma bolha no load-use com forwarding; com desvio dependendo de uma
+    instrução em EX (ou de lw em MEM); e até duas bolhas sem forwarding.
+
+    Sem as duas opções, o programa precisa de nops entre instruções dependentes.
+
+    preditor: sem preditor (None), IF só busca depois que ID resolveu o desvio,
+    sem ciclos perdidos (caso ideal). Com um preditor (ver componentes/preditor.py),
+    IF escolhe o próximo PC pela previsão e cada erro, detectado em ID, descarta a
+    instrução buscada no caminho errado (um ciclo); ver `estatisticas_desvios()`.
+
+    cache_dados: dicionário de opções de `CacheDados` (componentes/cache.py), ou
+    None sem cache. Uma falta no lw/sw em MEM para o estágio MEM e todos os
+    anteriores por `penalidade_falta` ciclos, enquanto o WB esvazia; ver
+    `estatisticas_cache()`.
+
+    contadores_desempenho: conta ciclos, instruções retiradas, CPI, bolhas por
+    causa e o mix de instruções, por PC e por linha do código-fonte; ver
+    `estatisticas_desempenho()` e desempenho.py.
+
+    Ganchos de instrumentação (busca, decodificação, execução, memória, escrita,
+    retirada, fim de ciclo): ver `registrar_gancho` e ganchos.py.
+
+    hart_id e memoria: identificador lido por `csrr rd, mhartid` e uma memória de
+    dados criada fora do simulador, que `reset` não recria, compartilhada entre
+    vários harts (ver multihart.py). As atômicas lr.w, sc.w e amoadd.w acessam a
+    memória em MEM e, como o lw, só entregam o valor de rd depois dele.
+    """
+
+    # Instruções buscadas e emitidas por ciclo (ver simulador_superescalar.py)
+    largura = 1
+
+    def __init__(self, codigo_assembly=None, enable_forwarding=False, enable_hazard_detection=False,
+                 arquivo_saida="saida.out", nivel_saida=NIVEL_COMPLETO, saida_delta=False,
+                 intervalo_snapshot=1000, tipo_memoria="densa", limite_desfazer=0,
+                 preditor=None, bits_preditor=10, entradas_btb=64, cache_dados=None,
+                 contadores_desempenho=False, ciclos_saida_memoria=0, hart_id=0, memoria=None):
         self.enable_forwarding = enable_forwarding
         self.enable_hazard_detection = enable_hazard_detection
+        # Configuração do log de execução (ver rastreador.py); arquivo_saida=None não grava nada
+        self.arquivo_saida = arquivo_saida
+        self.nivel_saida = nivel_saida
+        self.saida_delta = saida_delta
+        self.intervalo_snapshot = intervalo_snapshot
+        # Ciclos do log guardados também em memória (rastreador.recentes), para a interface
+        self.ciclos_saida_memoria = ciclos_saida_memoria
+        # "densa" (4 KiB) ou "paginada" (espaço de 32 bits alocado sob demanda)
+        self.tipo_memoria = tipo_memoria
+        # Ciclos guardados para step_back (0 desliga o histórico; ver historico.py)
+        self.limite_desfazer = limite_desfazer
+        # Previsão de desvios: tipo (None = resolução ideal em ID), tamanho das tabelas e da BTB
+        self.preditor = preditor
+        self.bits_preditor = bits_preditor
+        self.entradas_btb = entradas_btb
+        # Opções da cache L1 de dados (None = acesso direto à memória, sem esperas)
+        self.cache_dados = cache_dados
+        self.contadores_desempenho = contadores_desempenho
+        self.hart_id = hart_id
+        self._memoria_externa = memoria
+        # evento -> funções registradas; mantidos entre resets e carregamentos de programa
+        self._ganchos = {evento: [] for evento in EVENTOS}
+        self.rastreador = None
         self.reset()
         
         if codigo_assembly:
@@ -16,29 +102,139 @@ class SimuladorPipeline:
 
     def reset(self):
         self.pc = 0
+        self.base_instrucoes = 0
         self.clock_cycle = 0
         self.halted = False
         
         self._registradores = Registradores()
         self.alu = ALU32Bit()
-        self.memoria = Memoria()
+        self.memoria = (self._memoria_externa if self._memoria_externa is not None
+                        else criar_memoria(self.tipo_memoria))
         self.memoria_instrucoes = []
+        # Linha do código-fonte de cada instrução e o texto do programa (só com código assembly)
+        self.linhas_fonte = []
+        self.texto_fonte = []
         
         self.dados_na_memoria = {}
+        self.escritas_ciclo = []
 
-        self.if_id = {'instrucao_bin': 'nop', 'pc': 0}
-        self.id_ex = {'info': {'nome': 'nop'}, 'pc': 0, 'val_rs1': 0, 'val_rs2': 0}
-        self.ex_mem = {'info': {'nome': 'nop'}, 'resultado_ula': 0, 'val_rs2': 0}
-        self.mem_wb = {'info': {'nome': 'nop'}, 'resultado_final': 0}
-        
-        with open("saida.out", "w") as f:
-            f.write("Simulador RISC-V com Pipeline - Início da Execução\n")
-            f.write("="*50 + "\n\n")
+        # Contadores das unidades de hazard e de forwarding
+        self.bolhas_hazard = 0
+        self.encaminhamentos = 0
+        self._parar_if = False
+        self._escrita_wb = _SEM_ESCRITA
+        self.desvios = (UnidadeDesvios(self.preditor, self.bits_preditor, self.entradas_btb)
+                        if self.preditor else None)
+        # Cache de dados: ciclos que MEM ainda espera pela falta da instrução em EX/MEM,
+        # e se o acesso dessa instrução já passou pela cache
+        self.cache = CacheDados(**self.cache_dados) if self.cache_dados is not None else None
+        self.ciclos_espera_memoria = 0
+        self._espera_mem = 0
+        self._acesso_feito = False
+        self._mem_parado = False
+        self.desempenho = ContadoresDesempenho() if self.contadores_desempenho else None
+
+        # Latches alocados uma única vez e atualizados no lugar a cada ciclo. Como os
+        # estágios rodam de WB para IF, cada um lê o latch anterior antes de ele ser reescrito.
+        self.if_id = LatchIFID()
+        self.id_ex = LatchIDEX()
+        self.ex_mem = LatchEXMEM()
+        self.mem_wb = LatchMEMWB()
+
+        if self.rastreador:
+            self.rastreador.fechar()
+        self.rastreador = RastreadorSaida(self.arquivo_saida, self.nivel_saida,
+                                          self.saida_delta, self.intervalo_snapshot,
+                                          ciclos_memoria=self.ciclos_saida_memoria)
+        self.historico = None
+        if self.limite_desfazer:
+            from historico import HistoricoDesfazer
+            self.historico = HistoricoDesfazer(self.limite_desfazer)
 
     def carregar_codigo_assembly(self, codigo_assembly):
+        texto = codigo_assembly.strip()
+        # Linhas em branco removidas do início, para numerar as linhas como no texto original
+        deslocamento = codigo_assembly[:codigo_assembly.find(texto)].count("\n") if texto else 0
+        # Um acerto na cache de montagem não monta nem decodifica o programa
+        self.carregar_montagem(cache_montagem.montar(texto), codigo_assembly, deslocamento)
+
+    def carregar_montagem(self, montagem, codigo_assembly="", deslocamento=0):
+        """
+        Carrega um programa já montado (`cache_montagem.Montagem`). As linhas de
+        `montagem.linhas` são somadas a `deslocamento` para numerar o código-fonte.
+        """
+        self.reset()
+        # A imagem é compartilhada com quem montou e copiada na primeira escrita (como nos checkpoints)
+        self._memoria_instrucoes = montagem.palavras
+        self._instrucoes_compartilhadas = True
+        self.cache_decodificado = list(montagem.decodificado)
+        self.linhas_fonte = [deslocamento + linha for linha in montagem.linhas]
+        self.texto_fonte = codigo_assembly.splitlines()
+
+    def carregar_binario_instrucoes(self, caminho):
+        """Carrega um programa já montado a partir de uma imagem binária crua."""
         self.reset()
-        linhas = codigo_assembly.strip().splitlines()
-        self.memoria_instrucoes = montador.montar_linhas(linhas)
+        self.memoria_instrucoes = montador.carregar_binario(caminho)
+
+    def carregar_imagem_instrucoes(self, caminho, endereco_base=0):
+        """
+        Mapeia (mmap) uma imagem binária de instruções em `endereco_base`, sem copiá-la.
+        A decodificação é feita sob demanda, na primeira vez que cada instrução passa por ID.
+        """
+        self.reset()
+        self.base_instrucoes = self.pc = endereco_base
+        self._memoria_instrucoes = montador.mapear_binario(caminho)
+        self._instrucoes_compartilhadas = False
+        self.cache_decodificado = [None] * len(self._memoria_instrucoes)
+
+    def carregar_imagem_dados(self, caminho, endereco_base=0):
+        """Mapeia uma imagem binária de dados na memória (sem cópia na memória paginada)."""
+        self.memoria.mapear_imagem(caminho, endereco_base)
+
+    @property
+    def memoria_instrucoes(self):
+        return self._memoria_instrucoes
+
+    @memoria_instrucoes.setter
+    def memoria_instrucoes(self, instrucoes):
+        # Decodifica toda a imagem uma única vez; o estágio ID apenas consulta a tabela
+        self._memoria_instrucoes = instrucoes
+        # True enquanto a imagem é compartilhada com um checkpoint (copiada antes de ser escrita)
+        self._instrucoes_compartilhadas = False
+        self.cache_decodificado = [pre_decodificar(inst) for inst in instrucoes]
+
+    def escrever_instrucao(self, endereco, instrucao):
+        """Escreve na memória de instruções e invalida a entrada pré-decodificada."""
+        if isinstance(instrucao, str):
+            instrucao = int(instrucao, 2)
+        indice = (endereco - self.base_instrucoes) // 4
+        if self._instrucoes_compartilhadas:
+            self._memoria_instrucoes = array('I', self._memoria_instrucoes)
+            self._instrucoes_compartilhadas = False
+        self._memoria_instrucoes[indice] = instrucao
+        self.cache_decodificado[indice] = None
+
+    # --- Checkpoints (ver checkpoint.py, importado só quando usado) ---
+
+    def criar_checkpoint(self):
+        """Captura o estado atual; barato, pois a memória é compartilhada com cópia na escrita."""
+        import checkpoint
+        return checkpoint.capturar(self)
+
+    def restaurar_checkpoint(self, ckpt):
+        """Volta ao estado de `ckpt`; o mesmo checkpoint pode ser restaurado várias vezes."""
+        import checkpoint
+        checkpoint.restaurar(self, ckpt)
+        # As alterações do modo delta eram relativas ao estado anterior à restauração
+        self.rastreador.forcar_snapshot()
+
+    def salvar_checkpoint(self, caminho):
+        import checkpoint
+        checkpoint.salvar(self.criar_checkpoint(), caminho)
+
+    def carregar_checkpoint(self, caminho):
+        import checkpoint
+        self.restaurar_checkpoint(checkpoint.carregar(caminho))
 
     def executar(self, max_ciclos=1000):
         while not self.halted:
@@ -50,156 +246,457 @@ class SimuladorPipeline:
     def step(self):
         if self.halted:
             return
+        if self.historico is not None:
+            self.historico.registrar_ciclo(self)
 
         self.clock_cycle += 1
+        if self.escritas_ciclo:
+            self.escritas_ciclo.clear()
 
         self.estagio_wb()
         self.estagio_mem()
-        self.estagio_ex()
-        self.estagio_id()
-        self.estagio_if()
+        if self._mem_parado:
+            # Falta na cache: EX, ID e IF ficam parados com os latches como estão
+            self._mem_parado = False
+            if self.enable_forwarding:
+                self.encaminhar_parado()
+        else:
+            self.estagio_ex()
+            self.estagio_id()
+            self.estagio_if()
 
         self.gerar_saida_ciclo()
   
         if self.simulacao_terminou():
             self.halted = True
             print(f"\nSimulação concluída em {self.clock_cycle} ciclos.")
-            with open("saida.out", "a") as f:
-                f.write(f"\n--- Fim da Simulação ({self.clock_cycle} ciclos) ---\n")
+            self.rastreador.registrar_fim(self)
+
+    def registrar_gancho(self, evento, funcao):
+        """Chama `funcao(sim, evento)` a cada evento do tipo `evento` (ver ganchos.EVENTOS)."""
+        if evento not in self._ganchos:
+            raise ValueError(f"Evento desconhecido: {evento} (use um de {', '.join(EVENTOS)})")
+        self._ganchos[evento].append(funcao)
+        # A versão instrumentada substitui `step` só nesta instância
+        self.step = self._step_com_ganchos
+
+    def remover_gancho(self, evento, funcao):
+        self._ganchos[evento].remove(funcao)
+        if not any(self._ganchos.values()):
+            del self.step
+
+    def _step_com_ganchos(self):
+        """`step` com a emissão dos eventos; usado apenas enquanto há ganchos registrados."""
+        if self.halted:
+            return
+        if self.historico is not None:
+            self.historico.registrar_ciclo(self)
+
+        self.clock_cycle += 1
+        if self.escritas_ciclo:
+            self.escritas_ciclo.clear()
+        ganchos = self._ganchos
+        ciclo = self.clock_cycle
+
+        mem_wb = self.mem_wb
+        retirada = mem_wb.valido
+        pc, info, valor = mem_wb.pc, mem_wb.info, mem_wb.resultado_final
+        self.estagio_wb()
+        if retirada:
+            if ganchos["escrita"] and info.op in OPS_ESCREVEM_RD and info.rd:
+                self._emitir(ganchos["escrita"], EventoEscrita(ciclo, pc, info, info.rd, valor))
+            if ganchos["retirada"]:
+                self._emitir(ganchos["retirada"], EventoRetirada(ciclo, pc, info))
+
+        self.estagio_mem()
+        ex_mem = self.ex_mem
+        if ganchos["memoria"] and mem_wb.valido and mem_wb.info.op in OPS_ACESSO_MEMORIA:
+            escrita = mem_wb.info.op in OPS_ESCREVEM_MEMORIA
+            valor = ex_mem.val_rs2 if escrita else mem_wb.resultado_final
+            self._emitir(ganchos["memoria"], EventoMemoria(ciclo, mem_wb.pc, mem_wb.info,
+                                                           ex_mem.resultado_ula, valor, escrita))
+
+        if self._mem_parado:
+            self._mem_parado = False
+            if self.enable_forwarding:
+                self.encaminhar_parado()
+        else:
+            self.estagio_ex()
+            if ganchos["execucao"] and ex_mem.valido:
+                self._emitir(ganchos["execucao"], EventoExecucao(ciclo, ex_mem.pc, ex_mem.info,
+                                                                 ex_mem.resultado_ula))
+            self.estagio_id()
+            id_ex = self.id_ex
+            if ganchos["decodificacao"] and id_ex.valido:
+                self._emitir(ganchos["decodificacao"], EventoDecodificacao(ciclo, id_ex.pc, id_ex.info,
+                                                                           id_ex.val_rs1, id_ex.val_rs2))
+            # IF parado (hazard ou flush) não busca nada
+            buscou = not self._parar_if
+            self.estagio_if()
+            if_id = self.if_id
+            if ganchos["busca"] and buscou and if_id.valido:
+                self._emitir(ganchos["busca"], EventoBusca(ciclo, if_id.pc, if_id.instrucao))
+
+        self.gerar_saida_ciclo()
+
+        if self.simulacao_terminou():
+            self.halted = True
+            print(f"\nSimulação concluída em {self.clock_cycle} ciclos.")
+            self.rastreador.registrar_fim(self)
+        if ganchos["fim_ciclo"]:
+            self._emitir(ganchos["fim_ciclo"], EventoFimCiclo(ciclo, self.pc, self.halted))
+
+    def _emitir(self, funcoes, evento):
+        for funcao in funcoes:
+            funcao(self, evento)
+
+    def step_back(self, n=1):
+        """Desfaz os últimos `n` ciclos. Retorna quantos ciclos foram desfeitos."""
+        if self.historico is None:
+            raise RuntimeError("Histórico desligado: crie o simulador com limite_desfazer > 0")
+        desfeitos = self.historico.voltar(self, n)
+        self.rastreador.descartar_apos(self.clock_cycle)
+        self.rastreador.forcar_snapshot()
+        return desfeitos
 
     def simulacao_terminou(self):
-        pipeline_vazia = (self.if_id['instrucao_bin'] == 'nop' and 
-                          self.id_ex['info']['nome'] == 'nop' and
-                          self.ex_mem['info']['nome'] == 'nop' and
-                          self.mem_wb['info']['nome'] == 'nop')
-        return pipeline_vazia
+        return not (self.if_id.valido or self.id_ex.valido or
+                    self.ex_mem.valido or self.mem_wb.valido)
 
     def estagio_if(self):
-        if self.pc < len(self.memoria_instrucoes) * 4:
-            indice_inst = self.pc // 4
-            instrucao_bin = self.memoria_instrucoes[indice_inst]
-            self.if_id = {'instrucao_bin': instrucao_bin, 'pc': self.pc}
-            self.pc += 4
+        if self._parar_if:
+            # Hazard em ID (IF/ID mantém a instrução) ou previsão errada (IF/ID já esvaziado):
+            # nada é buscado neste ciclo
+            self._parar_if = False
+            return
+        if_id = self.if_id
+        indice_inst = (self.pc - self.base_instrucoes) >> 2
+        if 0 <= indice_inst < len(self._memoria_instrucoes):
+            if_id.valido = True
+            if_id.instrucao = self._memoria_instrucoes[indice_inst]
+            if_id.pc = self.pc
+            if self.desvios is None:
+                self.pc += 4
+            else:
+                self.pc = self.desvios.prever(self.pc)
         else:
-            self.if_id = {'instrucao_bin': 'nop', 'pc': self.pc}
+            if_id.valido = False
+            if_id.instrucao = None
+            if_id.pc = self.pc
 
     def estagio_id(self):
-        instrucao_bin = self.if_id['instrucao_bin']
-        pc_atual = self.if_id['pc']
+        if_id = self.if_id
+        id_ex = self.id_ex
 
-        if instrucao_bin == 'nop':
-            self.id_ex = {'info': {'nome': 'nop'}, 'pc': 0, 'val_rs1': 0, 'val_rs2': 0}
+        if not if_id.valido:
+            id_ex.esvaziar()
             return
 
-        info = decodificar(instrucao_bin)
-        val_rs1 = self._registradores.read(info.get('rs1', 0))
-        val_rs2 = self._registradores.read(info.get('rs2', 0))
-        
-        self.id_ex = {'info': info, 'pc': pc_atual, 'val_rs1': val_rs1, 'val_rs2': val_rs2}
+        pc_atual = if_id.pc
+        indice = (pc_atual - self.base_instrucoes) >> 2
+        info = self.cache_decodificado[indice]
+        if info is None:
+            info = self.cache_decodificado[indice] = pre_decodificar(if_id.instrucao)
+
+        if self.enable_hazard_detection and self.detectar_hazard(info):
+            id_ex.esvaziar()
+            self._parar_if = True
+            self.bolhas_hazard += 1
+            if self.desempenho is not None:
+                self.desempenho.bolha(STALL, pc_atual)
+            return
 
-        nome_inst = info.get('nome')
-        if nome_inst in ['beq', 'bne', 'blt', 'bge', 'jal', 'jalr', 'j']:
-            tomou_desvio, novo_pc = self.calcular_desvio(nome_inst, pc_atual, val_rs1, val_rs2, info.get('imm', 0))
-            if tomou_desvio:
+        val_rs1 = self._registradores.read(info.rs1)
+        val_rs2 = self._registradores.read(info.rs2)
+        if self.enable_forwarding and info.op in OPS_DESVIO:
+            val_rs1, val_rs2 = self.encaminhar_desvio(info, val_rs1, val_rs2)
+
+        id_ex.valido = True
+        id_ex.info = info
+        id_ex.pc = pc_atual
+        id_ex.val_rs1 = val_rs1
+        id_ex.val_rs2 = val_rs2
+
+        if info.op in OPS_DESVIO:
+            tomou_desvio, novo_pc = self.calcular_desvio(info.op, pc_atual, val_rs1, val_rs2, info.imm)
+            if self.desvios is not None:
+                self.resolver_previsao(info, pc_atual, tomou_desvio, novo_pc)
+            elif tomou_desvio:
                 self.pc = novo_pc
-                self.if_id = {'instrucao_bin': 'nop', 'pc': 0}
-
-    def calcular_desvio(self, nome, pc_atual, val_rs1, val_rs2, imm):
-        tomou = False
-        if nome == 'beq' and val_rs1 == val_rs2: tomou = True
-        elif nome == 'bne' and val_rs1 != val_rs2: tomou = True
-        elif nome == 'blt' and self.alu.signed(val_rs1) < self.alu.signed(val_rs2): tomou = True
-        elif nome == 'bge' and self.alu.signed(val_rs1) >= self.alu.signed(val_rs2): tomou = True
-        elif nome in ['jal', 'j', 'jalr']: tomou = True
-        
+                if_id.esvaziar()
+        elif self.desvios is not None and self.pc != pc_atual + 4:
+            # A BTB desviou a busca em uma instrução que não é desvio (código alterado)
+            self.desvios.registrar_erro_btb()
+            self.descartar_busca(pc_atual + 4, pc_atual)
+
+    def resolver_previsao(self, info, pc_atual, tomou, novo_pc):
+        """
+        Compara o resultado do desvio com a previsão feita em IF. Neste ponto self.pc
+        é o endereço que IF escolheu para a instrução seguinte.
+        """
+        proximo = novo_pc if tomou else pc_atual + 4
+        acertou = self.pc == proximo
+        self.desvios.resolver(pc_atual, info.op not in OPS_SALTO, tomou, novo_pc, acertou)
+        if not acertou:
+            self.descartar_busca(proximo, pc_atual)
+
+    def descartar_busca(self, proximo, pc_desvio):
+        """Previsão errada: a busca do caminho errado vira bolha (flush) e IF recomeça em `proximo`."""
+        self.pc = proximo
+        self.if_id.esvaziar()
+        self._parar_if = True
+        if self.desempenho is not None:
+            self.desempenho.bolha(FLUSH, pc_desvio)
+
+    def estatisticas_desvios(self):
+        """Previsões, erros, ciclos de flush e acurácia por PC (None sem preditor)."""
+        return self.desvios.estatisticas() if self.desvios is not None else None
+
+    def detectar_hazard(self, info):
+        """
+        Verifica, em ID, se algum operando de `info` ainda não pode ser obtido.
+        Quando ID roda, ex_mem já contém a instrução que acabou de passar por EX e
+        mem_wb a que acabou de passar por MEM; as anteriores já estão no banco.
+        """
+        rs1 = info.rs1 if info.op in OPS_LEEM_RS1 else 0
+        rs2 = info.rs2 if info.op in OPS_LEEM_RS2 else 0
+        if not (rs1 or rs2):
+            return False
+        desvio = info.op in OPS_DESVIO
+
+        produtor = self.ex_mem.info
+        if (self.ex_mem.valido and produtor.op in OPS_ESCREVEM_RD and produtor.rd
+                and produtor.rd in (rs1, rs2)):
+            # Sem forwarding só o banco serve; desvios em ID não esperam o fim de EX;
+            # o dado do lw (e das atômicas) só existe depois de MEM (load-use)
+            if not self.enable_forwarding or desvio or produtor.op in OPS_CARGA:
+                return True
+
+        produtor = self.mem_wb.info
+        if (self.mem_wb.valido and produtor.op in OPS_ESCREVEM_RD and produtor.rd
+                and produtor.rd in (rs1, rs2)):
+            if not self.enable_forwarding or (desvio and produtor.op in OPS_CARGA):
+                return True
+        return False
+
+    def encaminhar_desvio(self, info, val_rs1, val_rs2):
+        """Forwarding para a comparação em ID: resultado da instrução em MEM (exceto lw)."""
+        mem_wb = self.mem_wb
+        produtor = mem_wb.info
+        if mem_wb.valido and produtor.op in OPS_ESCREVEM_RD and produtor.op not in OPS_CARGA and produtor.rd:
+            if produtor.rd == info.rs1 and info.op in OPS_LEEM_RS1:
+                val_rs1 = mem_wb.resultado_final
+                self.encaminhamentos += 1
+            if produtor.rd == info.rs2 and info.op in OPS_LEEM_RS2:
+                val_rs2 = mem_wb.resultado_final
+                self.encaminhamentos += 1
+        return val_rs1, val_rs2
+
+    def encaminhar_ex(self, info, val_rs1, val_rs2):
+        """
+        Forwarding para EX. Fonte EX/MEM: a instrução anterior, que acabou de passar
+        por MEM (mem_wb), exceto lw. Fonte MEM/WB: o valor escrito pelo WB neste ciclo,
+        que o ID desta instrução não chegou a ler do banco.
+        """
+        mem_wb = self.mem_wb
+        produtor = mem_wb.info
+        rd_anterior = 0
+        if mem_wb.valido and produtor.op in OPS_ESCREVEM_RD and produtor.op not in OPS_CARGA:
+            rd_anterior = produtor.rd
+        rd_wb, valor_wb = self._escrita_wb
+
+        rs1 = info.rs1 if info.op in OPS_LEEM_RS1 else 0
+        if rs1:
+            if rs1 == rd_anterior:
+                val_rs1 = mem_wb.resultado_final
+                self.encaminhamentos += 1
+            elif rs1 == rd_wb:
+                val_rs1 = valor_wb
+                self.encaminhamentos += 1
+        rs2 = info.rs2 if info.op in OPS_LEEM_RS2 else 0
+        if rs2:
+            if rs2 == rd_anterior:
+                val_rs2 = mem_wb.resultado_final
+                self.encaminhamentos += 1
+            elif rs2 == rd_wb:
+                val_rs2 = valor_wb
+                self.encaminhamentos += 1
+        return val_rs1, val_rs2
+
+    def encaminhar_parado(self):
+        """
+        Com MEM parado, o valor escrito pelo WB neste ciclo (fonte MEM/WB) não estará
+        mais disponível quando EX voltar a rodar: vai direto para o latch ID/EX.
+        """
+        rd_wb, valor_wb = self._escrita_wb
+        id_ex = self.id_ex
+        if not (rd_wb and id_ex.valido):
+            return
+        info = id_ex.info
+        if info.rs1 == rd_wb and info.op in OPS_LEEM_RS1:
+            id_ex.val_rs1 = valor_wb
+            self.encaminhamentos += 1
+        if info.rs2 == rd_wb and info.op in OPS_LEEM_RS2:
+            id_ex.val_rs2 = valor_wb
+            self.encaminhamentos += 1
+
+    def calcular_desvio(self, op, pc_atual, val_rs1, val_rs2, imm):
+        """Recebe o identificador da instrução (InstrucaoDecodificada.op)."""
+        if op in OPS_SALTO:
+            tomou = True
+        elif op == _BEQ:
+            tomou = val_rs1 == val_rs2
+        elif op == _BNE:
+            tomou = val_rs1 != val_rs2
+        elif op == _BLT:
+            tomou = self.alu.signed(val_rs1) < self.alu.signed(val_rs2)
+        elif op == _BGE:
+            tomou = self.alu.signed(val_rs1) >= self.alu.signed(val_rs2)
+        else:
+            tomou = False
+
         novo_pc = 0
         if tomou:
-            if nome in ['jal', 'j', 'beq', 'bne', 'blt', 'bge']:
-                novo_pc = pc_atual + imm
-            elif nome == 'jalr':
+            if op == _JALR:
                 novo_pc = (val_rs1 + imm) & ~1
-        
+            else:
+                novo_pc = pc_atual + imm
+
         return tomou, novo_pc
 
     def estagio_ex(self):
-        info = self.id_ex['info'].copy() 
-        nome = info.get('nome')
+        id_ex = self.id_ex
+        ex_mem = self.ex_mem
 
-        if nome == 'nop':
-            self.ex_mem = {'info': {'nome': 'nop'}, 'resultado_ula': 0, 'val_rs2': 0}
+        if not id_ex.valido:
+            ex_mem.esvaziar()
             return
 
-        operando_a = self.id_ex['val_rs1']
-        operando_b = self.id_ex['val_rs2']
-        if info['tipo'] in ['I', 'S', 'B', 'J', 'U']:
-            operando_b = info.get('imm', 0)
-
-        if nome in ['add', 'addi', 'lw', 'sw']:
-            resultado_ula = self.alu.operate('add', operando_a, operando_b)
-        elif nome in ['sub', 'beq', 'bne', 'blt', 'bge']:
-            resultado_ula = self.alu.operate('sub', operando_a, operando_b)
-        elif nome in ['jal', 'jalr', 'j']:
-            resultado_ula = self.id_ex['pc'] + 4
+        info = id_ex.info
+        op = info.op
+        val_rs1 = id_ex.val_rs1
+        val_rs2 = id_ex.val_rs2
+        if self.enable_forwarding:
+            val_rs1, val_rs2 = self.encaminhar_ex(info, val_rs1, val_rs2)
+        operando_a = val_rs1
+        operando_b = info.imm if op in OPS_IMEDIATO else val_rs2
+
+        if op in OPS_SALTO:
+            resultado_ula = id_ex.pc + 4
+        elif op == _AUIPC:
+            resultado_ula = (id_ex.pc + operando_b) & 0xFFFFFFFF
+        elif op == _CSRR:
+            resultado_ula = self.ler_csr(operando_b)
         else:
-            resultado_ula = self.alu.operate(nome, operando_a, operando_b)
+            resultado_ula = self.alu.operacoes[op](operando_a, operando_b)
 
-        self.ex_mem = {
-            'info': info,
-            'resultado_ula': resultado_ula,
-            'val_rs2': self.id_ex['val_rs2']
-        }
+        ex_mem.valido = True
+        ex_mem.info = info
+        ex_mem.resultado_ula = resultado_ula
+        ex_mem.val_rs2 = val_rs2
+        ex_mem.pc = id_ex.pc
 
     def estagio_mem(self):
-        info = self.ex_mem['info'].copy()
-        nome = info.get('nome')
+        ex_mem = self.ex_mem
+        mem_wb = self.mem_wb
 
-        if nome == 'nop':
-            self.mem_wb = {'info': {'nome': 'nop'}, 'resultado_final': 0}
+        if not ex_mem.valido:
+            mem_wb.esvaziar()
             return
 
-        addr = self.ex_mem['resultado_ula']
-        resultado_final = self.ex_mem['resultado_ula']
+        info = ex_mem.info
+        addr = resultado_final = ex_mem.resultado_ula
 
-        if nome == 'lw':
+        if self.cache is not None and info.op in OPS_ACESSO_MEMORIA:
+            if not self._acesso_feito:
+                self._espera_mem = self.cache.acessar(addr, info.op in OPS_ESCREVEM_MEMORIA)
+                self._acesso_feito = True
+            if self._espera_mem:
+                # Falta: a instrução fica em EX/MEM e MEM entrega uma bolha ao WB
+                self._espera_mem -= 1
+                self.ciclos_espera_memoria += 1
+                self._mem_parado = True
+                mem_wb.esvaziar()
+                if self.desempenho is not None:
+                    self.desempenho.bolha(STALL_MEMORIA, ex_mem.pc)
+                return
+            self._acesso_feito = False
+
+        if info.op == _LW:
             resultado_final = self.memoria.ler_word(addr)
-        elif nome == 'sw':
-            valor_a_escrever = self.ex_mem['val_rs2']
+        elif info.op == _SW:
+            valor_a_escrever = ex_mem.val_rs2
             self.memoria.escrever_word(addr, valor_a_escrever)
             self.dados_na_memoria[addr] = valor_a_escrever
-            
-        self.mem_wb = {'info': info, 'resultado_final': resultado_final}
+            self.escritas_ciclo.append((addr, valor_a_escrever))
+        elif info.op in OPS_ATOMICAS:
+            resultado_final = self.acesso_atomico(info.op, addr, ex_mem.val_rs2)
+
+        mem_wb.valido = True
+        mem_wb.info = info
+        mem_wb.resultado_final = resultado_final
+        mem_wb.pc = ex_mem.pc
+
+    def acesso_atomico(self, op, addr, valor):
+        """lr.w, sc.w e amoadd.w em MEM; retorna o valor de rd (sc.w: 0 se escreveu, 1 se falhou)."""
+        if addr & 3:
+            raise ValueError(f"Endereço desalinhado em {NOMES_INSTRUCOES[op]}: {addr:#x}")
+        if op == _LR:
+            return self.memoria.reservar(self.hart_id, addr)
+        if op == _SC:
+            if not self.memoria.condicional(self.hart_id, addr, valor):
+                return 1
+            resultado, escrito = 0, valor
+        else:
+            resultado = self.memoria.somar_atomico(addr, valor)
+            escrito = (resultado + valor) & 0xFFFFFFFF
+        self.dados_na_memoria[addr] = escrito
+        self.escritas_ciclo.append((addr, escrito))
+        return resultado
+
+    def ler_csr(self, numero):
+        if numero == _MHARTID:
+            return self.hart_id
+        raise ValueError(f"CSR não suportado: {numero:#x}")
 
     def estagio_wb(self):
-        info = self.mem_wb['info']
-        nome = info.get('nome')
+        mem_wb = self.mem_wb
+        if mem_wb.valido and mem_wb.info.op in OPS_ESCREVEM_RD:
+            self._registradores.write(mem_wb.info.rd, mem_wb.resultado_final)
+            self._escrita_wb = (mem_wb.info.rd, mem_wb.resultado_final)
+        else:
+            self._escrita_wb = _SEM_ESCRITA
+        if self.desempenho is not None and mem_wb.valido:
+            self.desempenho.retirar(mem_wb.pc, mem_wb.info.op)
+
+    def estatisticas_cache(self):
+        """Acessos, acertos, faltas, despejos e ciclos de espera da cache (None sem cache)."""
+        if self.cache is None:
+            return None
+        return {**self.cache.estatisticas(), "ciclos_espera": self.ciclos_espera_memoria}
+
+    def estatisticas_desempenho(self):
+        """Ciclos, instruções retiradas, CPI, bolhas por causa, mix e contagens por PC/linha (None se desligados)."""
+        if self.desempenho is None:
+            return None
+        return self.desempenho.estatisticas(self.clock_cycle, self.linhas_fonte, self.texto_fonte,
+                                            self.base_instrucoes)
 
-        if nome != 'nop' and 'rd' in info:
-            if info.get('tipo') not in ['S', 'B']:
-                self._registradores.write(info['rd'], self.mem_wb['resultado_final'])
+    def exportar_desempenho(self, caminho):
+        """Grava `estatisticas_desempenho()` em JSON."""
+        exportar_json(self.estatisticas_desempenho(), caminho)
+
+    def zerar_desempenho(self):
+        """Recomeça a contagem no ciclo atual (por exemplo, depois de um aquecimento)."""
+        if self.desempenho is not None:
+            self.desempenho = ContadoresDesempenho(self.clock_cycle)
 
     def gerar_saida_ciclo(self):
-        with open("saida.out", "a") as f:
-            f.write(f"--- Ciclo {self.clock_cycle} ---\n")
-            f.write(f"PC: 0x{self.pc:08x}\n\n")
-            f.write("Estágios do Pipeline:\n")
-            f.write(f"  IF/ID : {self.if_id['instrucao_bin']} (PC=0x{self.if_id['pc']:04x})\n")
-            f.write(f"  ID/EX : {self.id_ex['info'].get('nome', 'nop')}\n")
-            f.write(f"  EX/MEM: {self.ex_mem['info'].get('nome', 'nop')}\n")
-            f.write(f"  MEM/WB: {self.mem_wb['info'].get('nome', 'nop')}\n\n")
-            
-            f.write("Registradores:\n")
-            todos_regs = self._registradores.get_all()
-            abi_map = {v: k for k, v in self._registradores.ABI.items()}
-            for i in range(32):
-                abi_name = abi_map.get(i, f'x{i}')
-                f.write(f"  x{i:<2} ({abi_name:<4}): 0x{todos_regs[i]:08x} ({todos_regs[i]})\n")
-
-            if self.dados_na_memoria:
-                f.write("\nMemória (posições escritas):\n")
-                for addr, val in sorted(self.dados_na_memoria.items()):
-                    f.write(f"  Endereço[0x{addr:04x}]: 0x{val:08x}\n")
-            
-            f.write("\n" + "="*50 + "\n\n")
+        self.rastreador.registrar_ciclo(self)
+
+    def fechar(self):
+        """Fecha o arquivo de saída (o conteúdo pendente no buffer é gravado)."""
+        self.rastreador.fechar()
 
     @property
     def registradores(self):
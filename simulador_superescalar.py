@@ -0,0 +1,407 @@
+"""
+Pipeline superescalar em ordem: os mesmos 5 estágios do SimuladorPipeline, com
+até `largura` instruções por estágio em cada ciclo.
+
+IF busca até `largura` instruções sequenciais por ciclo (com preditor, um desvio
+previsto como tomado encerra o pacote de busca) e ID emite, em ordem, as do
+início de IF/ID até a primeira que não pode seguir:
+    "dependencia"    lê o rd de uma instrução mais antiga do mesmo pacote;
+    "porta_memoria"  é o segundo lw/sw/atômica do pacote (uma porta de memória);
+    "desvio"         é o segundo desvio do pacote (uma unidade de desvio), ou o
+                     pacote terminou em um desvio tomado ou previsão errada;
+    "hazard"         um operando ainda não pode ser obtido das instruções em
+                     EX/MEM e MEM/WB (as mesmas regras de detectar_hazard).
+As que não foram emitidas ficam no início de IF/ID e IF completa o pacote.
+"busca" conta os ciclos em que IF/ID não tinha instruções suficientes e
+"memoria" os ciclos parados por falta na cache; ver `estatisticas_emissao()`.
+
+Uso:
+    sim = SimuladorSuperescalar(codigo, largura=2, enable_forwarding=True)
+    sim.executar(max_ciclos=100000)
+    sim.estatisticas_emissao()["ipc"]
+"""
+from componentes.isa import (OPS_ACESSO_MEMORIA, OPS_ATOMICAS, OPS_CARGA, OPS_DESVIO, OPS_ESCREVEM_MEMORIA,
+                            OPS_ESCREVEM_RD, OPS_IMEDIATO, OPS_LEEM_RS1, OPS_LEEM_RS2, OPS_SALTO,
+                            pre_decodificar)
+from componentes.latches import LatchIFID, LatchIDEX, LatchEXMEM, LatchMEMWB
+from simulador_pipeline import SimuladorPipeline, _AUIPC, _CSRR, _LW, _SW
+
+# Motivos pelos quais um ciclo emitiu menos que `largura` instruções
+LIMITES_EMISSAO = ("dependencia", "porta_memoria", "desvio", "hazard", "busca", "memoria")
+
+
+class SimuladorSuperescalar(SimuladorPipeline):
+    """
+    SimuladorPipeline que busca, decodifica e emite até `largura` instruções por
+    ciclo (largura=1 reproduz o pipeline escalar com detecção de hazards, ciclo a
+    ciclo). Cada estágio tem uma lista de `largura` latches (if_ids, id_exs,
+    ex_mems, mem_wbs), da instrução mais antiga para a mais nova; if_id, id_ex,
+    ex_mem e mem_wb são o primeiro de cada lista, como no pipeline escalar.
+
+    A detecção de hazards fica sempre ligada; com enable_forwarding, EX recebe o
+    resultado mais novo entre as instruções que acabaram de passar por MEM e as
+    escritas do WB no ciclo. Preditor, cache de dados e o log ciclo a ciclo
+    funcionam como no pipeline escalar; ganchos, step_back, checkpoints e os
+    contadores de desempenho supõem um latch por estágio e não estão disponíveis.
+    """
+
+    def __init__(self, codigo_assembly=None, largura=2, **opcoes):
+        if largura < 1:
+            raise ValueError("A largura de emissão deve ser pelo menos 1")
+        if opcoes.get("limite_desfazer") or opcoes.get("contadores_desempenho"):
+            raise ValueError("step_back e contadores de desempenho não estão disponíveis no modo superescalar")
+        self.largura = largura
+        opcoes["enable_hazard_detection"] = True
+        super().__init__(codigo_assembly, **opcoes)
+
+    def reset(self):
+        super().reset()
+        largura = self.largura
+        self.if_ids = [LatchIFID() for _ in range(largura)]
+        self.id_exs = [LatchIDEX() for _ in range(largura)]
+        self.ex_mems = [LatchEXMEM() for _ in range(largura)]
+        self.mem_wbs = [LatchMEMWB() for _ in range(largura)]
+        self.if_id, self.id_ex, self.ex_mem, self.mem_wb = (self.if_ids[0], self.id_exs[0],
+                                                            self.ex_mems[0], self.mem_wbs[0])
+        # (rd, valor) de cada escrita do WB no ciclo atual, da mais antiga para a mais nova
+        self._escritas_wb = []
+        self.instrucoes_emitidas = 0
+        self.instrucoes_retiradas = 0
+        # Ciclos em que foram emitidas 0, 1, ..., largura instruções
+        self.pacotes = [0] * (largura + 1)
+        self.limites_emissao = dict.fromkeys(LIMITES_EMISSAO, 0)
+
+    def _indisponivel(self, *args, **kwargs):
+        raise RuntimeError("Ganchos, step_back e checkpoints não estão disponíveis no modo superescalar")
+
+    registrar_gancho = step_back = _indisponivel
+    criar_checkpoint = restaurar_checkpoint = salvar_checkpoint = carregar_checkpoint = _indisponivel
+
+    def simulacao_terminou(self):
+        return not any(latch.valido for latches in (self.if_ids, self.id_exs, self.ex_mems, self.mem_wbs)
+                       for latch in latches)
+
+    def estagio_if(self):
+        if self._parar_if:
+            # Previsão errada: IF/ID já foi esvaziado e nada é buscado neste ciclo
+            self._parar_if = False
+            return
+        if_ids = self.if_ids
+        largura = self.largura
+        # IF/ID fica compactado: as instruções não emitidas ocupam o início
+        n = 0
+        while n < largura and if_ids[n].valido:
+            n += 1
+        pc = self.pc
+        instrucoes = self._memoria_instrucoes
+        base = self.base_instrucoes
+        desvios = self.desvios
+        while n < largura:
+            if_id = if_ids[n]
+            indice = (pc - base) >> 2
+            if not 0 <= indice < len(instrucoes):
+                if_id.pc = pc
+                break
+            if_id.valido = True
+            if_id.instrucao = instrucoes[indice]
+            if_id.pc = pc
+            n += 1
+            if desvios is None:
+                pc += 4
+            else:
+                pc = desvios.prever(if_id.pc)
+                if pc != if_id.pc + 4:
+                    # Desvio previsto como tomado: o alvo é buscado no próximo ciclo
+                    break
+        self.pc = pc
+
+    def estagio_id(self):
+        if_ids = self.if_ids
+        id_exs = self.id_exs
+        largura = self.largura
+        emitidas = consumidas = 0
+        motivo = "busca"
+        destinos = set()    # rd das instruções já emitidas neste ciclo
+        usou_memoria = usou_desvio = False
+
+        while consumidas < largura:
+            if_id = if_ids[consumidas]
+            if not if_id.valido:
+                break
+            pc_atual = if_id.pc
+            indice = (pc_atual - self.base_instrucoes) >> 2
+            info = self.cache_decodificado[indice]
+            if info is None:
+                info = self.cache_decodificado[indice] = pre_decodificar(if_id.instrucao)
+            op = info.op
+            memoria = op in OPS_ACESSO_MEMORIA
+            desvio = op in OPS_DESVIO
+
+            if memoria and usou_memoria:
+                motivo = "porta_memoria"
+                break
+            if desvio and usou_desvio:
+                motivo = "desvio"
+                break
+            if destinos and ((op in OPS_LEEM_RS1 and info.rs1 in destinos)
+                             or (op in OPS_LEEM_RS2 and info.rs2 in destinos)):
+                motivo = "dependencia"
+                break
+            if self.detectar_hazard(info):
+                motivo = "hazard"
+                break
+
+            val_rs1 = self._registradores.read(info.rs1)
+            val_rs2 = self._registradores.read(info.rs2)
+            if self.enable_forwarding and desvio:
+                val_rs1, val_rs2 = self.encaminhar_desvio(info, val_rs1, val_rs2)
+
+            id_ex = id_exs[emitidas]
+            id_ex.valido = True
+            id_ex.info = info
+            id_ex.pc = pc_atual
+            id_ex.val_rs1 = val_rs1
+            id_ex.val_rs2 = val_rs2
+            emitidas += 1
+            consumidas += 1
+            usou_memoria = usou_memoria or memoria
+            if op in OPS_ESCREVEM_RD and info.rd:
+                destinos.add(info.rd)
+
+            # Endereço que IF buscou depois desta instrução
+            if consumidas < largura and if_ids[consumidas].valido:
+                previsto = if_ids[consumidas].pc
+            else:
+                previsto = self.pc
+            if desvio:
+                usou_desvio = True
+                tomou, novo_pc = self.calcular_desvio(op, pc_atual, val_rs1, val_rs2, info.imm)
+                proximo = novo_pc if tomou else pc_atual + 4
+                if self.desvios is not None:
+                    acertou = previsto == proximo
+                    self.desvios.resolver(pc_atual, op not in OPS_SALTO, tomou, novo_pc, acertou)
+                    if not acertou:
+                        self.descartar_busca(proximo, pc_atual)
+                        motivo = "desvio"
+                        consumidas = largura
+                        break
+                elif tomou:
+                    # Sem preditor, as instruções buscadas depois do desvio são descartadas sem custo
+                    self.pc = novo_pc
+                    motivo = "desvio"
+                    consumidas = largura
+                    break
+            elif self.desvios is not None and previsto != pc_atual + 4:
+                self.desvios.registrar_erro_btb()
+                self.descartar_busca(pc_atual + 4, pc_atual)
+                motivo = "desvio"
+                consumidas = largura
+                break
+
+        for id_ex in id_exs[emitidas:]:
+            id_ex.esvaziar()
+        if consumidas:
+            for if_id in if_ids[:consumidas]:
+                if_id.esvaziar()
+            if consumidas < largura:
+                self.if_ids = if_ids[consumidas:] + if_ids[:consumidas]
+                self.if_id = self.if_ids[0]
+
+        self.instrucoes_emitidas += emitidas
+        self.pacotes[emitidas] += 1
+        if emitidas < largura:
+            self.limites_emissao[motivo] += 1
+            if not emitidas and motivo == "hazard":
+                self.bolhas_hazard += 1
+
+    def descartar_busca(self, proximo, pc_desvio):
+        # As instruções mais novas de IF/ID são esvaziadas por estagio_id
+        self.pc = proximo
+        self._parar_if = True
+
+    def detectar_hazard(self, info):
+        """detectar_hazard do pipeline escalar, contra todas as instruções de EX/MEM e MEM/WB."""
+        rs1 = info.rs1 if info.op in OPS_LEEM_RS1 else 0
+        rs2 = info.rs2 if info.op in OPS_LEEM_RS2 else 0
+        if not (rs1 or rs2):
+            return False
+        desvio = info.op in OPS_DESVIO
+        forwarding = self.enable_forwarding
+
+        for ex_mem in self.ex_mems:
+            produtor = ex_mem.info
+            if (ex_mem.valido and produtor.op in OPS_ESCREVEM_RD and produtor.rd
+                    and produtor.rd in (rs1, rs2)):
+                if not forwarding or desvio or produtor.op in OPS_CARGA:
+                    return True
+        for mem_wb in self.mem_wbs:
+            produtor = mem_wb.info
+            if (mem_wb.valido and produtor.op in OPS_ESCREVEM_RD and produtor.rd
+                    and produtor.rd in (rs1, rs2)):
+                if not forwarding or (desvio and produtor.op in OPS_CARGA):
+                    return True
+        return False
+
+    def _ultimo_resultado(self, reg):
+        """Resultado da instrução mais nova de MEM/WB que escreve `reg` (None se for lw ou não houver)."""
+        for mem_wb in reversed(self.mem_wbs):
+            produtor = mem_wb.info
+            if mem_wb.valido and produtor.op in OPS_ESCREVEM_RD and produtor.rd == reg:
+                return None if produtor.op in OPS_CARGA else mem_wb.resultado_final
+        return None
+
+    def _ultima_escrita_wb(self, reg):
+        for rd, valor in reversed(self._escritas_wb):
+            if rd == reg:
+                return valor
+        return None
+
+    def encaminhar_desvio(self, info, val_rs1, val_rs2):
+        if info.rs1 and info.op in OPS_LEEM_RS1:
+            valor = self._ultimo_resultado(info.rs1)
+            if valor is not None:
+                val_rs1 = valor
+                self.encaminhamentos += 1
+        if info.rs2 and info.op in OPS_LEEM_RS2:
+            valor = self._ultimo_resultado(info.rs2)
+            if valor is not None:
+                val_rs2 = valor
+                self.encaminhamentos += 1
+        return val_rs1, val_rs2
+
+    def encaminhar_ex(self, info, val_rs1, val_rs2):
+        if info.rs1 and info.op in OPS_LEEM_RS1:
+            valor = self._ultimo_resultado(info.rs1)
+            if valor is None:
+                valor = self._ultima_escrita_wb(info.rs1)
+            if valor is not None:
+                val_rs1 = valor
+                self.encaminhamentos += 1
+        if info.rs2 and info.op in OPS_LEEM_RS2:
+            valor = self._ultimo_resultado(info.rs2)
+            if valor is None:
+                valor = self._ultima_escrita_wb(info.rs2)
+            if valor is not None:
+                val_rs2 = valor
+                self.encaminhamentos += 1
+        return val_rs1, val_rs2
+
+    def encaminhar_parado(self):
+        for id_ex in self.id_exs:
+            if not id_ex.valido:
+                continue
+            info = id_ex.info
+            if info.rs1 and info.op in OPS_LEEM_RS1:
+                valor = self._ultima_escrita_wb(info.rs1)
+                if valor is not None:
+                    id_ex.val_rs1 = valor
+                    self.encaminhamentos += 1
+            if info.rs2 and info.op in OPS_LEEM_RS2:
+                valor = self._ultima_escrita_wb(info.rs2)
+                if valor is not None:
+                    id_ex.val_rs2 = valor
+                    self.encaminhamentos += 1
+
+    def estagio_ex(self):
+        for id_ex, ex_mem in zip(self.id_exs, self.ex_mems):
+            if not id_ex.valido:
+                ex_mem.esvaziar()
+                continue
+
+            info = id_ex.info
+            op = info.op
+            val_rs1 = id_ex.val_rs1
+            val_rs2 = id_ex.val_rs2
+            if self.enable_forwarding:
+                val_rs1, val_rs2 = self.encaminhar_ex(info, val_rs1, val_rs2)
+            operando_b = info.imm if op in OPS_IMEDIATO else val_rs2
+
+            if op in OPS_SALTO:
+                resultado_ula = id_ex.pc + 4
+            elif op == _AUIPC:
+                resultado_ula = (id_ex.pc + operando_b) & 0xFFFFFFFF
+            elif op == _CSRR:
+                resultado_ula = self.ler_csr(operando_b)
+            else:
+                resultado_ula = self.alu.operacoes[op](val_rs1, operando_b)
+
+            ex_mem.valido = True
+            ex_mem.info = info
+            ex_mem.resultado_ula = resultado_ula
+            ex_mem.val_rs2 = val_rs2
+            ex_mem.pc = id_ex.pc
+
+    def estagio_mem(self):
+        ex_mems = self.ex_mems
+        mem_wbs = self.mem_wbs
+
+        if self.cache is not None:
+            # ID emite no máximo um acesso à memória por ciclo
+            for ex_mem in ex_mems:
+                if ex_mem.valido and ex_mem.info.op in OPS_ACESSO_MEMORIA:
+                    if not self._acesso_feito:
+                        self._espera_mem = self.cache.acessar(ex_mem.resultado_ula,
+                                                              ex_mem.info.op in OPS_ESCREVEM_MEMORIA)
+                        self._acesso_feito = True
+                    if self._espera_mem:
+                        # Falta: o pacote inteiro fica em EX/MEM e nada é emitido neste ciclo
+                        self._espera_mem -= 1
+                        self.ciclos_espera_memoria += 1
+                        self._mem_parado = True
+                        for mem_wb in mem_wbs:
+                            mem_wb.esvaziar()
+                        self.pacotes[0] += 1
+                        self.limites_emissao["memoria"] += 1
+                        return
+                    self._acesso_feito = False
+                    break
+
+        for ex_mem, mem_wb in zip(ex_mems, mem_wbs):
+            if not ex_mem.valido:
+                mem_wb.esvaziar()
+                continue
+
+            info = ex_mem.info
+            addr = resultado_final = ex_mem.resultado_ula
+            if info.op == _LW:
+                resultado_final = self.memoria.ler_word(addr)
+            elif info.op == _SW:
+                valor_a_escrever = ex_mem.val_rs2
+                self.memoria.escrever_word(addr, valor_a_escrever)
+                self.dados_na_memoria[addr] = valor_a_escrever
+                self.escritas_ciclo.append((addr, valor_a_escrever))
+            elif info.op in OPS_ATOMICAS:
+                resultado_final = self.acesso_atomico(info.op, addr, ex_mem.val_rs2)
+
+            mem_wb.valido = True
+            mem_wb.info = info
+            mem_wb.resultado_final = resultado_final
+            mem_wb.pc = ex_mem.pc
+
+    def estagio_wb(self):
+        escritas = self._escritas_wb
+        escritas.clear()
+        for mem_wb in self.mem_wbs:
+            if mem_wb.valido:
+                self.instrucoes_retiradas += 1
+                if mem_wb.info.op in OPS_ESCREVEM_RD:
+                    self._registradores.write(mem_wb.info.rd, mem_wb.resultado_final)
+                    escritas.append((mem_wb.info.rd, mem_wb.resultado_final))
+
+    def estatisticas_emissao(self):
+        """
+        IPC (instruções retiradas por ciclo), uso dos slots de emissão (instruções
+        emitidas / (largura * ciclos)), ciclos por número de instruções emitidas e
+        ciclos com slots vazios por motivo (LIMITES_EMISSAO).
+        """
+        ciclos = self.clock_cycle
+        return {
+            "largura": self.largura,
+            "ciclos": ciclos,
+            "instrucoes_emitidas": self.instrucoes_emitidas,
+            "instrucoes_retiradas": self.instrucoes_retiradas,
+            "ipc": self.instrucoes_retiradas / ciclos if ciclos else 0.0,
+            "uso_slots": self.instrucoes_emitidas / (self.largura * ciclos) if ciclos else 0.0,
+            "pacotes": dict(enumerate(self.pacotes)),
+            "limites": dict(self.limites_emissao),
+        }
@@ -0,0 +1,296 @@
+"""
+Simulador funcional vetorizado: executa o mesmo programa sobre N conjuntos de
+entrada ao mesmo tempo (varredura de parâmetros, vetores de teste).
+
+Cada registrador arquitetural é um array uint32 de tamanho N e a memória é uma
+matriz N x tamanho (bytes), de forma que cada instrução vira uma operação de
+array sobre todas as instâncias. Desvios divergentes são tratados reagrupando
+as instâncias pelo PC: a cada passo executa-se a instrução do menor PC ativo,
+apenas nas instâncias que estão nele, o que faz os grupos reconvergirem.
+
+Cada instância é um único hart (mhartid = 0) com a própria reserva do lr.w.
+
+Requer NumPy (dependência opcional, usada apenas por este módulo).
+"""
+import numpy as np
+
+from componentes.isa import CSRS, pre_decodificar
+import cache_montagem
+
+MASK32 = 0xFFFFFFFF
+
+
+class SimuladorVetorial:
+    def __init__(self, codigo_assembly=None, num_instancias=1, tamanho_memoria=4096):
+        self.num_instancias = num_instancias
+        self.tamanho_memoria = tamanho_memoria
+        self.reset()
+
+        if codigo_assembly:
+            self.carregar_codigo_assembly(codigo_assembly)
+
+    def reset(self):
+        n = self.num_instancias
+        self.regs = np.zeros((32, n), dtype=np.uint32)
+        self.memoria = np.zeros((n, self.tamanho_memoria), dtype=np.uint8)
+        self.pc = np.zeros(n, dtype=np.int64)
+        self.ativas = np.ones(n, dtype=bool)
+        # Endereço reservado pelo lr.w em cada instância (-1 sem reserva)
+        self.reservas = np.full(n, -1, dtype=np.int64)
+        self.instrucoes_retiradas = np.zeros(n, dtype=np.int64)
+        # Mensagem de erro por instância (ex.: endereço inválido); a instância é encerrada
+        self.erros = [None] * n
+        self.passos = 0
+        self.memoria_instrucoes = []
+
+    def carregar_codigo_assembly(self, codigo_assembly):
+        self.reset()
+        montagem = cache_montagem.montar(codigo_assembly.strip())
+        self._memoria_instrucoes = montagem.palavras
+        self.cache_decodificado = list(montagem.decodificado)
+
+    @property
+    def memoria_instrucoes(self):
+        return self._memoria_instrucoes
+
+    @memoria_instrucoes.setter
+    def memoria_instrucoes(self, instrucoes):
+        self._memoria_instrucoes = instrucoes
+        self.cache_decodificado = [pre_decodificar(inst) for inst in instrucoes]
+
+    # --- Entradas e saídas por instância ---
+
+    def definir_registrador(self, num_reg, valores):
+        """Define o registrador `num_reg` de cada instância (escalar ou array de tamanho N)."""
+        if num_reg != 0:
+            self.regs[num_reg] = np.asarray(valores, dtype=np.int64) & MASK32
+
+    def escrever_word(self, endereco, valores):
+        """Escreve uma palavra no mesmo endereço de todas as instâncias (valores por instância)."""
+        valores = np.broadcast_to(np.asarray(valores, dtype=np.int64) & MASK32, (self.num_instancias,))
+        self._escrever_words(slice(None), np.full(self.num_instancias, endereco), valores.astype(np.uint32))
+
+    def ler_word(self, endereco):
+        """Lê a palavra em `endereco` de todas as instâncias."""
+        return self._ler_words(slice(None), np.full(self.num_instancias, endereco))
+
+    @property
+    def registradores(self):
+        """Registradores no mesmo formato dos outros simuladores, com um array por registrador."""
+        return {f"x{i}": self.regs[i] for i in range(32)}
+
+    @property
+    def halted(self):
+        return not self.ativas.any()
+
+    def executar(self, max_ciclos=1000):
+        """Executa até todas as instâncias terminarem ou até `max_ciclos` instruções por instância."""
+        tabela = self.cache_decodificado
+        fim = len(tabela) * 4
+        while True:
+            # Instâncias com PC fora do programa terminaram normalmente
+            self.ativas &= (self.pc >= 0) & (self.pc < fim)
+            if not self.ativas.any():
+                break
+            if self.instrucoes_retiradas[self.ativas].max() >= max_ciclos:
+                print(f"Alerta: Limite de ciclos ({max_ciclos}) atingido.")
+                break
+            self.step()
+
+    def step(self):
+        """Executa uma instrução para o grupo de instâncias no menor PC ativo."""
+        ativas = self.ativas
+        if not ativas.any():
+            return
+        pcs = self.pc
+        pc = int(pcs[ativas].min())
+        grupo = ativas & (pcs == pc)
+        # Caso comum (sem divergência): operações sobre o array inteiro, sem indexação
+        idx = slice(None) if grupo.all() else np.flatnonzero(grupo)
+
+        inst = self.cache_decodificado[pc >> 2]
+        self._executar_instrucao(inst, pc, idx)
+        # Instâncias encerradas por erro não contam a instrução como retirada
+        self.instrucoes_retiradas[idx] += self.ativas[idx]
+        self.passos += 1
+
+    def _executar_instrucao(self, inst, pc, idx):
+        regs = self.regs
+        nome = inst.nome
+        a = regs[inst.rs1][idx]
+        b = regs[inst.rs2][idx]
+        resultado = None
+        proximo = pc + 4
+
+        if nome == "addi":
+            resultado = a + np.uint32(inst.imm & MASK32)
+        elif nome == "add":
+            resultado = a + b
+        elif nome == "sub":
+            resultado = a - b
+        elif nome == "mul":
+            resultado = a * b
+        elif nome in ("mulh", "mulhsu", "mulhu"):
+            # Produto completo em 64 bits (cabe com ou sem sinal); a metade alta é o resultado
+            if nome == "mulhu":
+                x, y = a.astype(np.uint64), b.astype(np.uint64)
+            else:
+                x = a.view(np.int32).astype(np.int64)
+                y = b.view(np.int32).astype(np.int64) if nome == "mulh" else b.astype(np.int64)
+            resultado = ((x * y) >> 32).astype(np.uint32)
+        elif nome in ("div", "rem"):
+            # Como no ALU32Bit: truncamento em direção a zero, sem exceção na divisão por zero
+            x = a.view(np.int32).astype(np.int64)
+            y = b.view(np.int32).astype(np.int64)
+            zero = y == 0
+            y = np.where(zero, 1, y)
+            q = np.abs(x) // np.abs(y)
+            q = np.where((x < 0) != (y < 0), -q, q)
+            if nome == "div":
+                resultado = np.where(zero, MASK32, q & MASK32).astype(np.uint32)
+            else:
+                resultado = np.where(zero, x, x - q * y).astype(np.uint32)
+        elif nome in ("divu", "remu"):
+            zero = b == 0
+            divisor = np.where(zero, np.uint32(1), b)
+            if nome == "divu":
+                resultado = np.where(zero, np.uint32(MASK32), a // divisor)
+            else:
+                resultado = np.where(zero, a, a % divisor)
+        elif nome == "xor":
+            resultado = a ^ b
+        elif nome == "and":
+            resultado = a & b
+        elif nome == "or":
+            resultado = a | b
+        elif nome == "sll":
+            resultado = a << (b & np.uint32(31))
+        elif nome == "srl":
+            resultado = a >> (b & np.uint32(31))
+        elif nome == "sra":
+            resultado = (a.view(np.int32) >> (b & np.uint32(31)).astype(np.int32)).view(np.uint32)
+        elif nome == "slt":
+            resultado = (a.view(np.int32) < b.view(np.int32)).astype(np.uint32)
+        elif nome == "sltu":
+            resultado = (a < b).astype(np.uint32)
+        elif nome == "slti":
+            resultado = (a.view(np.int32) < np.int32(inst.imm)).astype(np.uint32)
+        elif nome == "sltiu":
+            resultado = (a < np.uint32(inst.imm & MASK32)).astype(np.uint32)
+        elif nome == "xori":
+            resultado = a ^ np.uint32(inst.imm & MASK32)
+        elif nome == "ori":
+            resultado = a | np.uint32(inst.imm & MASK32)
+        elif nome == "andi":
+            resultado = a & np.uint32(inst.imm & MASK32)
+        elif nome == "slli":
+            resultado = a << np.uint32(inst.imm & 31)
+        elif nome == "srli":
+            resultado = a >> np.uint32(inst.imm & 31)
+        elif nome == "srai":
+            resultado = (a.view(np.int32) >> np.int32(inst.imm & 31)).view(np.uint32)
+        elif nome == "lui":
+            resultado = np.uint32(inst.imm & MASK32)
+        elif nome == "auipc":
+            resultado = np.uint32((pc + inst.imm) & MASK32)
+        elif nome == "lw":
+            enderecos = (a.astype(np.int64) + inst.imm) & MASK32
+            resultado = self._ler_words(idx, enderecos)
+        elif nome == "sw":
+            enderecos = (a.astype(np.int64) + inst.imm) & MASK32
+            self._escrever_words(idx, enderecos, b)
+        elif nome in ("lr.w", "sc.w", "amoadd.w"):
+            enderecos = self._verificar_alinhamento(idx, a.astype(np.int64))
+            linhas = np.arange(self.num_instancias)[idx]
+            if nome == "lr.w":
+                resultado = self._ler_words(idx, enderecos)
+                self.reservas[linhas] = enderecos
+            elif nome == "sc.w":
+                escreve = self.reservas[linhas] == enderecos
+                self.reservas[linhas] = -1
+                self._escrever_words(idx, enderecos, np.where(escreve, b, self._ler_words(idx, enderecos)))
+                resultado = np.where(escreve, np.uint32(0), np.uint32(1))
+            else:
+                resultado = self._ler_words(idx, enderecos)
+                self._escrever_words(idx, enderecos, resultado + b)
+        elif nome == "csrr":
+            if inst.imm != CSRS["mhartid"]:
+                self._encerrar_com_erro(idx, None, f"ValueError: CSR não suportado: {inst.imm:#x}")
+            resultado = np.uint32(0)
+        elif nome in ("beq", "bne", "blt", "bge"):
+            if nome == "beq":
+                tomado = a == b
+            elif nome == "bne":
+                tomado = a != b
+            elif nome == "blt":
+                tomado = a.view(np.int32) < b.view(np.int32)
+            else:
+                tomado = a.view(np.int32) >= b.view(np.int32)
+            self.pc[idx] = np.where(tomado, (pc + inst.imm) & MASK32, proximo)
+            return
+        elif nome in ("jal", "j"):
+            resultado = np.uint32(proximo)
+            proximo = (pc + inst.imm) & MASK32
+        elif nome == "jalr":
+            alvo = ((a.astype(np.int64) + inst.imm) & ~1) & MASK32
+            if inst.rd:
+                regs[inst.rd][idx] = proximo
+            self.pc[idx] = alvo
+            return
+        else:
+            self._encerrar_com_erro(idx, None, f"ValueError: Unsupported operation: {nome}")
+
+        validas = self.ativas[idx]
+        if not validas.all():
+            # Instâncias encerradas por erro nesta instrução não alteram o estado
+            idx = np.arange(self.num_instancias)[idx][validas]
+            if np.ndim(resultado):
+                resultado = resultado[validas]
+        if resultado is not None and inst.rd:
+            regs[inst.rd][idx] = resultado
+        self.pc[idx] = proximo
+
+    def _encerrar_com_erro(self, idx, mascara, mensagem):
+        """Encerra as instâncias de `idx` selecionadas por `mascara` (todas se None)."""
+        instancias = np.arange(self.num_instancias)[idx]
+        if mascara is not None:
+            instancias = instancias[mascara]
+        for i in instancias:
+            self.erros[i] = mensagem
+        self.ativas[instancias] = False
+
+    def _verificar_enderecos(self, idx, enderecos):
+        fora = enderecos > self.tamanho_memoria - 4
+        if fora.any():
+            self._encerrar_com_erro(idx, fora, "ValueError: Endereço fora do limite da memória")
+            enderecos = np.where(fora, 0, enderecos)
+        return enderecos
+
+    def _verificar_alinhamento(self, idx, enderecos):
+        desalinhados = (enderecos & 3) != 0
+        if desalinhados.any():
+            self._encerrar_com_erro(idx, desalinhados, "ValueError: Endereço desalinhado em atômica")
+            enderecos = np.where(desalinhados, 0, enderecos)
+        return enderecos
+
+    def _ler_words(self, idx, enderecos):
+        linhas = np.arange(self.num_instancias)[idx]
+        enderecos = self._verificar_enderecos(idx, enderecos)
+        mem = self.memoria
+        return (mem[linhas, enderecos].astype(np.uint32)
+                | (mem[linhas, enderecos + 1].astype(np.uint32) << 8)
+                | (mem[linhas, enderecos + 2].astype(np.uint32) << 16)
+                | (mem[linhas, enderecos + 3].astype(np.uint32) << 24))
+
+    def _escrever_words(self, idx, enderecos, valores):
+        linhas = np.arange(self.num_instancias)[idx]
+        enderecos = self._verificar_enderecos(idx, enderecos)
+        # Instâncias encerradas por endereço inválido não escrevem
+        validas = self.ativas[linhas]
+        linhas, enderecos, valores = linhas[validas], enderecos[validas], valores[validas]
+        mem = self.memoria
+        for k in range(4):
+            mem[linhas, enderecos + k] = (valores >> np.uint32(8 * k)) & np.uint32(0xFF)
+        # Uma escrita que alcança a palavra reservada desfaz a reserva
+        reservas = self.reservas[linhas]
+        self.reservas[linhas] = np.where((reservas >= 0) & (np.abs(reservas - enderecos) < 4), -1, reservas)
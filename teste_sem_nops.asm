@@ -0,0 +1,21 @@
+# Mesmo programa de teste.asm, sem os nops de espera.
+# Execute com forwarding e detecção de hazards ligados
+# (SimuladorPipeline(..., enable_forwarding=True, enable_hazard_detection=True)).
+
+# --- Inicialização ---
+    addi t0, zero, 15     # Define t0 (x5) = 15
+    addi t1, zero, 10     # Define t1 (x6) = 10
+    addi t2, zero, 7      # Define t2 (x7) = 7
+    addi s0, zero, 200    # Define s0 (x8) = 200 (endereço de memória)
+
+# --- Cálculo ---
+    add  t3, t0, t1      # t3 = t0 + t1 (15 + 10 = 25): t0 e t1 vêm por forwarding
+    sub  t4, t3, t2      # t4 = t3 - t2 (25 - 7 = 18): t3 vem por forwarding de EX/MEM
+
+# --- Acesso à Memória ---
+    sw   t4, 0(s0)       # Salva 18 no endereço 200
+    lw   t5, 0(s0)       # Carrega o valor de volta em t5
+    add  t6, t5, t5      # Load-use: a unidade de hazards insere uma bolha (t6 = 36)
+
+# --- Fim ---
+fim:
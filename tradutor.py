@@ -0,0 +1,230 @@
+import time
+from componentes.alu import TABELA_OPERACOES
+from componentes.isa import OP_ID, pre_decodificar
+
+# Instruções que encerram um bloco básico
+TERMINADORES = ("beq", "bne", "blt", "bge", "jal", "jalr", "j")
+
+# Instruções que o tradutor sabe gerar; qualquer outra encerra o bloco antes dela
+_TRADUZIVEIS = (
+    "add", "sub", "mul", "div", "rem", "xor", "and", "or", "sll", "srl",
+    "sra", "slt", "sltu", "mulh", "mulhsu", "mulhu", "divu", "remu",
+    "addi", "slti", "sltiu", "xori", "ori", "andi", "slli", "srli", "srai", "lui", "auipc",
+    "lw", "sw",
+) + TERMINADORES
+
+# Geradas como chamada à ULA (regras de sinal e de divisão por zero da especificação)
+_VIA_ULA = ("mulh", "mulhsu", "mulhu", "div", "divu", "rem", "remu")
+# Funções dessas operações (de TABELA_OPERACOES), visíveis como globais nos blocos gerados
+_FUNCOES_ULA = {f"ula_{nome}": TABELA_OPERACOES[OP_ID[nome]] for nome in _VIA_ULA}
+
+MASK32 = 0xFFFFFFFF
+
+
+class BlocoTraduzido:
+    __slots__ = ("funcao", "inicio", "fim", "num_instrucoes", "fonte")
+
+    def __init__(self, funcao, inicio, fim, num_instrucoes, fonte):
+        self.funcao = funcao
+        self.inicio = inicio
+        self.fim = fim
+        self.num_instrucoes = num_instrucoes
+        self.fonte = fonte
+
+
+class CacheTraducao:
+    """
+    Cache de blocos básicos traduzidos para funções Python.
+
+    Cada bloco começa em um PC e vai até o próximo desvio/salto (inclusive).
+    O bloco é gerado como código-fonte, compilado com `compile` e executado
+    sobre variáveis locais; os registradores alterados são devolvidos ao banco
+    na saída do bloco. A função gerada recebe (regs, memoria, dados_na_memoria)
+    e retorna o PC da próxima instrução.
+    """
+
+    def __init__(self, max_instrucoes_bloco=64):
+        self.max_instrucoes_bloco = max_instrucoes_bloco
+        self.blocos = {}
+        self.acertos = 0
+        self.faltas = 0
+        self.compilacoes = 0
+        self.invalidacoes = 0
+        self.tempo_traducao = 0.0
+
+    def obter(self, pc, tabela, instrucoes, base=0):
+        """Retorna o bloco que começa em `pc`, traduzindo-o na primeira vez."""
+        bloco = self.blocos.get(pc)
+        if bloco is not None:
+            self.acertos += 1
+            return bloco
+        return self.traduzir_falta(pc, tabela, instrucoes, base)
+
+    def traduzir_falta(self, pc, tabela, instrucoes, base=0):
+        """Trata uma falta no cache: traduz o bloco e o guarda."""
+        self.faltas += 1
+        bloco = self.traduzir(pc, tabela, instrucoes, base)
+        if bloco is not None:
+            self.blocos[pc] = bloco
+        return bloco
+
+    def invalidar(self, endereco=None):
+        """Descarta os blocos que contêm `endereco` (ou todos, se None)."""
+        if endereco is None:
+            self.invalidacoes += len(self.blocos)
+            self.blocos.clear()
+            return
+        afetados = [inicio for inicio, bloco in self.blocos.items()
+                    if bloco.inicio <= endereco < bloco.fim]
+        for inicio in afetados:
+            del self.blocos[inicio]
+        self.invalidacoes += len(afetados)
+
+    def estatisticas(self):
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "compilacoes": self.compilacoes,
+            "invalidacoes": self.invalidacoes,
+            "blocos": len(self.blocos),
+            "tempo_traducao": self.tempo_traducao,
+        }
+
+    def traduzir(self, pc_inicial, tabela, instrucoes, base=0):
+        """
+        Gera e compila o bloco iniciado em `pc_inicial`; None se não houver o que traduzir.
+        `tabela` e `instrucoes` são indexadas a partir de `base` (endereço da primeira instrução).
+        """
+        inicio_traducao = time.perf_counter()
+        fim_programa = base + len(tabela) * 4
+
+        corpo = []
+        lidos = set()
+        escritos = set()
+        pc = pc_inicial
+        terminou = False
+
+        def reg(n):
+            if n == 0:
+                return "0"
+            lidos.add(n)
+            return f"x{n}"
+
+        def destino(n):
+            if n == 0:
+                return "_"
+            escritos.add(n)
+            return f"x{n}"
+
+        while pc < fim_programa and len(corpo) < self.max_instrucoes_bloco:
+            indice = (pc - base) >> 2
+            inst = tabela[indice]
+            if inst is None:
+                inst = tabela[indice] = pre_decodificar(instrucoes[indice])
+            nome = inst.nome
+            if nome not in _TRADUZIVEIS:
+                break
+            a, b, imm = inst.rs1, inst.rs2, inst.imm
+            alvo = (pc + imm) & MASK32
+            proximo = pc + 4
+
+            if inst.rd == 0 and nome not in ("lw", "sw") and nome not in TERMINADORES:
+                # Escrita em x0 sem efeito colateral (ex.: nop): nada a gerar
+                linha = "pass"
+            elif nome == "add":
+                linha = f"{destino(inst.rd)} = ({reg(a)} + {reg(b)}) & 0xFFFFFFFF"
+            elif nome == "sub":
+                linha = f"{destino(inst.rd)} = ({reg(a)} - {reg(b)}) & 0xFFFFFFFF"
+            elif nome == "addi":
+                linha = f"{destino(inst.rd)} = ({reg(a)} + {imm}) & 0xFFFFFFFF"
+            elif nome == "mul":
+                linha = f"{destino(inst.rd)} = ({reg(a)} * {reg(b)}) & 0xFFFFFFFF"
+            elif nome in _VIA_ULA:
+                linha = f"{destino(inst.rd)} = ula_{nome}({reg(a)}, {reg(b)})"
+            elif nome == "xor":
+                linha = f"{destino(inst.rd)} = {reg(a)} ^ {reg(b)}"
+            elif nome == "and":
+                linha = f"{destino(inst.rd)} = {reg(a)} & {reg(b)}"
+            elif nome == "or":
+                linha = f"{destino(inst.rd)} = {reg(a)} | {reg(b)}"
+            elif nome == "sll":
+                linha = f"{destino(inst.rd)} = ({reg(a)} << ({reg(b)} & 31)) & 0xFFFFFFFF"
+            elif nome == "srl":
+                linha = f"{destino(inst.rd)} = {reg(a)} >> ({reg(b)} & 31)"
+            elif nome == "sra":
+                # Deslocamento aritmético: (x ^ 2**31) - 2**31 é o valor com sinal
+                linha = f"{destino(inst.rd)} = ((({reg(a)} ^ 0x80000000) - 0x80000000) >> ({reg(b)} & 31)) & 0xFFFFFFFF"
+            elif nome == "slt":
+                linha = f"{destino(inst.rd)} = int(({reg(a)} ^ 0x80000000) < ({reg(b)} ^ 0x80000000))"
+            elif nome == "sltu":
+                linha = f"{destino(inst.rd)} = int({reg(a)} < {reg(b)})"
+            elif nome == "slti":
+                linha = f"{destino(inst.rd)} = int(({reg(a)} ^ 0x80000000) < {(imm & MASK32) ^ 0x80000000})"
+            elif nome == "sltiu":
+                linha = f"{destino(inst.rd)} = int({reg(a)} < {imm & MASK32})"
+            elif nome == "xori":
+                linha = f"{destino(inst.rd)} = {reg(a)} ^ {imm & MASK32}"
+            elif nome == "ori":
+                linha = f"{destino(inst.rd)} = {reg(a)} | {imm & MASK32}"
+            elif nome == "andi":
+                linha = f"{destino(inst.rd)} = {reg(a)} & {imm & MASK32}"
+            elif nome == "slli":
+                linha = f"{destino(inst.rd)} = ({reg(a)} << {imm & 31}) & 0xFFFFFFFF"
+            elif nome == "srli":
+                linha = f"{destino(inst.rd)} = {reg(a)} >> {imm & 31}"
+            elif nome == "srai":
+                linha = f"{destino(inst.rd)} = ((({reg(a)} ^ 0x80000000) - 0x80000000) >> {imm & 31}) & 0xFFFFFFFF"
+            elif nome == "lui":
+                linha = f"{destino(inst.rd)} = {imm & MASK32}"
+            elif nome == "auipc":
+                linha = f"{destino(inst.rd)} = {(pc + imm) & MASK32}"
+            elif nome == "lw":
+                linha = f"{destino(inst.rd)} = ler_word(({reg(a)} + {imm}) & 0xFFFFFFFF)"
+            elif nome == "sw":
+                linha = (f"_e = ({reg(a)} + {imm}) & 0xFFFFFFFF; "
+                         f"escrever_word(_e, {reg(b)}); dados_na_memoria[_e] = {reg(b)}")
+            elif nome == "beq":
+                linha = f"if {reg(a)} == {reg(b)}: return {alvo}\nreturn {proximo}"
+            elif nome == "bne":
+                linha = f"if {reg(a)} != {reg(b)}: return {alvo}\nreturn {proximo}"
+            elif nome == "blt":
+                # Comparação com sinal: inverter o bit 31 preserva a ordem em complemento de dois
+                linha = f"if ({reg(a)} ^ 0x80000000) < ({reg(b)} ^ 0x80000000): return {alvo}\nreturn {proximo}"
+            elif nome == "bge":
+                linha = f"if ({reg(a)} ^ 0x80000000) >= ({reg(b)} ^ 0x80000000): return {alvo}\nreturn {proximo}"
+            elif nome in ("jal", "j"):
+                linha = f"{destino(inst.rd)} = {proximo}\nreturn {alvo}"
+            else:  # jalr: o alvo é calculado antes de escrever rd (rd pode ser igual a rs1)
+                linha = (f"_alvo = (({reg(a)} + {imm}) & ~1) & 0xFFFFFFFF\n"
+                         f"{destino(inst.rd)} = {proximo}\nreturn _alvo")
+
+            corpo.append(f"# 0x{pc:08x}: {nome}\n{linha}")
+            pc = proximo
+            if nome in TERMINADORES:
+                terminou = True
+                break
+
+        if not corpo:
+            return None
+        if not terminou:
+            corpo.append(f"return {pc}")
+
+        usados = sorted(lidos | escritos)
+        fonte = ["def bloco(regs, memoria, dados_na_memoria):"]
+        if any("ler_word(" in trecho for trecho in corpo):
+            fonte.append("    ler_word = memoria.ler_word")
+        if any("escrever_word(" in trecho for trecho in corpo):
+            fonte.append("    escrever_word = memoria.escrever_word")
+        fonte += [f"    x{n} = regs[{n}]" for n in usados]
+        fonte.append("    try:")
+        for trecho in corpo:
+            fonte += ["        " + linha for linha in trecho.splitlines()]
+        fonte.append("    finally:")
+        fonte += [f"        regs[{n}] = x{n}" for n in sorted(escritos)] or ["        pass"]
+        fonte = "\n".join(fonte) + "\n"
+
+        escopo = dict(_FUNCOES_ULA)
+        exec(compile(fonte, f"<bloco 0x{pc_inicial:08x}>", "exec"), escopo)
+        self.compilacoes += 1
+        self.tempo_traducao += time.perf_counter() - inicio_traducao
+        return BlocoTraduzido(escopo["bloco"], pc_inicial, pc, (pc - pc_inicial) // 4, fonte)